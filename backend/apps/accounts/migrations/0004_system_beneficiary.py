@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:16
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalize_text(value):
+    """Cópia de apps.beneficiaries.models.normalize_text no momento desta migration"""
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def link_system_beneficiaries(apps, schema_editor):
+    """Cria/adota o beneficiário do sistema de cada conta e cartão existente"""
+    Beneficiary = apps.get_model('beneficiaries', 'Beneficiary')
+    kinds = [
+        (apps.get_model('accounts', 'Account'), 'Conta', 'conta_bancaria'),
+        (apps.get_model('accounts', 'CreditCard'), 'Cartão', 'cartao_credito'),
+    ]
+    for model, prefix, tipo in kinds:
+        for owner in model.objects.filter(beneficiary__isnull=True):
+            nome = f'{prefix} {owner.nome}'
+            beneficiary, created = Beneficiary.objects.get_or_create(
+                workspace_id=owner.workspace_id,
+                nome_normalizado=normalize_text(nome),
+                defaults={
+                    'nome': nome,
+                    'user_id': owner.user_id,
+                    'tipo': tipo,
+                    'descricao': f'Auto-criado para {nome}',
+                    'is_system': True,
+                },
+            )
+            if not created and not (beneficiary.is_system and beneficiary.is_active):
+                # Beneficiário manual com o mesmo nome: adotado como do sistema
+                beneficiary.is_system = True
+                beneficiary.is_active = True
+                beneficiary.save(update_fields=['is_system', 'is_active'])
+            owner.beneficiary = beneficiary
+            owner.save(update_fields=['beneficiary'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_add_user_profile_fields'),
+        ('beneficiaries', '0006_beneficiary_usage_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='beneficiary',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='system_account', to='beneficiaries.beneficiary'),
+        ),
+        migrations.AddField(
+            model_name='creditcard',
+            name='beneficiary',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='system_credit_card', to='beneficiaries.beneficiary'),
+        ),
+        migrations.RunPython(link_system_beneficiaries, migrations.RunPython.noop),
+    ]
@@ -85,6 +85,12 @@ class Account(models.Model):
     cor = models.CharField(max_length=20, default='bg-blue-500')
     icone = models.CharField(max_length=20, default='bank')
     
+    # Beneficiário do sistema ("Conta <nome>") usado nas transações desta conta
+    beneficiary = models.OneToOneField(
+        'beneficiaries.Beneficiary', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='system_account'
+    )
+    
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -126,6 +132,12 @@ class CreditCard(models.Model):
     saldo_atual = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     cor = models.CharField(max_length=20, default='bg-blue-600')
     
+    # Beneficiário do sistema ("Cartão <nome>") usado nas transações deste cartão
+    beneficiary = models.OneToOneField(
+        'beneficiaries.Beneficiary', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='system_credit_card'
+    )
+    
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
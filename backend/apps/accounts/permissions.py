@@ -0,0 +1,123 @@
+"""
+Permissões baseadas no papel do usuário no workspace
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+from apps.accounts.models import WorkspaceMember, WorkspaceMemberRole
+
+
+READ_ROLES = (
+    WorkspaceMemberRole.ADMIN,
+    WorkspaceMemberRole.EDITOR,
+    WorkspaceMemberRole.VIEWER,
+)
+WRITE_ROLES = (
+    WorkspaceMemberRole.ADMIN,
+    WorkspaceMemberRole.EDITOR,
+)
+ADMIN_ROLES = (
+    WorkspaceMemberRole.ADMIN,
+)
+
+# Matriz padrão: métodos seguros para qualquer membro, escrita para admin/editor
+DEFAULT_ROLE_MATRIX = {
+    'GET': READ_ROLES,
+    'HEAD': READ_ROLES,
+    'OPTIONS': READ_ROLES,
+    'POST': WRITE_ROLES,
+    'PUT': WRITE_ROLES,
+    'PATCH': WRITE_ROLES,
+    'DELETE': WRITE_ROLES,
+}
+
+ROLE_CACHE_TIMEOUT = getattr(settings, 'WORKSPACE_ROLE_CACHE_TIMEOUT', 300)
+
+
+def _role_cache_key(user_id, workspace_id):
+    return f"workspace_role:{user_id}:{workspace_id or 'default'}"
+
+
+def invalidate_workspace_role(user_id, workspace_id):
+    """Remove do cache o papel do usuário (no workspace e no fallback padrão)"""
+    cache.delete_many([
+        _role_cache_key(user_id, workspace_id),
+        _role_cache_key(user_id, None),
+    ])
+
+
+def get_workspace_membership(request):
+    """
+    Retorna (workspace_id, role) do usuário para a requisição.
+
+    O resultado é memorizado no próprio request e no cache, de forma que a
+    consulta a WorkspaceMember acontece no máximo uma vez por requisição
+    (e nenhuma vez enquanto o cache estiver válido).
+    """
+    if hasattr(request, '_workspace_membership'):
+        return request._workspace_membership
+
+    workspace = getattr(request, 'workspace', None)
+    workspace_id = workspace.id if workspace else request.headers.get('X-Workspace-ID')
+    if workspace_id is not None:
+        try:
+            workspace_id = int(workspace_id)
+        except (ValueError, TypeError):
+            request._workspace_membership = None
+            return None
+
+    key = _role_cache_key(request.user.id, workspace_id)
+    membership = cache.get(key)
+
+    if membership is None:
+        # Sem X-Workspace-ID usa o mesmo fallback das views: primeiro workspace ativo
+        queryset = WorkspaceMember.objects.filter(user_id=request.user.id, is_active=True)
+        if workspace_id is not None:
+            queryset = queryset.filter(workspace_id=workspace_id)
+        row = queryset.order_by('id').values_list('workspace_id', 'role').first()
+        # Tupla vazia marca "sem acesso" no cache para não repetir a consulta
+        membership = tuple(row) if row else ()
+        cache.set(key, membership, ROLE_CACHE_TIMEOUT)
+
+    membership = membership or None
+    request._workspace_membership = membership
+    request.workspace_role = membership[1] if membership else None
+    return membership
+
+
+class HasWorkspaceRole(permissions.BasePermission):
+    """
+    Permissão declarativa por papel no workspace.
+
+    Usa DEFAULT_ROLE_MATRIX (por método HTTP) e aceita sobrescritas por ação
+    através do atributo ``workspace_role_matrix`` da view, por exemplo::
+
+        workspace_role_matrix = {'destroy': ADMIN_ROLES}
+
+    A verificação por objeto não faz consultas: os objetos já chegam
+    filtrados pelo workspace e o papel vale para todos eles.
+    """
+    message = 'Seu papel neste workspace não permite esta operação.'
+
+    def get_allowed_roles(self, request, view):
+        matrix = getattr(view, 'workspace_role_matrix', {})
+        action = getattr(view, 'action', None)
+        if action in matrix:
+            return matrix[action]
+        if request.method in matrix:
+            return matrix[request.method]
+        return DEFAULT_ROLE_MATRIX.get(request.method, ())
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        membership = get_workspace_membership(request)
+        if not membership:
+            return False
+
+        return membership[1] in self.get_allowed_roles(request, view)
+
+    def has_object_permission(self, request, view, obj):
+        return True
@@ -0,0 +1,14 @@
+"""
+Helpers de documentação OpenAPI carregados sob demanda
+"""
+from django.conf import settings
+
+
+if 'drf_spectacular' in settings.INSTALLED_APPS:
+    from drf_spectacular.utils import extend_schema_field
+else:
+    # Perfil somente-API: sem docs, o decorator vira no-op e drf_spectacular não é importado
+    def extend_schema_field(field, component_name=None):
+        def decorator(func):
+            return func
+        return decorator
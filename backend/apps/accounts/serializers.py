@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.db.models import Sum, Q
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from drf_spectacular.utils import extend_schema_field
+from .schema import extend_schema_field
 from decimal import Decimal
 from .models import User, Account, CreditCard
 
@@ -0,0 +1,15 @@
+"""
+Signals do app de contas
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import WorkspaceMember
+from .permissions import invalidate_workspace_role
+
+
+@receiver(post_save, sender=WorkspaceMember)
+@receiver(post_delete, sender=WorkspaceMember)
+def invalidate_member_role_cache(sender, instance, **kwargs):
+    """Descarta o papel em cache quando a associação ao workspace muda"""
+    invalidate_workspace_role(instance.user_id, instance.workspace_id)
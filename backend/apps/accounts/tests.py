@@ -1,3 +1,121 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.categories.models import Category
+from .models import Account, CreditCard, User, Workspace, WorkspaceMember
+from .permissions import get_workspace_membership
+
+
+class WorkspaceRoleTestCase(TestCase):
+    """Workspace com uma conta e um cartão; o usuário entra com o papel de cada teste"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.user = User.objects.create_user(username='bia', email='bia@example.com', password='x')
+        self.workspace = Workspace.objects.create(nome='Casa', criado_por=self.owner)
+        self.account = Account.objects.create(
+            workspace=self.workspace, user=self.owner, nome='Conta', tipo='cofre'
+        )
+        self.card = CreditCard.objects.create(
+            workspace=self.workspace, user=self.owner, nome='Visa', bandeira='visa', ultimos_4_digitos='1234',
+            dia_vencimento=10, dia_fechamento=3, limite=100,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def join(self, role):
+        self.member = WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role=role)
+
+    def request(self, method, path, data=None):
+        return getattr(self.client, method)(f'/api/accounts/{path}', data, format='json', **self.headers)
+
+
+class HasWorkspaceRoleTest(WorkspaceRoleTestCase):
+    """Matriz padrão por método HTTP e sobrescritas por ação"""
+
+    def test_viewer_reads_only(self):
+        self.join('viewer')
+        self.assertEqual(self.request('get', 'accounts/').status_code, 200)
+        self.assertEqual(self.request('get', f'accounts/{self.account.id}/').status_code, 200)
+        self.assertEqual(self.request('post', 'accounts/', {'nome': 'Nova', 'tipo': 'cofre'}).status_code, 403)
+        self.assertEqual(self.request('patch', f'accounts/{self.account.id}/', {'nome': 'X'}).status_code, 403)
+        self.assertEqual(self.request('delete', f'accounts/{self.account.id}/').status_code, 403)
+
+    def test_editor_writes_but_admin_actions_are_denied(self):
+        self.join('editor')
+        self.assertEqual(self.request('patch', f'accounts/{self.account.id}/', {'nome': 'X'}).status_code, 200)
+        self.assertEqual(self.request('patch', f'credit-cards/{self.card.id}/', {'nome': 'Y'}).status_code, 200)
+
+        self.assertEqual(self.request('delete', f'accounts/{self.account.id}/').status_code, 403)
+        self.assertEqual(self.request('post', 'accounts/recalculate_all_balances/').status_code, 403)
+        self.assertEqual(self.request('post', 'accounts/reset_initial_balances/').status_code, 403)
+        self.assertEqual(self.request('delete', f'credit-cards/{self.card.id}/').status_code, 403)
+
+    def test_admin_deletes(self):
+        self.join('admin')
+        self.assertEqual(self.request('delete', f'credit-cards/{self.card.id}/').status_code, 204)
+        self.assertEqual(self.request('delete', f'accounts/{self.account.id}/').status_code, 204)
+
+    def test_non_member_denied(self):
+        self.assertEqual(self.request('get', 'accounts/').status_code, 403)
+
+
+class WorkspaceRoleCacheTest(WorkspaceRoleTestCase):
+    """Papel em cache (chave workspace_role:), invalidado pelos signals de WorkspaceMember"""
+
+    def membership(self):
+        request = RequestFactory().get('/', HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+        request.user = self.user
+        return get_workspace_membership(request)
+
+    def test_cached_after_first_lookup(self):
+        self.join('editor')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.membership(), (self.workspace.id, 'editor'))
+        self.assertEqual(
+            cache.get(f'workspace_role:{self.user.id}:{self.workspace.id}'), (self.workspace.id, 'editor')
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.membership(), (self.workspace.id, 'editor'))
+
+    def test_role_change_applies_on_next_request(self):
+        self.join('admin')
+        self.assertEqual(self.request('patch', f'accounts/{self.account.id}/', {'nome': 'X'}).status_code, 200)
+
+        self.member.role = 'viewer'
+        self.member.save()
+        self.assertEqual(self.request('patch', f'accounts/{self.account.id}/', {'nome': 'Y'}).status_code, 403)
+        self.assertEqual(self.request('get', 'accounts/').status_code, 200)
+
+        self.member.is_active = False
+        self.member.save()
+        self.assertEqual(self.request('get', 'accounts/').status_code, 403)
+
+    def test_removed_member_denied_on_next_request(self):
+        self.join('admin')
+        self.assertEqual(self.request('get', 'accounts/').status_code, 200)
+        self.member.delete()
+        self.assertEqual(self.request('get', 'accounts/').status_code, 403)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        self.join('viewer')
+        Category.objects.create(workspace=self.workspace, user=self.owner, nome='Categoria 0')
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/categories/categories/', **self.headers)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        # Primeira requisição consulta o papel; as seguintes o encontram no cache
+        cold = list_queries()
+        one = list_queries()
+        self.assertEqual(cold, one + 1)
+        for i in range(1, 10):
+            Category.objects.create(workspace=self.workspace, user=self.owner, nome=f'Categoria {i}')
+        self.assertEqual(list_queries(), one)
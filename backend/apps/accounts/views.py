@@ -14,6 +14,7 @@ from .serializers import (
     ChangePasswordSerializer
 )
 from .workspace_mixins import WorkspaceMixin, WorkspaceRequiredMixin
+from .permissions import HasWorkspaceRole, ADMIN_ROLES
 
 
 class CustomJWTLoginView(TokenObtainPairView):
@@ -89,7 +90,12 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 class AccountViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar contas financeiras"""
     serializer_class = AccountSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+    workspace_role_matrix = {
+        'destroy': ADMIN_ROLES,
+        'recalculate_all_balances': ADMIN_ROLES,
+        'reset_initial_balances': ADMIN_ROLES,
+    }
 
     def get_queryset(self):
         """Retorna contas filtradas por workspace com otimização para cálculo de saldo"""
@@ -312,7 +318,10 @@ class AccountViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
 class CreditCardViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar cartões de crédito"""
     serializer_class = CreditCardSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+    workspace_role_matrix = {
+        'destroy': ADMIN_ROLES,
+    }
 
     def get_queryset(self):
         """Retorna cartões filtrados por workspace com otimização para cálculo de saldo"""
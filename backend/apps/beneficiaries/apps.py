@@ -5,3 +5,6 @@ class BeneficiariesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.beneficiaries'
     verbose_name = 'Beneficiários'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.beneficiaries.models import Beneficiary
+from apps.beneficiaries.stats import rebuild_usage_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as estatísticas de uso dos beneficiários a partir das transações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workspace',
+            type=int,
+            help='Recalcula apenas os beneficiários deste workspace',
+        )
+
+    def handle(self, *args, **options):
+        beneficiaries = Beneficiary.objects.all()
+        if options['workspace']:
+            beneficiaries = beneficiaries.filter(workspace_id=options['workspace'])
+
+        updated = rebuild_usage_stats(beneficiaries)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} beneficiário(s) com estatísticas atualizadas')
+        )
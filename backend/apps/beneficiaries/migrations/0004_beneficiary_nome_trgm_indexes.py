@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Índices GIN de trigramas para a busca por nome (somente PostgreSQL)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Operador % (trigram_similar) e ILIKE
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS beneficiary_nome_trgm '
+        'ON beneficiaries_beneficiary USING gin (nome gin_trgm_ops)'
+    )
+    # nome__icontains do Django gera UPPER(nome::text) LIKE UPPER(...)
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS beneficiary_nome_upper_trgm '
+        'ON beneficiaries_beneficiary USING gin ((UPPER(nome::text)) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS beneficiary_nome_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS beneficiary_nome_upper_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('beneficiaries', '0003_alter_beneficiary_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
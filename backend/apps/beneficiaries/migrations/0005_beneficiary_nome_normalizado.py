@@ -0,0 +1,102 @@
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_text(value):
+    """Cópia de apps.beneficiaries.models.normalize_text no momento desta migration"""
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def backfill_nome_normalizado(apps, schema_editor):
+    """
+    Preenche nome_normalizado e mescla beneficiários que passam a ter a mesma chave.
+
+    Em cada grupo fica o beneficiário do sistema, senão um ativo, senão o mais
+    antigo; as transações dos demais são remapeadas para ele antes de removê-los.
+    """
+    Beneficiary = apps.get_model('beneficiaries', 'Beneficiary')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    groups = {}
+    beneficiaries = list(Beneficiary.objects.only('id', 'nome', 'workspace_id', 'is_system', 'is_active'))
+    for beneficiary in beneficiaries:
+        beneficiary.nome_normalizado = normalize_text(beneficiary.nome)
+        groups.setdefault((beneficiary.workspace_id, beneficiary.nome_normalizado), []).append(beneficiary)
+
+    duplicate_ids = []
+    for group in groups.values():
+        if len(group) == 1:
+            continue
+        group.sort(key=lambda b: (not b.is_system, not b.is_active, b.id))
+        survivor, duplicates = group[0], group[1:]
+        ids = [b.id for b in duplicates]
+        Transaction.objects.filter(beneficiario_id__in=ids).update(beneficiario_id=survivor.id)
+        survivor.is_active = any(b.is_active for b in group)
+        duplicate_ids.extend(ids)
+
+    # Remove antes de gravar as chaves para não violar a constraint criada a seguir
+    Beneficiary.objects.filter(id__in=duplicate_ids).delete()
+    removed = set(duplicate_ids)
+    Beneficiary.objects.bulk_update(
+        [b for b in beneficiaries if b.id not in removed],
+        ['nome_normalizado', 'is_active'],
+        batch_size=500,
+    )
+
+
+def create_trigram_index(apps, schema_editor):
+    """No PostgreSQL a busca passa a usar nome_normalizado (ver 0004)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS beneficiary_nome_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS beneficiary_nome_upper_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS beneficiary_nome_normalizado_trgm '
+        'ON beneficiaries_beneficiary USING gin (nome_normalizado gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS beneficiary_nome_normalizado_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS beneficiary_nome_trgm '
+        'ON beneficiaries_beneficiary USING gin (nome gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS beneficiary_nome_upper_trgm '
+        'ON beneficiaries_beneficiary USING gin ((UPPER(nome::text)) gin_trgm_ops)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_add_user_profile_fields'),
+        ('beneficiaries', '0004_beneficiary_nome_trgm_indexes'),
+        ('transactions', '0005_optimize_balance_queries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='beneficiary',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='beneficiary',
+            name='nome_normalizado',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Nome normalizado'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_nome_normalizado, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='beneficiary',
+            constraint=models.UniqueConstraint(fields=('workspace', 'nome_normalizado'), name='unique_beneficiary_nome_normalizado'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
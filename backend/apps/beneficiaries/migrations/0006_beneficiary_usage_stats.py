@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_usage_stats(apps, schema_editor):
+    """Estatísticas iniciais a partir das transações existentes"""
+    Beneficiary = apps.get_model('beneficiaries', 'Beneficiary')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    totals = (
+        Transaction.objects
+        .filter(beneficiario__isnull=False)
+        .order_by()
+        .values('beneficiario_id')
+        .annotate(count=Count('id'), total=Sum('valor'), last=Max('data'))
+    )
+    Beneficiary.objects.bulk_update(
+        [
+            Beneficiary(
+                pk=row['beneficiario_id'],
+                total_transacoes=row['count'],
+                valor_total=row['total'],
+                ultimo_uso=row['last'],
+            )
+            for row in totals
+        ],
+        ['total_transacoes', 'valor_total', 'ultimo_uso'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_add_user_profile_fields'),
+        ('beneficiaries', '0005_beneficiary_nome_normalizado'),
+        ('transactions', '0005_optimize_balance_queries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beneficiary',
+            name='total_transacoes',
+            field=models.PositiveIntegerField(default=0, verbose_name='Transações'),
+        ),
+        migrations.AddField(
+            model_name='beneficiary',
+            name='ultimo_uso',
+            field=models.DateField(blank=True, null=True, verbose_name='Último uso'),
+        ),
+        migrations.AddField(
+            model_name='beneficiary',
+            name='valor_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor total'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['workspace', 'is_active', '-ultimo_uso'], name='beneficiary_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['workspace', 'is_active', '-total_transacoes'], name='beneficiary_frequent_idx'),
+        ),
+        migrations.RunPython(backfill_usage_stats, migrations.RunPython.noop),
+    ]
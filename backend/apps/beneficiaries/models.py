@@ -1,3 +1,5 @@
+import unicodedata
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.accounts.models import Workspace
@@ -5,6 +7,12 @@ from apps.accounts.models import Workspace
 User = get_user_model()
 
 
+def normalize_text(value):
+    """Minúsculas (casefold), sem acentos e com espaços colapsados"""
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
 class BeneficiaryType(models.TextChoices):
     """Tipos de beneficiário"""
     PESSOA_FISICA = 'pessoa_fisica', 'Pessoa Física'
@@ -22,6 +30,8 @@ class Beneficiary(models.Model):
     Pode ser uma loja, pessoa física, pessoa jurídica, PIX, etc.
     """
     nome = models.CharField(max_length=255, verbose_name="Nome do Beneficiário")
+    # Chave de busca/unicidade: ver normalize_text (preenchido em save)
+    nome_normalizado = models.CharField(max_length=255, editable=False, verbose_name="Nome normalizado")
     tipo = models.CharField(
         max_length=20, 
         choices=BeneficiaryType.choices,
@@ -47,6 +57,11 @@ class Beneficiary(models.Model):
         help_text="Beneficiários criados automaticamente pelo sistema (contas/cartões)"
     )
     is_active = models.BooleanField(default=True, verbose_name="Ativo")
+
+    # Estatísticas de uso, mantidas a cada escrita de transação (ver stats.py)
+    total_transacoes = models.PositiveIntegerField(default=0, verbose_name="Transações")
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Valor total")
+    ultimo_uso = models.DateField(null=True, blank=True, verbose_name="Último uso")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
 
@@ -54,12 +69,21 @@ class Beneficiary(models.Model):
         verbose_name = "Beneficiário"
         verbose_name_plural = "Beneficiários"
         ordering = ['nome']
-        unique_together = [['nome', 'workspace']]  # Nome único por workspace
+        constraints = [
+            # Nome único por workspace, sem diferenciar maiúsculas/acentos
+            models.UniqueConstraint(
+                fields=['workspace', 'nome_normalizado'],
+                name='unique_beneficiary_nome_normalizado',
+            ),
+        ]
         indexes = [
             models.Index(fields=['workspace', 'is_active']),
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['nome']),
             models.Index(fields=['tipo']),
+            # Listas de mais recentes / mais usados do dropdown
+            models.Index(fields=['workspace', 'is_active', '-ultimo_uso'], name='beneficiary_recent_idx'),
+            models.Index(fields=['workspace', 'is_active', '-total_transacoes'], name='beneficiary_frequent_idx'),
         ]
 
     def __str__(self):
@@ -68,4 +92,8 @@ class Beneficiary(models.Model):
     def save(self, *args, **kwargs):
         # Normalizar nome (remover espaços extras)
         self.nome = ' '.join(self.nome.split())
+        self.nome_normalizado = normalize_text(self.nome)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_normalizado'}
         super().save(*args, **kwargs)
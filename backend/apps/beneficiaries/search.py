@@ -0,0 +1,244 @@
+"""
+Busca de beneficiários por nome (autocomplete)
+
+No PostgreSQL usa a extensão pg_trgm com índice GIN em nome_normalizado
+(migrations 0004/0005): o filtro LIKE e o operador de similaridade (%) são
+atendidos pelo índice.
+Nos demais bancos (SQLite no desenvolvimento) mantém em memória, por
+workspace, um índice de trigramas e de prefixos de palavras, atualizado com as
+linhas alteradas quando a versão dos beneficiários do workspace muda.
+
+Os resultados são ordenados pela similaridade com o termo buscado (com bônus
+para prefixo/trecho exato) e pela frequência de uso em transações
+(total_transacoes).
+"""
+import bisect
+import heapq
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Beneficiary, normalize_text
+
+# Similaridade mínima (mesmo padrão do pg_trgm.similarity_threshold)
+SIMILARITY_THRESHOLD = 0.3
+
+# Peso do uso em transações no ranking (aplicado sobre log(1 + uso))
+USAGE_WEIGHT = 0.1
+
+# Candidatos buscados por resultado, antes de aplicar o uso no ranking
+CANDIDATES_PER_RESULT = 5
+
+# Workspaces com índice em memória por processo
+MAX_CACHED_INDEXES = 32
+
+# Termos de 1-2 letras: quantos nomes com o prefixo considerar
+MAX_SHORT_PREFIX_CANDIDATES = 500
+
+REFRESH_MARGIN = timedelta(seconds=5)
+
+
+def trigrams(text):
+    """Trigramas no estilo do pg_trgm (cada palavra com dois espaços antes e um depois)"""
+    result = set()
+    for word in text.split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def match_bonus(nome, query):
+    """Bônus para nomes que começam com o termo, têm palavra com esse prefixo ou o contêm"""
+    if nome.startswith(query):
+        return 1.0
+    if f' {query}' in nome:
+        return 0.75
+    if query in nome:
+        return 0.5
+    return 0.0
+
+
+# Versão dos beneficiários do workspace, trocada a cada escrita
+
+def _version_key(workspace_id):
+    return f'beneficiary_version:{workspace_id}'
+
+
+def get_beneficiary_version(workspace_id):
+    return cache.get_or_set(_version_key(workspace_id), time.time_ns, None)
+
+
+def bump_beneficiary_version(workspace_id):
+    """Invalida os índices em memória do workspace (em todos os processos)"""
+    cache.set(_version_key(workspace_id), time.time_ns(), None)
+
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama -> ids e lista ordenada de palavras para prefixos.
+
+    Escritas posteriores ao build entram via apply_changes() sem reconstruir
+    tudo; ids alterados ficam em 'dirty' e têm a similaridade recalculada a
+    partir do nome atual (as postings antigas continuam no índice).
+    """
+
+    def __init__(self, rows):
+        self.names = {}
+        self.trigram_counts = {}
+        self.postings = {}
+        self.dirty = set()
+        self.words = []
+        self.built_at = timezone.now()
+        for pk, normalized in rows:
+            self.words.extend((word, pk) for word in self._add(pk, normalized).split())
+        self.words.sort()
+
+    def _add(self, pk, normalized):
+        self.names[pk] = normalized
+        grams = trigrams(normalized)
+        self.trigram_counts[pk] = len(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(pk)
+        return normalized
+
+    def apply_changes(self, rows, since):
+        """Aplica (id, nome_normalizado, is_active) alterados desde o último refresh"""
+        for pk, normalized, is_active in rows:
+            if pk in self.names:
+                self.dirty.add(pk)
+            if not is_active:
+                self.names.pop(pk, None)
+                continue
+            for word in self._add(pk, normalized).split():
+                bisect.insort(self.words, (word, pk))
+        self.built_at = since
+
+    def _prefix_matches(self, prefix, limit=None):
+        start = bisect.bisect_left(self.words, (prefix,))
+        end = bisect.bisect_left(self.words, (prefix + '\uffff',), lo=start)
+        if limit:
+            end = min(end, start + limit)
+        return {pk for _, pk in self.words[start:end]}
+
+    def _similarity(self, pk, query_grams, common):
+        if pk in self.dirty:
+            common = len(query_grams & trigrams(self.names[pk]))
+        return common / (len(query_grams) + self.trigram_counts[pk] - common)
+
+    def search(self, query, limit):
+        """Lista de (id, score) com os melhores candidatos para o termo já normalizado"""
+        query_grams = trigrams(query)
+        first_word = query.split()[0]
+
+        # 1) Nomes com palavra iniciando pelo termo: a similaridade é aproximada
+        # pela proporção de trigramas do termo no nome (sem contar interseções)
+        prefix_limit = MAX_SHORT_PREFIX_CANDIDATES if len(first_word) < 3 else None
+        scored = {}
+        for pk in self._prefix_matches(first_word, prefix_limit):
+            nome = self.names.get(pk)
+            bonus = match_bonus(nome, query) if nome is not None else 0
+            if bonus:
+                scored[pk] = bonus + min(1.0, len(query_grams) / self.trigram_counts[pk])
+
+        # 2) Poucos resultados por prefixo: busca aproximada por trigramas (erros de digitação)
+        if len(scored) < limit and len(query) >= 3:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.postings.get(gram, ()))
+            for pk, common in shared.items():
+                if pk in scored or pk not in self.names:
+                    continue
+                similarity = self._similarity(pk, query_grams, common)
+                bonus = match_bonus(self.names[pk], query)
+                if bonus or similarity >= SIMILARITY_THRESHOLD:
+                    scored[pk] = similarity + bonus
+
+        return heapq.nlargest(limit, scored.items(), key=lambda item: item[1])
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index(workspace_id):
+    """
+    Índice em memória do workspace.
+
+    Quando a versão muda, aplica apenas as linhas alteradas desde o último
+    refresh (updated_at); exclusões físicas saem do resultado no in_bulk final.
+    """
+    version = get_beneficiary_version(workspace_id)
+    with _indexes_lock:
+        entry = _indexes.get(workspace_id)
+        if entry is not None:
+            _indexes.move_to_end(workspace_id)
+            if entry[0] == version:
+                return entry[1]
+
+    queryset = Beneficiary.objects.filter(workspace_id=workspace_id)
+    if entry is None:
+        index = TrigramIndex(
+            queryset.filter(is_active=True).values_list('id', 'nome_normalizado').iterator(chunk_size=5000)
+        )
+    else:
+        index = entry[1]
+        since = timezone.now()
+        # Margem para escritas em andamento e relógios de outros processos
+        changed = queryset.filter(
+            updated_at__gte=index.built_at - REFRESH_MARGIN
+        ).values_list('id', 'nome_normalizado', 'is_active')
+        with _indexes_lock:
+            index.apply_changes(changed, since)
+
+    with _indexes_lock:
+        _indexes[workspace_id] = (version, index)
+        _indexes.move_to_end(workspace_id)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _search_postgres(workspace_id, query, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    rows = (
+        Beneficiary.objects
+        .filter(workspace_id=workspace_id, is_active=True)
+        .filter(Q(nome_normalizado__contains=query) | Q(nome_normalizado__trigram_similar=query))
+        .annotate(similarity=TrigramSimilarity('nome_normalizado', query))
+        .order_by('-similarity')
+        .values_list('id', 'nome_normalizado', 'similarity')[:limit]
+    )
+    return [(pk, similarity + match_bonus(nome, query)) for pk, nome, similarity in rows]
+
+
+def search_beneficiaries(workspace_id, query, limit=10):
+    """Beneficiários ativos do workspace mais relevantes para o termo, em ordem de ranking"""
+    query = normalize_text(query)
+    if not query:
+        return []
+
+    candidate_limit = limit * CANDIDATES_PER_RESULT
+    if connection.vendor == 'postgresql':
+        candidates = _search_postgres(workspace_id, query, candidate_limit)
+    else:
+        candidates = get_trigram_index(workspace_id).search(query, candidate_limit)
+
+    # Uso em transações vem das estatísticas do próprio beneficiário (ver stats.py)
+    beneficiaries = Beneficiary.objects.in_bulk([pk for pk, _ in candidates])
+    ranked = sorted(
+        (
+            (score + USAGE_WEIGHT * math.log1p(beneficiaries[pk].total_transacoes), pk)
+            for pk, score in candidates
+            if pk in beneficiaries
+        ),
+        key=lambda item: -item[0],
+    )[:limit]
+    return [beneficiaries[pk] for _, pk in ranked]
@@ -9,9 +9,13 @@ class BeneficiarySerializer(serializers.ModelSerializer):
         model = Beneficiary
         fields = [
             'id', 'nome', 'is_system', 'is_active', 
+            'total_transacoes', 'valor_total', 'ultimo_uso',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ('id', 'is_system', 'created_at', 'updated_at')
+        read_only_fields = (
+            'id', 'is_system', 'total_transacoes', 'valor_total', 'ultimo_uso',
+            'created_at', 'updated_at'
+        )
 
     def validate_nome(self, value):
         """Validar nome do beneficiário"""
@@ -0,0 +1,134 @@
+"""
+Operações com beneficiários: resolução em lote (importações) e beneficiários
+do sistema das contas/cartões
+"""
+from django.utils import timezone
+
+from .models import Beneficiary, BeneficiaryType, normalize_text
+from .search import bump_beneficiary_version
+
+
+def normalize_nome(nome):
+    """Remove espaços extras (mesma regra de Beneficiary.save)"""
+    return ' '.join(nome.split())
+
+
+def resolve_beneficiaries(workspace, user, nomes):
+    """
+    Garante um beneficiário para cada nome e retorna (mapa nome -> id, criados).
+
+    Uma consulta busca os existentes por nome_normalizado, um INSERT em lote
+    cria os que faltam (ignorando conflitos de importações concorrentes) e uma
+    última consulta lê os ids inseridos. Beneficiários inativos encontrados são
+    reativados. O mapa usa os nomes exatamente como recebidos.
+    """
+    display_by_key = {}
+    for nome in nomes:
+        key = normalize_text(nome)
+        if key:
+            display_by_key.setdefault(key, normalize_nome(nome))
+
+    if not display_by_key:
+        return {}, []
+
+    workspace_beneficiaries = Beneficiary.objects.filter(workspace=workspace)
+    existing = {}
+    inactive_ids = []
+    for pk, key, is_active in workspace_beneficiaries.filter(
+        nome_normalizado__in=list(display_by_key)
+    ).values_list('id', 'nome_normalizado', 'is_active'):
+        existing[key] = pk
+        if not is_active:
+            inactive_ids.append(pk)
+
+    missing = {key: display for key, display in display_by_key.items() if key not in existing}
+    created = []
+    if missing:
+        # bulk_create não chama save(): nome_normalizado é preenchido aqui
+        Beneficiary.objects.bulk_create(
+            [
+                Beneficiary(nome=nome, nome_normalizado=key, workspace=workspace, user=user)
+                for key, nome in missing.items()
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts não devolve as pks: lê de volta os nomes inseridos
+        created = list(workspace_beneficiaries.filter(nome_normalizado__in=list(missing)))
+        for beneficiary in created:
+            existing[beneficiary.nome_normalizado] = beneficiary.id
+
+    if inactive_ids:
+        # updated_at explícito: o índice de busca em memória lê as alterações por ele
+        workspace_beneficiaries.filter(id__in=inactive_ids).update(
+            is_active=True, updated_at=timezone.now()
+        )
+
+    if created or inactive_ids:
+        # bulk_create/update não disparam signals
+        bump_beneficiary_version(workspace.id)
+
+    mapping = {
+        nome: existing[normalize_text(nome)]
+        for nome in nomes
+        if normalize_text(nome) in existing
+    }
+    return mapping, created
+
+
+# Beneficiário do sistema de cada conta/cartão: (prefixo do nome, tipo)
+SYSTEM_BENEFICIARY_KINDS = {
+    'account': ('Conta', BeneficiaryType.CONTA_BANCARIA),
+    'creditcard': ('Cartão', BeneficiaryType.CARTAO_CREDITO),
+}
+
+
+def system_beneficiary_name(owner):
+    prefix, _ = SYSTEM_BENEFICIARY_KINDS[owner._meta.model_name]
+    return f'{prefix} {owner.nome}'
+
+
+def ensure_system_beneficiary(owner):
+    """
+    Beneficiário do sistema de uma conta (Account) ou cartão (CreditCard).
+
+    Criado (ou adotado, se já existir um com o mesmo nome) e vinculado em
+    owner.beneficiary na primeira chamada; depois é só o FK.
+    """
+    if owner.beneficiary_id is not None:
+        return owner.beneficiary
+
+    nome = system_beneficiary_name(owner)
+    _, tipo = SYSTEM_BENEFICIARY_KINDS[owner._meta.model_name]
+    beneficiary, created = Beneficiary.objects.get_or_create(
+        workspace_id=owner.workspace_id,
+        nome_normalizado=normalize_text(nome),
+        defaults={
+            'nome': nome,
+            'user_id': owner.user_id,
+            'tipo': tipo,
+            'descricao': f'Auto-criado para {nome}',
+            'is_system': True,
+        }
+    )
+    if not created and not (beneficiary.is_system and beneficiary.is_active):
+        beneficiary.is_system = True
+        beneficiary.is_active = True
+        beneficiary.save(update_fields=['is_system', 'is_active', 'updated_at'])
+
+    type(owner).objects.filter(pk=owner.pk).update(beneficiary=beneficiary)
+    owner.beneficiary = beneficiary
+    return beneficiary
+
+
+def rename_system_beneficiary(owner):
+    """Acompanha a renomeação da conta/cartão, se o novo nome estiver livre"""
+    nome = system_beneficiary_name(owner)
+    beneficiary = Beneficiary.objects.filter(pk=owner.beneficiary_id).exclude(nome=nome).first()
+    if beneficiary is None or Beneficiary.objects.filter(
+        workspace_id=owner.workspace_id, nome_normalizado=normalize_text(nome)
+    ).exclude(pk=beneficiary.pk).exists():
+        return
+    beneficiary.nome = nome
+    beneficiary.descricao = f'Auto-criado para {nome}'
+    beneficiary.save(update_fields=['nome', 'descricao', 'updated_at'])
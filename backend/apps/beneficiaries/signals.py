@@ -0,0 +1,50 @@
+"""
+Signals do app de beneficiários
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Beneficiary
+from .search import bump_beneficiary_version
+from .services import ensure_system_beneficiary, rename_system_beneficiary
+from .stats import add_usage, remove_usage
+
+@receiver(post_save, sender=Beneficiary)
+@receiver(post_delete, sender=Beneficiary)
+def invalidate_beneficiary_search(sender, instance, **kwargs):
+    """Nova versão dos beneficiários do workspace a cada escrita"""
+    bump_beneficiary_version(instance.workspace_id)
+
+
+@receiver(post_save, sender='transactions.Transaction')
+def update_usage_on_save(sender, instance, created, raw=False, **kwargs):
+    """Aplica a diferença nas estatísticas do(s) beneficiário(s) envolvido(s)"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous', None)
+    before = (previous.beneficiario_id, previous.valor, previous.data) if previous is not None else None
+    after = (instance.beneficiario_id, instance.valor, instance.data)
+    if before == after:
+        return
+    if before is not None and before[0] is not None:
+        remove_usage(before[0], before[1])
+    if instance.beneficiario_id is not None:
+        add_usage(instance.beneficiario_id, instance.valor, instance.data)
+
+
+@receiver(post_delete, sender='transactions.Transaction')
+def update_usage_on_delete(sender, instance, **kwargs):
+    if instance.beneficiario_id is not None:
+        remove_usage(instance.beneficiario_id, instance.valor)
+
+
+@receiver(post_save, sender='accounts.Account')
+@receiver(post_save, sender='accounts.CreditCard')
+def sync_system_beneficiary(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Cria o beneficiário do sistema junto com a conta/cartão e acompanha o nome"""
+    if raw:
+        return
+    if created or instance.beneficiary_id is None:
+        ensure_system_beneficiary(instance)
+    elif update_fields is None or 'nome' in update_fields:
+        rename_system_beneficiary(instance)
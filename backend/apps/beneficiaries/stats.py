@@ -0,0 +1,84 @@
+"""
+Estatísticas de uso dos beneficiários (total de transações, valor total e último uso)
+
+Mantidas de forma incremental pelos signals de Transaction e recalculadas em
+lote pelo comando rebuild_beneficiary_stats (operações em massa como
+QuerySet.update() e bulk_create() não disparam signals).
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Exists, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Beneficiary
+
+
+def add_usage(beneficiary_id, valor, data):
+    """Conta uma transação nova para o beneficiário"""
+    Beneficiary.objects.filter(pk=beneficiary_id).update(
+        total_transacoes=F('total_transacoes') + 1,
+        valor_total=F('valor_total') + valor,
+        ultimo_uso=Greatest(Coalesce('ultimo_uso', Value(data)), Value(data)),
+    )
+
+
+def remove_usage(beneficiary_id, valor):
+    """
+    Desconta uma transação do beneficiário.
+
+    O último uso não pode ser decrementado: é relido das transações restantes
+    na mesma UPDATE (subconsulta pelo índice de beneficiario).
+    """
+    from apps.transactions.models import Transaction
+
+    last_used = Transaction.objects.filter(
+        beneficiario_id=OuterRef('pk')
+    ).order_by().values('beneficiario_id').annotate(last=Max('data')).values('last')
+
+    Beneficiary.objects.filter(pk=beneficiary_id).update(
+        total_transacoes=Greatest(F('total_transacoes') - 1, Value(0)),
+        valor_total=F('valor_total') - valor,
+        ultimo_uso=Subquery(last_used),
+    )
+
+
+def rebuild_usage_stats(beneficiaries=None, batch_size=1000):
+    """
+    Recalcula as estatísticas a partir das transações, em lote.
+
+    Uma consulta agregada por beneficiário, bulk_update dos que têm transações
+    e uma UPDATE zerando os demais. Retorna quantos beneficiários foram
+    atualizados.
+    """
+    from apps.transactions.models import Transaction
+
+    if beneficiaries is None:
+        beneficiaries = Beneficiary.objects.all()
+
+    totals = (
+        Transaction.objects
+        .filter(beneficiario__in=beneficiaries)
+        .order_by()
+        .values('beneficiario_id')
+        .annotate(count=Count('id'), total=Sum('valor'), last=Max('data'))
+    )
+
+    updated = []
+    for row in totals.iterator(chunk_size=batch_size):
+        updated.append(Beneficiary(
+            pk=row['beneficiario_id'],
+            total_transacoes=row['count'],
+            valor_total=row['total'] or Decimal('0'),
+            ultimo_uso=row['last'],
+        ))
+    Beneficiary.objects.bulk_update(
+        updated, ['total_transacoes', 'valor_total', 'ultimo_uso'], batch_size=batch_size
+    )
+
+    unused = beneficiaries.filter(
+        ~Exists(Transaction.objects.filter(beneficiario_id=OuterRef('pk')))
+    ).exclude(
+        total_transacoes=0, valor_total=0, ultimo_uso__isnull=True
+    ).update(total_transacoes=0, valor_total=0, ultimo_uso=None)
+
+    return len(updated) + unused
@@ -0,0 +1,255 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Account, CreditCard, User, Workspace, WorkspaceMember
+from apps.transactions.models import Transaction
+from . import search
+from .models import Beneficiary, normalize_text
+from .services import resolve_beneficiaries
+
+
+class BeneficiaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        search._indexes.clear()
+        self.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.workspace = Workspace.objects.create(nome='Casa', criado_por=self.user)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def create(self, nome, **extra):
+        return Beneficiary.objects.create(nome=nome, workspace=self.workspace, user=self.user, **extra)
+
+    def post(self, path, data):
+        return self.client.post(f'/api/beneficiaries/{path}', data, format='json', **self.headers)
+
+
+class BeneficiarySearchTest(BeneficiaryTestCase):
+    """Busca por similaridade de trigramas, sem acentos, ordenada também pelo uso"""
+
+    def setUp(self):
+        super().setUp()
+        self.beneficiaries = {
+            nome: self.create(nome)
+            for nome in ('Padaria São João', 'Supermercado Extra', 'Super Mercado Bom', 'Farmácia Popular')
+        }
+
+    def names(self, query):
+        return [beneficiary.nome for beneficiary in search.search_beneficiaries(self.workspace.id, query)]
+
+    def test_prefix_ignores_accents(self):
+        self.assertEqual(self.names('sao'), ['Padaria São João'])
+        self.assertEqual(self.names('farm'), ['Farmácia Popular'])
+
+    def test_typo_matches_by_similarity(self):
+        self.assertEqual(self.names('supermecado')[0], 'Supermercado Extra')
+
+    def test_usage_breaks_ties(self):
+        account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Conta', tipo='cofre')
+        for _ in range(3):
+            Transaction.objects.create(
+                workspace=self.workspace, user=self.user, account=account, tipo='saida', valor=1,
+                descricao='Compra', data='2025-03-05', beneficiario=self.beneficiaries['Super Mercado Bom'],
+            )
+        self.assertEqual(self.names('super')[0], 'Super Mercado Bom')
+
+    def test_index_follows_writes(self):
+        padaria = self.beneficiaries['Padaria São João']
+        self.names('sao')
+        padaria.nome = 'Padaria Central'
+        padaria.save()
+        self.beneficiaries['Farmácia Popular'].is_active = False
+        self.beneficiaries['Farmácia Popular'].save()
+        self.create('Farmacia Nova')
+
+        self.assertEqual(self.names('sao'), [])
+        self.assertEqual(self.names('central'), ['Padaria Central'])
+        self.assertEqual(self.names('farm'), ['Farmacia Nova'])
+
+    def test_endpoint(self):
+        response = self.client.get('/api/beneficiaries/search/?q=padar', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['nome'] for item in response.json()], ['Padaria São João'])
+
+
+class BeneficiaryBulkResolveTest(BeneficiaryTestCase):
+    """Importação: nomes resolvidos em lote, sem uma consulta por nome"""
+
+    def test_resolves_existing_new_and_inactive(self):
+        padaria = self.create('Padaria')
+        velho = self.create('Velho', is_active=False)
+
+        mapping, created = resolve_beneficiaries(
+            self.workspace, self.user, ['padaria', ' Mercado  X ', 'mercado x', 'Velho', '']
+        )
+
+        self.assertEqual(mapping['padaria'], padaria.id)
+        self.assertEqual(mapping['Velho'], velho.id)
+        self.assertEqual(mapping[' Mercado  X '], mapping['mercado x'])
+        self.assertNotIn('', mapping)
+        self.assertEqual([beneficiary.nome for beneficiary in created], ['Mercado X'])
+        velho.refresh_from_db()
+        self.assertTrue(velho.is_active)
+
+    def test_query_count_does_not_grow_per_name(self):
+        nomes = [f'Loja {i}' for i in range(2000)]
+        with CaptureQueriesContext(connection) as ctx:
+            mapping, created = resolve_beneficiaries(self.workspace, self.user, nomes)
+        self.assertEqual(len(mapping), 2000)
+        self.assertEqual(len(created), 2000)
+        self.assertLess(len(ctx.captured_queries), 50)
+
+    def test_endpoint_reports_invalid_names(self):
+        response = self.post('bulk_create/', {'nomes': ['Padaria', None]})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total_created'], 1)
+        self.assertEqual(data['errors'], [{'nome': None, 'error': 'Nome deve ser um texto.'}])
+        self.assertEqual(list(data['beneficiaries']), ['Padaria'])
+
+
+class BeneficiaryNormalizedNameTest(BeneficiaryTestCase):
+    """Nome único por workspace sem diferenciar maiúsculas, acentos e espaços"""
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('  Café   CENTRAL '), 'cafe central')
+
+    def test_save_fills_key_and_database_enforces_it(self):
+        beneficiary = self.create('Café  Central')
+        self.assertEqual(beneficiary.nome_normalizado, 'cafe central')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Beneficiary.objects.bulk_create([Beneficiary(
+                nome='CAFE CENTRAL', nome_normalizado='cafe central', workspace=self.workspace, user=self.user,
+            )])
+
+    def test_api_rejects_duplicates_and_reactivates_deleted(self):
+        response = self.post('', {'nome': 'Café Central'})
+        self.assertEqual(response.status_code, 201)
+        beneficiary_id = response.json()['id']
+
+        self.assertEqual(self.post('', {'nome': 'cafe  central'}).status_code, 400)
+        other = self.post('', {'nome': 'Outro'}).json()
+        response = self.client.patch(
+            f"/api/beneficiaries/{other['id']}/", {'nome': 'CAFÉ central'}, format='json', **self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.client.delete(f'/api/beneficiaries/{beneficiary_id}/', **self.headers)
+        response = self.post('', {'nome': 'CAFÉ CENTRAL'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['id'], beneficiary_id)
+        self.assertTrue(response.json()['is_active'])
+
+    def test_search_or_create_reuses_existing(self):
+        self.create('Café Central')
+        response = self.post('search-or-create/', {'nome': 'cafe central'})
+        self.assertFalse(response.json()['created'])
+        self.assertEqual(Beneficiary.objects.filter(workspace=self.workspace).count(), 1)
+
+
+class BeneficiaryUsageStatsTest(BeneficiaryTestCase):
+    """Estatísticas de uso mantidas pelos signals de Transaction"""
+
+    def setUp(self):
+        super().setUp()
+        self.account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Conta', tipo='cofre')
+        self.mercado = self.create('Mercado')
+        self.padaria = self.create('Padaria')
+
+    def transaction(self, beneficiario, valor, data):
+        return Transaction.objects.create(
+            workspace=self.workspace, user=self.user, account=self.account, tipo='saida',
+            valor=valor, descricao='Compra', data=data, beneficiario=beneficiario,
+        )
+
+    def stats(self, beneficiary):
+        beneficiary.refresh_from_db()
+        return beneficiary.total_transacoes, beneficiary.valor_total, beneficiary.ultimo_uso
+
+    def test_create_update_delete(self):
+        primeira = self.transaction(self.mercado, 10, date(2025, 1, 1))
+        segunda = self.transaction(self.mercado, 5, date(2025, 3, 1))
+        self.assertEqual(self.stats(self.mercado), (2, Decimal('15.00'), date(2025, 3, 1)))
+
+        segunda.beneficiario = self.padaria
+        segunda.save()
+        self.assertEqual(self.stats(self.mercado), (1, Decimal('10.00'), date(2025, 1, 1)))
+        self.assertEqual(self.stats(self.padaria), (1, Decimal('5.00'), date(2025, 3, 1)))
+
+        primeira.valor = 12
+        primeira.save()
+        self.assertEqual(self.stats(self.mercado)[:2], (1, Decimal('12.00')))
+
+        segunda.delete()
+        self.assertEqual(self.stats(self.padaria)[:2], (0, Decimal('0.00')))
+
+    def test_rebuild_command(self):
+        self.transaction(self.mercado, 10, date(2025, 1, 1))
+        Beneficiary.objects.update(total_transacoes=99, valor_total=0)
+        call_command('rebuild_beneficiary_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.mercado), (1, Decimal('10.00'), date(2025, 1, 1)))
+        self.assertEqual(self.stats(self.padaria)[0], 0)
+
+    def test_top_endpoint(self):
+        self.transaction(self.mercado, 10, date(2025, 1, 1))
+        self.transaction(self.mercado, 10, date(2025, 1, 2))
+        self.transaction(self.padaria, 10, date(2025, 2, 1))
+
+        def top(order):
+            return self.client.get(f'/api/beneficiaries/top/?order={order}', **self.headers)
+
+        self.assertEqual([item['nome'] for item in top('frequent').json()][:2], ['Mercado', 'Padaria'])
+        self.assertEqual([item['nome'] for item in top('recent').json()][:2], ['Padaria', 'Mercado'])
+        self.assertEqual(top('x').status_code, 400)
+
+
+class SystemBeneficiaryTest(BeneficiaryTestCase):
+    """Contas e cartões têm um beneficiário do sistema usado nas transações"""
+
+    def test_created_and_renamed_with_owner(self):
+        account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Nubank', tipo='cofre')
+        card = CreditCard.objects.create(
+            workspace=self.workspace, user=self.user, nome='Visa', bandeira='visa', ultimos_4_digitos='1234',
+            dia_vencimento=10, dia_fechamento=3, limite=100,
+        )
+        self.assertEqual(account.beneficiary.nome, 'Conta Nubank')
+        self.assertEqual(card.beneficiary.nome, 'Cartão Visa')
+        self.assertTrue(account.beneficiary.is_system)
+
+        account.nome = 'Nu'
+        account.save()
+        self.assertEqual(Beneficiary.objects.get(pk=account.beneficiary_id).nome, 'Conta Nu')
+
+    def test_transaction_gets_system_beneficiary(self):
+        account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Nubank', tipo='cofre')
+        response = self.client.post('/api/transactions/transactions/', {
+            'account': account.id, 'tipo': 'saida', 'valor': '10.00', 'descricao': 'Compra', 'data': '2025-03-05',
+        }, format='json', **self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['beneficiario'], account.beneficiary_id)
+
+    def test_migration_adopts_existing_beneficiary(self):
+        account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Nubank', tipo='cofre')
+        Account.objects.filter(pk=account.pk).update(beneficiary=None)
+        Beneficiary.objects.filter(pk=account.beneficiary_id).update(is_system=False, is_active=False)
+
+        migration = import_module('apps.accounts.migrations.0004_system_beneficiary')
+        migration.link_system_beneficiaries(apps, None)
+
+        account.refresh_from_db()
+        self.assertEqual(account.beneficiary.nome, 'Conta Nubank')
+        self.assertTrue(account.beneficiary.is_system)
+        self.assertTrue(account.beneficiary.is_active)
+        self.assertEqual(Beneficiary.objects.filter(nome_normalizado='conta nubank').count(), 1)
@@ -2,15 +2,25 @@ from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
-from .models import Beneficiary
+from .models import Beneficiary, normalize_text
 from .serializers import BeneficiarySerializer, BeneficiaryCreateSerializer
+from .search import search_beneficiaries
+from .services import resolve_beneficiaries
 from apps.accounts.workspace_mixins import WorkspaceRequiredMixin
+from apps.accounts.permissions import HasWorkspaceRole
+
+
+# Ordenações do endpoint top (atendidas por beneficiary_recent_idx / beneficiary_frequent_idx)
+TOP_ORDERINGS = {
+    'recent': ('-ultimo_uso', '-total_transacoes'),
+    'frequent': ('-total_transacoes', '-ultimo_uso'),
+}
 
 
 class BeneficiaryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar beneficiários"""
     serializer_class = BeneficiarySerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         """Retorna beneficiários filtrados por workspace"""
@@ -25,43 +35,93 @@ class BeneficiaryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Salva o beneficiário com workspace e user"""
-        # Verificar se já existe beneficiário com mesmo nome
+        # Verificar se já existe beneficiário com mesmo nome (sem diferenciar maiúsculas/acentos)
         nome = serializer.validated_data['nome']
         existing = Beneficiary.objects.filter(
-            nome__iexact=nome,
-            workspace=self.request.workspace,
-            is_active=True
-        ).exists()
+            nome_normalizado=normalize_text(nome),
+            workspace=self.request.workspace
+        ).first()
         
-        if existing:
+        if existing and existing.is_active:
             raise serializers.ValidationError({
                 'nome': 'Já existe um beneficiário com esse nome neste workspace.'
             })
         
+        if existing:
+            # Beneficiário removido (soft delete) com o mesmo nome: reativar
+            serializer.instance = existing
+            serializer.save(is_active=True)
+            return
+        
         serializer.save(
             workspace=self.request.workspace,
             user=self.request.user
         )
 
+    def perform_update(self, serializer):
+        """Impede renomear para um nome já usado no workspace"""
+        nome = serializer.validated_data.get('nome')
+        if nome and Beneficiary.objects.filter(
+            nome_normalizado=normalize_text(nome),
+            workspace=self.request.workspace
+        ).exclude(pk=serializer.instance.pk).exists():
+            raise serializers.ValidationError({
+                'nome': 'Já existe um beneficiário com esse nome neste workspace.'
+            })
+        serializer.save()
+
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Buscar beneficiários por nome"""
+        """Buscar beneficiários por nome (ranking por similaridade e uso)"""
         query = request.query_params.get('q', '').strip()
         
         if not query:
             return Response([])
         
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        
+        beneficiaries = search_beneficiaries(request.workspace.id, query, limit=limit)
+        
+        serializer = self.get_serializer(beneficiaries, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """
+        Beneficiários mais recentes (order=recent, padrão) ou mais usados
+        (order=frequent), lidos das estatísticas de uso pelos índices do modelo.
+        """
+        order = request.query_params.get('order', 'recent')
+        if order not in TOP_ORDERINGS:
+            return Response(
+                {'error': f'order deve ser um de: {", ".join(TOP_ORDERINGS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            limit = 10
+        
         beneficiaries = self.get_queryset().filter(
-            nome__icontains=query,
-            is_active=True
-        )[:10]  # Limitar a 10 resultados
+            is_active=True,
+            total_transacoes__gt=0
+        ).order_by(*TOP_ORDERINGS[order])[:limit]
         
         serializer = self.get_serializer(beneficiaries, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        """Criar múltiplos beneficiários de uma vez (para imports)"""
+        """
+        Criar múltiplos beneficiários de uma vez (para imports).
+
+        Retorna também 'beneficiaries', o mapa nome -> id de todos os nomes
+        recebidos (existentes ou criados), para resolver beneficiários em lote.
+        """
         nomes = request.data.get('nomes', [])
         
         if not isinstance(nomes, list):
@@ -70,35 +130,17 @@ class BeneficiaryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        created = []
-        errors = []
-        
-        for nome in nomes:
-            if not nome or not nome.strip():
-                continue
-                
-            nome_normalizado = ' '.join(nome.strip().split())
-            
-            # Verificar se já existe
-            existing = Beneficiary.objects.filter(
-                nome__iexact=nome_normalizado,
-                workspace=request.workspace,
-                is_active=True
-            ).exists()
-            
-            if not existing:
-                try:
-                    beneficiary = Beneficiary.objects.create(
-                        nome=nome_normalizado,
-                        workspace=request.workspace,
-                        user=request.user
-                    )
-                    created.append(BeneficiarySerializer(beneficiary).data)
-                except Exception as e:
-                    errors.append({'nome': nome_normalizado, 'error': str(e)})
+        errors = [
+            {'nome': nome, 'error': 'Nome deve ser um texto.'}
+            for nome in nomes if not isinstance(nome, str)
+        ]
+        nomes = [nome for nome in nomes if isinstance(nome, str)]
+        
+        mapping, created = resolve_beneficiaries(request.workspace, request.user, nomes)
         
         return Response({
-            'created': created,
+            'created': BeneficiarySerializer(created, many=True).data,
+            'beneficiaries': mapping,
             'errors': errors,
             'total_created': len(created),
             'total_errors': len(errors)
@@ -137,13 +179,15 @@ class BeneficiaryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         # Normalizar nome
         nome_normalizado = ' '.join(nome.split())
         
-        # Tentar encontrar beneficiário existente
+        # Tentar encontrar beneficiário existente (reativando se foi removido)
         try:
             beneficiary = Beneficiary.objects.get(
-                nome__iexact=nome_normalizado,
-                workspace=request.workspace,
-                is_active=True
+                nome_normalizado=normalize_text(nome_normalizado),
+                workspace=request.workspace
             )
+            if not beneficiary.is_active:
+                beneficiary.is_active = True
+                beneficiary.save(update_fields=['is_active', 'updated_at'])
             return Response({
                 'created': False,
                 'beneficiary': BeneficiarySerializer(beneficiary).data
@@ -0,0 +1,112 @@
+"""
+Avaliação dos alertas de orçamento em lote
+
+Uma consulta (alertas JOIN categorias do orçamento JOIN orçamentos) devolve
+os alertas ativos cujo limite foi atingido; eles são marcados como
+notificados com uma UPDATE e geram um BudgetAlertNotification cada, com
+bulk_create. Alertas já notificados cujo gasto voltou a ficar abaixo do
+limite (transação excluída ou recategorizada) são rearmados.
+
+Chamado após escritas de transações (signals, uma vez por transação do
+banco, no commit) e periodicamente pelo comando evaluate_budget_alerts.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .deferred import defer_until_commit
+from .models import BudgetAlert, BudgetAlertNotification
+from .tracking import budgets_covering
+
+
+def _limit_reached():
+    """Condição do alerta em SQL (mesma regra de BudgetAlert.verificar_alerta)"""
+    return (
+        Q(tipo_alerta='percentual', gasto_x100__gte=F('planejado_x_limite'))
+        | Q(tipo_alerta='valor_fixo', budget_category__valor_gasto__gte=F('valor_limite'))
+    )
+
+
+def _alerts(workspace_id=None, datas=()):
+    queryset = BudgetAlert.objects.filter(ativo=True, budget_category__budget__is_active=True)
+    if workspace_id is not None:
+        queryset = queryset.filter(budget_category__budget__workspace_id=workspace_id)
+    if workspace_id is not None and datas:
+        # Só os orçamentos cujo período cobre as datas alteradas
+        queryset = queryset.filter(
+            budget_category__budget__in=budgets_covering(workspace_id, *datas).values('pk')
+        )
+    # Percentual comparado sem divisão: gasto * 100 >= planejado * limite
+    return queryset.annotate(
+        gasto_x100=F('budget_category__valor_gasto') * 100,
+        planejado_x_limite=F('budget_category__valor_planejado') * F('valor_limite'),
+    )
+
+
+def _reais(valor):
+    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def _mensagem(budget_nome, category_nome, valor_gasto, valor_planejado):
+    percentual = (valor_gasto / valor_planejado) * 100 if valor_planejado else 0
+    return (
+        f'{budget_nome} - {category_nome}: gasto de {_reais(valor_gasto)} '
+        f'({percentual:.0f}% de {_reais(valor_planejado)})'
+    )[:255]
+
+
+def evaluate_alerts(workspace_id=None, datas=()):
+    """
+    Dispara os alertas atingidos do workspace (ou de todos, sem workspace_id).
+
+    Com datas, avalia apenas os orçamentos do workspace que cobrem alguma
+    delas. Retorna as notificações criadas.
+    """
+    alerts = _alerts(workspace_id, datas)
+
+    with transaction.atomic():
+        # skip_locked: execuções concorrentes não notificam o mesmo alerta duas vezes
+        triggered = list(
+            alerts.filter(notificado=False)
+            .filter(_limit_reached())
+            .select_for_update(skip_locked=True, of=('self',))
+            .values_list(
+                'id',
+                'budget_category__budget__workspace_id',
+                'budget_category__budget__nome',
+                'budget_category__category__nome',
+                'budget_category__valor_gasto',
+                'budget_category__valor_planejado',
+            )
+        )
+        if triggered:
+            BudgetAlert.objects.filter(id__in=[row[0] for row in triggered]).update(notificado=True)
+        notifications = BudgetAlertNotification.objects.bulk_create([
+            BudgetAlertNotification(
+                alerta_id=alert_id,
+                workspace_id=workspace,
+                mensagem=_mensagem(budget_nome, category_nome, valor_gasto, valor_planejado),
+                valor_gasto=valor_gasto,
+                valor_planejado=valor_planejado,
+            )
+            for alert_id, workspace, budget_nome, category_nome, valor_gasto, valor_planejado in triggered
+        ])
+
+        BudgetAlert.objects.filter(
+            id__in=alerts.filter(notificado=True).exclude(_limit_reached()).values('id')
+        ).update(notificado=False)
+
+    return notifications
+
+
+def _evaluate_pending(pending):
+    for workspace_id, datas in pending.items():
+        evaluate_alerts(workspace_id, sorted(datas))
+
+
+def schedule_alert_evaluation(workspace_id, datas):
+    """
+    Avalia os alertas do workspace afetados pelas datas quando a transação
+    atual for confirmada: uma avaliação por workspace e transação, com as
+    datas de todas as escritas acumuladas (parcelas, importações).
+    """
+    defer_until_commit(_evaluate_pending, workspace_id, datas)
@@ -0,0 +1,43 @@
+"""
+Trabalho adiado para o commit, agrupado por transação
+
+Signals disparados muitas vezes na mesma transação (categorias de um
+orçamento criadas uma a uma, parcelas de uma compra, importações) não
+registram um on_commit cada: defer_until_commit() registra um único callback
+por função e transação, que acumula as chaves (e valores) recebidas e é
+executado uma vez com todas elas.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+
+class _Deferred:
+    def __init__(self, func):
+        self.func = func
+        self.pending = defaultdict(set)
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.func(self.pending)
+
+
+def defer_until_commit(func, key, values=()):
+    """
+    Agenda func({key: {values}}) para quando a transação atual for confirmada.
+
+    Chamadas seguintes com a mesma func, na mesma transação, só acrescentam
+    key/values ao callback já registrado. Fora de um bloco atômico, executa
+    na hora (como transaction.on_commit).
+    """
+    connection = transaction.get_connection()
+    for entry in connection.run_on_commit:
+        callback = entry[1]
+        if isinstance(callback, _Deferred) and callback.func is func and not callback.done:
+            callback.pending[key].update(values)
+            return
+
+    callback = _Deferred(func)
+    callback.pending[key].update(values)
+    transaction.on_commit(callback)
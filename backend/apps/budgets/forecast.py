@@ -0,0 +1,154 @@
+"""
+Projeção do gasto no fim do mês para os orçamentos mensais em aberto
+
+Uma consulta agrupada por (category_id, data) traz o gasto diário do mês de
+referência e dos mesmos meses anteriores (historico). Com numpy, para todas
+as categorias de uma vez:
+
+- gasto até hoje = acumulado do mês atual no dia de referência;
+- amostras do gasto restante = ritmo linear do mês atual (gasto / dias
+  decorridos * dias restantes) e, para cada mês anterior com movimento, o que
+  foi gasto do mesmo dia até o fim daquele mês;
+- projeção = gasto até hoje + média das amostras, e a probabilidade de
+  estouro vem de uma normal com o desvio das amostras.
+
+O orçamento soma as projeções (e variâncias) das suas categorias; sem
+categorias usa a série do total de despesas. Orçamentos anuais e
+personalizados não entram (o modelo é de ritmo dentro do mês).
+"""
+import math
+from calendar import monthrange
+from datetime import date
+
+from django.db.models import Sum
+
+from .models import Budget, BudgetCategory, BudgetType
+
+# Meses anteriores usados como histórico (padrão e máximo)
+DEFAULT_HISTORY = 3
+MAX_HISTORY = 12
+
+# Linha da série de todas as despesas (orçamentos sem categorias)
+TOTAL = 'total'
+
+
+def _month_start(ano, mes, back):
+    total = ano * 12 + (mes - 1) - back
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _overrun_probability(projetado, desvio, planejado, gasto):
+    """P(gasto final > planejado) supondo gasto final ~ Normal(projetado, desvio)"""
+    import numpy as np
+
+    erf = np.vectorize(math.erf, otypes=[float])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (planejado - projetado) / (desvio * math.sqrt(2))
+        probabilidade = np.where(desvio > 0, 0.5 * (1 - erf(np.nan_to_num(z))), projetado > planejado)
+    return np.where(gasto > planejado, 1.0, probabilidade)
+
+
+def forecast_budgets(workspace_id, hoje=None, historico=DEFAULT_HISTORY):
+    """Projeção dos orçamentos mensais do mês de hoje, com suas categorias"""
+    import numpy as np
+    from apps.transactions.models import Transaction, TransactionType
+
+    hoje = hoje or date.today()
+    dia = hoje.day
+    dias_no_mes = monthrange(hoje.year, hoje.month)[1]
+    resposta = {'data_referencia': hoje, 'dias_decorridos': dia, 'dias_no_mes': dias_no_mes}
+
+    budgets = list(Budget.objects.filter(
+        workspace_id=workspace_id, tipo=BudgetType.MENSAL, ano=hoje.year, mes=hoje.month, is_active=True
+    ))
+    if not budgets:
+        return {**resposta, 'meses_historico': 0, 'orcamentos': []}
+    categorias = list(
+        BudgetCategory.objects.filter(budget__in=[budget.pk for budget in budgets]).select_related('category')
+    )
+
+    # Linhas da matriz: categorias dos orçamentos + total de despesas
+    rows = sorted({categoria.category_id for categoria in categorias}) + [TOTAL]
+    row_index = {key: i for i, key in enumerate(rows)}
+
+    gasto_diario = np.zeros((len(rows), historico + 1, 31))
+    daily = (
+        Transaction.objects
+        .filter(
+            workspace_id=workspace_id, tipo=TransactionType.SAIDA, confirmada=True,
+            data__gte=_month_start(hoje.year, hoje.month, historico), data__lte=hoje,
+        )
+        .order_by()
+        .values_list('category_id', 'data')
+        .annotate(total=Sum('valor'))
+    )
+    for category_id, data, total in daily:
+        back = (hoje.year - data.year) * 12 + hoje.month - data.month
+        gasto_diario[row_index[TOTAL], back, data.day - 1] += float(total)
+        if category_id in row_index:
+            gasto_diario[row_index[category_id], back, data.day - 1] += float(total)
+    acumulado = gasto_diario.cumsum(axis=2)
+
+    gasto = acumulado[:, 0, dia - 1]
+
+    amostras = [gasto / dia * (dias_no_mes - dia)]
+    for back in range(1, historico + 1):
+        inicio = _month_start(hoje.year, hoje.month, back)
+        dias = monthrange(inicio.year, inicio.month)[1]
+        if acumulado[row_index[TOTAL], back, dias - 1] == 0:
+            continue  # mês sem nenhuma despesa (antes do uso do workspace)
+        amostras.append(acumulado[:, back, dias - 1] - acumulado[:, back, min(dia, dias) - 1])
+    amostras = np.stack(amostras, axis=1)
+
+    projetado = gasto + amostras.mean(axis=1)
+    variancia = amostras.var(axis=1, ddof=1) if amostras.shape[1] > 1 else np.zeros(len(rows))
+
+    # Categorias dos orçamentos, vetorizado
+    indices = np.array([row_index[categoria.category_id] for categoria in categorias], dtype=int)
+    categoria_planejado = np.array([float(categoria.valor_planejado) for categoria in categorias])
+    categoria_probabilidade = _overrun_probability(
+        projetado[indices], np.sqrt(variancia[indices]), categoria_planejado, gasto[indices]
+    )
+
+    # Orçamentos: soma das suas categorias, ou a linha do total
+    linhas = []
+    for budget in budgets:
+        membros = [i for i, categoria in enumerate(categorias) if categoria.budget_id == budget.pk]
+        linhas.append(indices[membros] if membros else [row_index[TOTAL]])
+    budget_gasto = np.array([gasto[linha].sum() for linha in linhas])
+    budget_projetado = np.array([projetado[linha].sum() for linha in linhas])
+    budget_planejado = np.array([float(budget.valor_planejado) for budget in budgets])
+    budget_probabilidade = _overrun_probability(
+        budget_projetado, np.sqrt([variancia[linha].sum() for linha in linhas]),
+        budget_planejado, budget_gasto,
+    )
+
+    def resultado(planejado, gasto_atual, projecao, probabilidade):
+        return {
+            'planejado': planejado,
+            'gasto_atual': round(float(gasto_atual), 2),
+            'projetado': round(float(projecao), 2),
+            'probabilidade_estouro': round(float(probabilidade), 4),
+        }
+
+    orcamentos = []
+    for b, budget in enumerate(budgets):
+        orcamentos.append({
+            'id': budget.pk,
+            'nome': budget.nome,
+            **resultado(budget.valor_planejado, budget_gasto[b], budget_projetado[b], budget_probabilidade[b]),
+            'categorias': [
+                {
+                    'category_id': categoria.category_id,
+                    'category_name': categoria.category.nome,
+                    **resultado(
+                        categoria.valor_planejado, gasto[indices[c]], projetado[indices[c]],
+                        categoria_probabilidade[c],
+                    ),
+                }
+                for c, categoria in enumerate(categorias)
+                if categoria.budget_id == budget.pk
+            ],
+        })
+
+    return {**resposta, 'meses_historico': amostras.shape[1] - 1, 'orcamentos': orcamentos}
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.budgets.alerts import evaluate_alerts
+
+
+class Command(BaseCommand):
+    help = 'Avalia os alertas de orçamento e gera as notificações dos que atingiram o limite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workspace',
+            type=int,
+            help='Avalia apenas os alertas deste workspace',
+        )
+
+    def handle(self, *args, **options):
+        notifications = evaluate_alerts(options['workspace'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{len(notifications)} alerta(s) disparado(s)')
+        )
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import Workspace
+from apps.budgets.services import recompute_budget_spend
+
+
+def parse_periodo(value):
+    """'AAAA-MM' -> (ano, mes); 'AAAA' -> (ano, None)"""
+    try:
+        if '-' in value:
+            ano, mes = value.split('-', 1)
+            ano, mes = int(ano), int(mes)
+            if not 1 <= mes <= 12:
+                raise ValueError
+            return ano, mes
+        return int(value), None
+    except ValueError:
+        raise CommandError(f'Período inválido: {value} (use AAAA-MM ou AAAA)')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o valor gasto dos orçamentos a partir das transações, em lote por workspace'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workspace',
+            type=int,
+            action='append',
+            help='Recalcula apenas este workspace (pode ser repetido)',
+        )
+        parser.add_argument(
+            '--periodo',
+            action='append',
+            help='Recalcula apenas orçamentos que cobrem o período AAAA-MM ou AAAA (pode ser repetido)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Linhas por UPDATE do bulk_update',
+        )
+
+    def handle(self, *args, **options):
+        periodos = [parse_periodo(value) for value in options['periodo']] if options['periodo'] else None
+
+        workspaces = Workspace.objects.order_by('id')
+        if options['workspace']:
+            workspaces = workspaces.filter(id__in=options['workspace'])
+        workspaces = list(workspaces.only('id', 'nome'))
+
+        total_budgets = total_categorias = 0
+        begin = time.monotonic()
+        for position, workspace in enumerate(workspaces, start=1):
+            started = time.monotonic()
+            budgets, categorias = recompute_budget_spend(
+                workspace, periodos, batch_size=options['batch_size']
+            )
+            total_budgets += budgets
+            total_categorias += categorias
+            self.stdout.write(
+                f'[{position}/{len(workspaces)}] {workspace.nome} (#{workspace.id}): '
+                f'{budgets} orçamento(s), {categorias} categoria(s) '
+                f'em {(time.monotonic() - started) * 1000:.0f} ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_budgets} orçamento(s) e {total_categorias} categoria(s) recalculados '
+            f'em {len(workspaces)} workspace(s) ({time.monotonic() - begin:.1f} s)'
+        ))
@@ -0,0 +1,60 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import Workspace
+from apps.budgets.models import Budget, BudgetType
+from apps.budgets.services import MAX_ROLLOVER_MONTHS, rollover_budgets
+
+
+class Command(BaseCommand):
+    help = 'Copia os orçamentos mensais de um mês para os próximos, em todos os workspaces'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int, help='Ano de origem (padrão: mês atual)')
+        parser.add_argument('--mes', type=int, help='Mês de origem (padrão: mês atual)')
+        parser.add_argument('--meses', type=int, default=1, help='Quantos meses criar à frente')
+        parser.add_argument(
+            '--carry-over',
+            action='store_true',
+            help='Soma ao primeiro mês o saldo não gasto do mês de origem',
+        )
+        parser.add_argument(
+            '--workspace',
+            type=int,
+            action='append',
+            help='Processa apenas este workspace (pode ser repetido)',
+        )
+
+    def handle(self, *args, **options):
+        today = date.today()
+        ano = options['ano'] or today.year
+        mes = options['mes'] or today.month
+        if not 1 <= mes <= 12:
+            raise CommandError('Mês deve estar entre 1 e 12')
+        if not 1 <= options['meses'] <= MAX_ROLLOVER_MONTHS:
+            raise CommandError(f'--meses deve estar entre 1 e {MAX_ROLLOVER_MONTHS}')
+
+        # Só workspaces com orçamentos no mês de origem
+        workspace_ids = Budget.objects.filter(
+            tipo=BudgetType.MENSAL, ano=ano, mes=mes, is_active=True
+        ).values('workspace_id')
+        workspaces = Workspace.objects.filter(id__in=workspace_ids).order_by('id')
+        if options['workspace']:
+            workspaces = workspaces.filter(id__in=options['workspace'])
+        workspaces = list(workspaces.only('id', 'nome'))
+
+        total = 0
+        for position, workspace in enumerate(workspaces, start=1):
+            budgets, categorias, ignorados = rollover_budgets(
+                workspace, ano, mes, options['meses'], options['carry_over']
+            )
+            total += budgets
+            self.stdout.write(
+                f'[{position}/{len(workspaces)}] {workspace.nome} (#{workspace.id}): '
+                f'{budgets} orçamento(s), {categorias} categoria(s), {ignorados} já existente(s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} orçamento(s) criado(s) a partir de {mes:02d}/{ano} em {len(workspaces)} workspace(s)'
+        ))
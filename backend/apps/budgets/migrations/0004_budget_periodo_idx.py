@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_system_beneficiary'),
+        ('budgets', '0003_alter_budget_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['workspace', 'ano', 'mes'], name='budget_periodo_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_system_beneficiary'),
+        ('budgets', '0004_budget_periodo_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetAlertNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mensagem', models.CharField(max_length=255)),
+                ('valor_gasto', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('valor_planejado', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('lida', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('alerta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes', to='budgets.budgetalert')),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budget_notifications', to='accounts.workspace')),
+            ],
+            options={
+                'verbose_name': 'Notificação de Orçamento',
+                'verbose_name_plural': 'Notificações de Orçamento',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['workspace', 'lida', '-created_at'], name='budget_notification_idx')],
+            },
+        ),
+    ]
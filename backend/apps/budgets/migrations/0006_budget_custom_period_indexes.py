@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_daterange_index(apps, schema_editor):
+    """Índice GiST em (workspace, daterange) dos orçamentos personalizados (somente PostgreSQL)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # btree_gist: permite workspace_id (inteiro) no mesmo índice GiST do intervalo
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS budget_custom_period_gist '
+        "ON budgets_budget USING gist (workspace_id, daterange(data_inicio, data_fim, '[]')) "
+        "WHERE tipo = 'personalizado' AND data_inicio IS NOT NULL AND data_fim IS NOT NULL"
+    )
+
+
+def drop_daterange_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS budget_custom_period_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_system_beneficiary'),
+        ('budgets', '0005_budget_alert_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(condition=models.Q(('tipo', 'personalizado')), fields=['workspace', 'data_inicio', 'data_fim'], name='budget_custom_period_idx'),
+        ),
+        migrations.RunPython(create_daterange_index, drop_daterange_index),
+    ]
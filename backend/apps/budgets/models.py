@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from datetime import date
+from calendar import monthrange
 
 User = get_user_model()
 
@@ -39,6 +41,17 @@ class Budget(models.Model):
     class Meta:
         ordering = ['-ano', '-mes', 'nome']
         unique_together = ['workspace', 'user', 'nome', 'mes', 'ano']
+        indexes = [
+            # Orçamentos que cobrem uma data (gasto incremental, ver tracking.py)
+            models.Index(fields=['workspace', 'ano', 'mes'], name='budget_periodo_idx'),
+            # Orçamentos personalizados que cobrem uma data (no PostgreSQL há
+            # também um índice GiST em daterange, migration 0006)
+            models.Index(
+                fields=['workspace', 'data_inicio', 'data_fim'],
+                name='budget_custom_period_idx',
+                condition=models.Q(tipo='personalizado'),
+            ),
+        ]
         verbose_name = 'Orçamento'
         verbose_name_plural = 'Orçamentos'
 
@@ -74,37 +87,72 @@ class Budget(models.Model):
         """Retorna o valor gasto formatado em reais"""
         return f"R$ {self.valor_gasto:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
 
+    def periodo(self):
+        """
+        Intervalo de datas (inicio, fim) coberto pelo orçamento, inclusive.
+
+        Orçamentos personalizados sem as duas datas definidas não limitam o
+        período (None, None).
+        """
+        if self.tipo == BudgetType.MENSAL and self.mes:
+            return date(self.ano, self.mes, 1), date(self.ano, self.mes, monthrange(self.ano, self.mes)[1])
+        if self.tipo in (BudgetType.MENSAL, BudgetType.ANUAL):
+            return date(self.ano, 1, 1), date(self.ano, 12, 31)
+        if self.data_inicio and self.data_fim:
+            return self.data_inicio, self.data_fim
+        return None, None
+
+    def despesas(self):
+        """Despesas confirmadas do workspace no período do orçamento"""
+        from apps.transactions.models import Transaction, TransactionType
+
+        queryset = Transaction.objects.filter(
+            workspace_id=self.workspace_id,
+            tipo=TransactionType.SAIDA,
+            confirmada=True,
+        )
+        inicio, fim = self.periodo()
+        if inicio and fim:
+            queryset = queryset.filter(data__range=(inicio, fim))
+        return queryset
+
     def atualizar_valor_gasto(self):
         """Atualiza o valor gasto baseado nas transações"""
-        from apps.transactions.models import Transaction, TransactionType
-        
-        # Define filtros baseados no tipo de orçamento
-        filters = {
-            'user': self.user,
-            'tipo': TransactionType.SAIDA,
-            'confirmada': True
-        }
-        
-        if self.tipo == BudgetType.MENSAL:
-            filters.update({
-                'data__month': self.mes,
-                'data__year': self.ano
-            })
-        elif self.tipo == BudgetType.ANUAL:
-            filters['data__year'] = self.ano
-        elif self.tipo == BudgetType.PERSONALIZADO and self.data_inicio and self.data_fim:
-            filters.update({
-                'data__gte': self.data_inicio,
-                'data__lte': self.data_fim
-            })
-        
+        queryset = self.despesas()
+
         # Filtra por categorias do orçamento
-        categorias_budget = self.categorias.values_list('category_id', flat=True)
-        if categorias_budget:
-            filters['category_id__in'] = categorias_budget
-        
-        transacoes = Transaction.objects.filter(**filters)
-        self.valor_gasto = sum(t.valor for t in transacoes)
+        categorias_budget = self.categorias.values('category_id')
+        if self.categorias.exists():
+            queryset = queryset.filter(category_id__in=categorias_budget)
+
+        self.valor_gasto = queryset.aggregate(total=Sum('valor'))['total'] or Decimal('0')
+        self.save(update_fields=['valor_gasto'])
+
+    def atualizar_valores_gastos(self):
+        """
+        Atualiza o valor gasto do orçamento e de todas as suas categorias.
+
+        Um único GROUP BY category_id calcula o gasto de cada categoria; o
+        total do orçamento é a soma das categorias (ou o total do período,
+        quando o orçamento não tem categorias).
+        """
+        categorias = list(self.categorias.all())
+        if not categorias:
+            self.atualizar_valor_gasto()
+            return
+
+        gastos = dict(
+            self.despesas()
+            .filter(category_id__in=[categoria.category_id for categoria in categorias])
+            .order_by()
+            .values_list('category_id')
+            .annotate(total=Sum('valor'))
+        )
+        for categoria in categorias:
+            categoria.valor_gasto = gastos.get(categoria.category_id, Decimal('0'))
+        BudgetCategory.objects.bulk_update(categorias, ['valor_gasto'])
+
+        self.valor_gasto = sum(gastos.values(), Decimal('0'))
         self.save(update_fields=['valor_gasto'])
 
 
@@ -146,32 +194,8 @@ class BudgetCategory(models.Model):
 
     def atualizar_valor_gasto(self):
         """Atualiza o valor gasto da categoria"""
-        from apps.transactions.models import Transaction, TransactionType
-        
-        # Define filtros baseados no tipo de orçamento
-        filters = {
-            'user': self.budget.user,
-            'tipo': TransactionType.SAIDA,
-            'category': self.category,
-            'confirmada': True
-        }
-        
-        if self.budget.tipo == BudgetType.MENSAL:
-            filters.update({
-                'data__month': self.budget.mes,
-                'data__year': self.budget.ano
-            })
-        elif self.budget.tipo == BudgetType.ANUAL:
-            filters['data__year'] = self.budget.ano
-        elif self.budget.tipo == BudgetType.PERSONALIZADO:
-            if self.budget.data_inicio and self.budget.data_fim:
-                filters.update({
-                    'data__gte': self.budget.data_inicio,
-                    'data__lte': self.budget.data_fim
-                })
-        
-        transacoes = Transaction.objects.filter(**filters)
-        self.valor_gasto = sum(t.valor for t in transacoes)
+        total = self.budget.despesas().filter(category_id=self.category_id).aggregate(total=Sum('valor'))['total']
+        self.valor_gasto = total or Decimal('0')
         self.save(update_fields=['valor_gasto'])
 
 
@@ -216,3 +240,27 @@ class BudgetAlert(models.Model):
         """Marca o alerta como notificado"""
         self.notificado = True
         self.save(update_fields=['notificado'])
+
+
+class BudgetAlertNotification(models.Model):
+    """Notificação gerada quando um alerta de orçamento é disparado"""
+    workspace = models.ForeignKey('accounts.Workspace', on_delete=models.CASCADE,
+                                  related_name='budget_notifications')
+    alerta = models.ForeignKey(BudgetAlert, on_delete=models.CASCADE, related_name='notificacoes')
+    mensagem = models.CharField(max_length=255)
+    valor_gasto = models.DecimalField(max_digits=12, decimal_places=2)
+    valor_planejado = models.DecimalField(max_digits=12, decimal_places=2)
+    lida = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['workspace', 'lida', '-created_at'], name='budget_notification_idx'),
+        ]
+        verbose_name = 'Notificação de Orçamento'
+        verbose_name_plural = 'Notificações de Orçamento'
+
+    def __str__(self):
+        return self.mensagem
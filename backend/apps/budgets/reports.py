@@ -0,0 +1,132 @@
+"""
+Orçado x realizado por categoria e mês em uma janela móvel
+
+O realizado vem de uma consulta de transações agrupada por
+(category_id, ano, mês) e o planejado de uma consulta de categorias de
+orçamentos mensais agrupada da mesma forma; as duas são combinadas em Python.
+O resultado fica em cache por workspace até a próxima escrita relevante
+(despesa confirmada, orçamento ou categoria de orçamento), controlada por
+uma versão trocada nos signals, no commit.
+"""
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .deferred import defer_until_commit
+from .models import BudgetCategory, BudgetType
+
+ZERO = Decimal('0')
+
+# Janelas aceitas (meses)
+WINDOWS = (12, 24)
+
+
+def _version_key(workspace_id):
+    return f'budget_version:{workspace_id}'
+
+
+def get_budget_version(workspace_id):
+    return cache.get_or_set(_version_key(workspace_id), time.time_ns, None)
+
+
+def _bump_versions(pending):
+    for workspace_id in pending:
+        cache.set(_version_key(workspace_id), time.time_ns(), None)
+
+
+def bump_budget_version(workspace_id):
+    """
+    Invalida os relatórios de orçamento em cache do workspace quando a
+    transação atual for confirmada: antes disso, uma leitura concorrente (ou
+    da réplica) ainda veria os dados antigos e os gravaria na versão nova.
+    """
+    defer_until_commit(_bump_versions, workspace_id)
+
+
+def rolling_months(ano, mes, count):
+    """Os count meses terminando em (ano, mes), do mais antigo ao mais recente"""
+    months = []
+    for _ in range(count):
+        months.append((ano, mes))
+        ano, mes = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    return months[::-1]
+
+
+def _compute(workspace_id, months):
+    from apps.transactions.models import Transaction, TransactionType
+    from .services import periodo_range
+
+    inicio = periodo_range(*months[0])[0]
+    fim = periodo_range(*months[-1])[1]
+    index = {month: position for position, month in enumerate(months)}
+
+    nomes = {}
+    gasto = defaultdict(lambda: [ZERO] * len(months))
+    planejado = defaultdict(lambda: [ZERO] * len(months))
+
+    rows = (
+        Transaction.objects
+        .filter(
+            workspace_id=workspace_id, tipo=TransactionType.SAIDA, confirmada=True,
+            data__range=(inicio, fim),
+        )
+        .order_by()
+        .annotate(ano=ExtractYear('data'), mes=ExtractMonth('data'))
+        .values_list('category_id', 'category__nome', 'ano', 'mes')
+        .annotate(total=Sum('valor'))
+    )
+    for category_id, nome, ano, mes, total in rows:
+        nomes[category_id] = nome
+        gasto[category_id][index[(ano, mes)]] = total
+
+    rows = (
+        BudgetCategory.objects
+        .filter(
+            budget__workspace_id=workspace_id, budget__is_active=True,
+            budget__tipo=BudgetType.MENSAL, budget__mes__isnull=False,
+            budget__ano__range=(months[0][0], months[-1][0]),
+        )
+        .order_by()
+        .values_list('category_id', 'category__nome', 'budget__ano', 'budget__mes')
+        .annotate(total=Sum('valor_planejado'))
+    )
+    for category_id, nome, ano, mes, total in rows:
+        if (ano, mes) in index:
+            nomes[category_id] = nome
+            planejado[category_id][index[(ano, mes)]] = total
+
+    labels = [f'{ano}-{mes:02d}' for ano, mes in months]
+    categorias = [
+        {
+            'category_id': category_id,
+            'category_name': nomes[category_id] or 'Sem categoria',
+            'serie': [
+                {'mes': label, 'planejado': planejado[category_id][i], 'gasto': gasto[category_id][i]}
+                for i, label in enumerate(labels)
+            ],
+        }
+        for category_id in sorted(nomes, key=lambda pk: (nomes[pk] is None, nomes[pk] or ''))
+    ]
+    totais = [
+        {
+            'mes': label,
+            'planejado': sum((serie[i] for serie in planejado.values()), ZERO),
+            'gasto': sum((serie[i] for serie in gasto.values()), ZERO),
+        }
+        for i, label in enumerate(labels)
+    ]
+    return {'meses': labels, 'categorias': categorias, 'totais': totais}
+
+
+def budget_vs_actual(workspace_id, ano, mes, count=12):
+    """Série orçado x realizado dos count meses até (ano, mes), em cache por versão"""
+    months = rolling_months(ano, mes, count)
+    key = f'budget_vs_actual:{workspace_id}:{get_budget_version(workspace_id)}:{ano}-{mes}:{count}'
+    return cache.get_or_set(
+        key, lambda: _compute(workspace_id, months), settings.BUDGET_REPORT_CACHE_TIMEOUT
+    )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Budget, BudgetCategory, BudgetAlert
+from .models import Budget, BudgetCategory, BudgetAlert, BudgetAlertNotification
 
 
 class BudgetCategorySerializer(serializers.ModelSerializer):
@@ -66,6 +66,13 @@ class BudgetAlertSerializer(serializers.ModelSerializer):
         }
 
 
+class BudgetAlertNotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetAlertNotification
+        fields = ('id', 'alerta', 'mensagem', 'valor_gasto', 'valor_planejado', 'lida', 'created_at')
+        read_only_fields = fields
+
+
 class BudgetSummarySerializer(serializers.Serializer):
     """Serializer para resumo de orçamentos"""
     total_planejado = serializers.DecimalField(max_digits=12, decimal_places=2)
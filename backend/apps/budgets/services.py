@@ -0,0 +1,241 @@
+"""
+Operações em lote com os orçamentos de um workspace: recálculo do gasto e
+cópia de um mês para os seguintes (rollover)
+
+Em vez de um atualizar_valores_gastos() por orçamento, uma consulta agrupada
+por (category_id, ano, mês) calcula as despesas confirmadas de todos os meses
+envolvidos, e os valores de cada Budget/BudgetCategory são montados em Python
+e gravados com bulk_update. Orçamentos personalizados, que não seguem meses
+fechados, usam uma segunda consulta agrupada por (category_id, data). Como
+bulk_update não dispara signals, os alertas dos orçamentos recalculados são
+reavaliados no commit.
+
+O rollover cria as cópias com bulk_create e calcula o gasto delas com o
+mesmo recálculo em lote.
+"""
+from collections import defaultdict
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .alerts import schedule_alert_evaluation
+from .models import Budget, BudgetCategory, BudgetType
+from .reports import bump_budget_version
+
+ZERO = Decimal('0')
+
+# Meses à frente que um rollover pode criar de uma vez
+MAX_ROLLOVER_MONTHS = 12
+
+
+def periodo_range(ano, mes=None):
+    """(inicio, fim) de um mês ou, sem mês, do ano inteiro"""
+    if mes is None:
+        return date(ano, 1, 1), date(ano, 12, 31)
+    return date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+
+
+def _overlaps(periodo, ranges):
+    inicio, fim = periodo
+    return any(
+        (inicio is None or inicio <= range_fim) and (fim is None or fim >= range_inicio)
+        for range_inicio, range_fim in ranges
+    )
+
+
+def _meses(inicio, fim):
+    ano, mes = inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        yield ano, mes
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+
+def _despesas(workspace, inicio, fim):
+    from apps.transactions.models import Transaction, TransactionType
+
+    queryset = Transaction.objects.filter(
+        workspace=workspace, tipo=TransactionType.SAIDA, confirmada=True
+    ).order_by()
+    if inicio is not None:
+        queryset = queryset.filter(data__gte=inicio)
+    if fim is not None:
+        queryset = queryset.filter(data__lte=fim)
+    return queryset
+
+
+def _bounds(periodos):
+    inicios = [inicio for inicio, _ in periodos]
+    fins = [fim for _, fim in periodos]
+    return (
+        None if None in inicios else min(inicios),
+        None if None in fins else max(fins),
+    )
+
+
+def recompute_budget_spend(workspace, periodos=None, batch_size=1000):
+    """
+    Recalcula valor_gasto dos orçamentos (e categorias) do workspace.
+
+    periodos: iterável de (ano, mes), com mes=None para o ano inteiro; só os
+    orçamentos cujo período se sobrepõe a algum deles são recalculados. Sem
+    periodos, recalcula todos. Retorna (orçamentos, categorias) atualizados.
+    """
+    budgets = list(Budget.objects.filter(workspace=workspace))
+    if periodos is not None:
+        ranges = [periodo_range(ano, mes) for ano, mes in periodos]
+        budgets = [budget for budget in budgets if _overlaps(budget.periodo(), ranges)]
+    if not budgets:
+        return 0, 0
+
+    categorias = defaultdict(list)
+    for categoria in BudgetCategory.objects.filter(budget__in=[budget.pk for budget in budgets]):
+        categorias[categoria.budget_id].append(categoria)
+
+    mensais = [budget for budget in budgets if budget.tipo != BudgetType.PERSONALIZADO]
+    personalizados = [budget for budget in budgets if budget.tipo == BudgetType.PERSONALIZADO]
+
+    # (ano, mes) -> {category_id: total}
+    por_mes = defaultdict(dict)
+    if mensais:
+        inicio, fim = _bounds([budget.periodo() for budget in mensais])
+        rows = (
+            _despesas(workspace, inicio, fim)
+            .annotate(ano=ExtractYear('data'), mes=ExtractMonth('data'))
+            .values_list('category_id', 'ano', 'mes')
+            .annotate(total=Sum('valor'))
+        )
+        for category_id, ano, mes, total in rows:
+            por_mes[(ano, mes)][category_id] = total
+
+    # data -> {category_id: total}
+    por_dia = defaultdict(dict)
+    if personalizados:
+        inicio, fim = _bounds([budget.periodo() for budget in personalizados])
+        rows = _despesas(workspace, inicio, fim).values_list('category_id', 'data').annotate(total=Sum('valor'))
+        for category_id, data, total in rows:
+            por_dia[data][category_id] = total
+
+    categorias_alteradas = []
+    for budget in budgets:
+        inicio, fim = budget.periodo()
+        gastos = defaultdict(lambda: ZERO)
+        if budget.tipo == BudgetType.PERSONALIZADO:
+            buckets = (
+                totais for data, totais in por_dia.items()
+                if (inicio is None or data >= inicio) and (fim is None or data <= fim)
+            )
+        else:
+            buckets = (por_mes.get(chave, {}) for chave in _meses(inicio, fim))
+        for totais in buckets:
+            for category_id, total in totais.items():
+                gastos[category_id] += total
+
+        if categorias[budget.pk]:
+            budget.valor_gasto = ZERO
+            for categoria in categorias[budget.pk]:
+                categoria.valor_gasto = gastos[categoria.category_id]
+                budget.valor_gasto += categoria.valor_gasto
+                categorias_alteradas.append(categoria)
+        else:
+            budget.valor_gasto = sum(gastos.values(), ZERO)
+
+    Budget.objects.bulk_update(budgets, ['valor_gasto'], batch_size=batch_size)
+    BudgetCategory.objects.bulk_update(categorias_alteradas, ['valor_gasto'], batch_size=batch_size)
+
+    # bulk_update não dispara signals: reavalia os alertas dos orçamentos recalculados
+    # (uma data de cada período; personalizados sem datas cobrem qualquer uma)
+    datas = {budget.periodo()[0] for budget in budgets} - {None}
+    schedule_alert_evaluation(workspace.pk, datas)
+    return len(budgets), len(categorias_alteradas)
+
+
+def _add_months(ano, mes, count):
+    total = ano * 12 + (mes - 1) + count
+    return total // 12, total % 12 + 1
+
+
+def rollover_budgets(workspace, ano, mes, meses=1, carry_over=False):
+    """
+    Copia os orçamentos mensais de (ano, mes) e suas categorias para os
+    próximos meses, com bulk_create.
+
+    Orçamentos que já existem no mês de destino (mesmo usuário e nome) são
+    ignorados. Com carry_over, o saldo não gasto de cada categoria (ou do
+    orçamento, quando não tem categorias) no mês de origem é somado ao
+    planejado do primeiro mês copiado; o gasto de origem vem de uma única
+    consulta agrupada por categoria. Retorna (orçamentos, categorias, ignorados).
+    """
+    origem = list(Budget.objects.filter(
+        workspace=workspace, tipo=BudgetType.MENSAL, ano=ano, mes=mes, is_active=True
+    ))
+    if not origem or meses < 1:
+        return 0, 0, 0
+
+    categorias = defaultdict(list)
+    for categoria in BudgetCategory.objects.filter(budget__in=[budget.pk for budget in origem]):
+        categorias[categoria.budget_id].append(categoria)
+
+    gastos = {}
+    if carry_over:
+        gastos = dict(
+            _despesas(workspace, *periodo_range(ano, mes))
+            .values_list('category_id')
+            .annotate(total=Sum('valor'))
+        )
+
+    def saldo(planejado, gasto):
+        return max(planejado - gasto, ZERO)
+
+    destinos = [_add_months(ano, mes, offset) for offset in range(1, meses + 1)]
+    existentes = set(
+        Budget.objects.filter(
+            workspace=workspace,
+            ano__range=(destinos[0][0], destinos[-1][0]),
+        ).values_list('user_id', 'nome', 'ano', 'mes')
+    )
+
+    novos = []
+    novas_categorias = []
+    ignorados = 0
+    for offset, (destino_ano, destino_mes) in enumerate(destinos):
+        carry = carry_over and offset == 0
+        for budget in origem:
+            if (budget.user_id, budget.nome, destino_ano, destino_mes) in existentes:
+                ignorados += 1
+                continue
+
+            sobra = ZERO
+            itens = []
+            for categoria in categorias[budget.pk]:
+                extra = saldo(categoria.valor_planejado, gastos.get(categoria.category_id, ZERO)) if carry else ZERO
+                sobra += extra
+                itens.append(BudgetCategory(
+                    category_id=categoria.category_id, valor_planejado=categoria.valor_planejado + extra
+                ))
+            if carry and not itens:
+                sobra = saldo(budget.valor_planejado, sum(gastos.values(), ZERO))
+
+            novos.append(Budget(
+                workspace=workspace, user_id=budget.user_id, nome=budget.nome,
+                descricao=budget.descricao, tipo=BudgetType.MENSAL,
+                ano=destino_ano, mes=destino_mes, valor_planejado=budget.valor_planejado + sobra,
+            ))
+            novas_categorias.append(itens)
+
+    with transaction.atomic():
+        Budget.objects.bulk_create(novos, batch_size=500)
+        for copia, itens in zip(novos, novas_categorias):
+            for item in itens:
+                item.budget = copia
+        itens = [item for grupo in novas_categorias for item in grupo]
+        BudgetCategory.objects.bulk_create(itens, batch_size=500)
+
+        if novos:
+            # bulk_create não dispara signals: gasto dos meses copiados em lote
+            recompute_budget_spend(workspace, destinos)
+            bump_budget_version(workspace.pk)
+    return len(novos), len(itens), ignorados
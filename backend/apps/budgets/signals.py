@@ -0,0 +1,122 @@
+"""
+Signals do app de orçamentos
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .alerts import schedule_alert_evaluation
+from .deferred import defer_until_commit
+from .models import Budget, BudgetCategory
+from .reports import bump_budget_version
+from .tracking import apply_expense_change, expense_key
+
+# Campos de Budget que definem o período
+PERIOD_FIELDS = ('tipo', 'mes', 'ano', 'data_inicio', 'data_fim')
+
+
+def _recompute_budgets(pending):
+    budgets = Budget.objects.in_bulk(pending)
+    for budget_id, instances in pending.items():
+        budget = budgets.get(budget_id)
+        if budget is None:
+            continue  # excluído na mesma transação
+        budget.atualizar_valores_gastos()
+        for instance in instances:
+            instance.valor_gasto = budget.valor_gasto
+
+
+def schedule_budget_recompute(budget_id, instance=None):
+    """
+    Recalcula o gasto do orçamento uma vez por transação, no commit.
+
+    instance (o Budget salvo) recebe o valor recalculado, para quem o usa
+    logo após o save().
+    """
+    defer_until_commit(_recompute_budgets, budget_id, [instance] if instance is not None else [])
+
+
+def _deleting_budget(origin):
+    """A exclusão em cascata partiu de um Budget (instância ou queryset)"""
+    if isinstance(origin, QuerySet):
+        return origin.model is Budget
+    return isinstance(origin, Budget)
+
+
+@receiver(post_save, sender='transactions.Transaction')
+def track_expense_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous', None)
+    before = expense_key(previous) if previous is not None else None
+    after = expense_key(instance)
+    if before != after:
+        apply_expense_change(before, after)
+        datas = {key[2] for key in (before, after) if key is not None}
+        schedule_alert_evaluation(instance.workspace_id, datas)
+
+
+@receiver(post_delete, sender='transactions.Transaction')
+def track_expense_on_delete(sender, instance, **kwargs):
+    before = expense_key(instance)
+    if before is not None:
+        apply_expense_change(before, None)
+        schedule_alert_evaluation(instance.workspace_id, [before[2]])
+
+
+@receiver(pre_save, sender=Budget)
+def remember_budget_period(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._period_changed = False
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(PERIOD_FIELDS):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(*PERIOD_FIELDS).first()
+    instance._period_changed = previous != tuple(getattr(instance, field) for field in PERIOD_FIELDS)
+
+
+@receiver(post_save, sender=Budget)
+def compute_budget_spend(sender, instance, created, raw=False, **kwargs):
+    """Orçamento novo ou com outro período: recalcula o gasto a partir das transações"""
+    if raw:
+        return
+    if created or getattr(instance, '_period_changed', False):
+        schedule_budget_recompute(instance.pk, instance)
+
+
+@receiver(post_save, sender=BudgetCategory)
+def compute_budget_category_spend(sender, instance, created, raw=False, **kwargs):
+    """Categoria nova muda também o total do orçamento"""
+    if raw or not created:
+        return
+    schedule_budget_recompute(instance.budget_id)
+
+
+@receiver(post_delete, sender=BudgetCategory)
+def refresh_budget_spend(sender, instance, origin=None, **kwargs):
+    """Categoria removida sai do total (a não ser que o orçamento inteiro esteja sendo excluído)"""
+    if _deleting_budget(origin):
+        return
+    schedule_budget_recompute(instance.budget_id)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_budget_reports(sender, instance, **kwargs):
+    """Planejado mudou: nova versão dos relatórios de orçamento do workspace"""
+    bump_budget_version(instance.workspace_id)
+
+
+def _bump_budget_workspaces(pending):
+    workspaces = Budget.objects.filter(pk__in=pending).values_list('workspace_id', flat=True).distinct()
+    for workspace_id in workspaces:
+        bump_budget_version(workspace_id)
+
+
+@receiver(post_save, sender=BudgetCategory)
+@receiver(post_delete, sender=BudgetCategory)
+def invalidate_budget_reports_for_category(sender, instance, origin=None, **kwargs):
+    """Workspace dos orçamentos alterados buscado uma vez por transação, no commit"""
+    if _deleting_budget(origin):
+        return  # o post_delete do Budget já troca a versão
+    defer_until_commit(_bump_budget_workspaces, instance.budget_id)
@@ -1,3 +1,647 @@
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Account, User, Workspace, WorkspaceMember
+from apps.categories.models import Category
+from apps.transactions.models import Transaction
+from . import alerts
+from .models import Budget, BudgetAlert, BudgetAlertNotification, BudgetCategory
+from .forecast import forecast_budgets
+from .reports import get_budget_version
+from .services import recompute_budget_spend
+from .tracking import budgets_covering
+
+
+class BudgetTestCase(TestCase):
+    """Workspace com uma conta e três categorias; cada escrita roda os callbacks de commit"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.workspace = Workspace.objects.create(nome='Casa', criado_por=self.user)
+        self.account = Account.objects.create(
+            workspace=self.workspace, user=self.user, nome='Conta', tipo='cofre'
+        )
+        self.mercado, self.lazer, self.saude = [
+            Category.objects.create(workspace=self.workspace, user=self.user, nome=nome)
+            for nome in ('Mercado', 'Lazer', 'Saúde')
+        ]
+
+    def create_transaction(self, valor, data, category=None, tipo='saida', **extra):
+        extra.setdefault('user', self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Transaction.objects.create(
+                workspace=self.workspace, account=self.account, tipo=tipo, valor=valor,
+                descricao='Compra', data=data, category=category, **extra
+            )
+
+    def create_budget(self, categorias=(), **fields):
+        fields.setdefault('nome', 'Orçamento')
+        fields.setdefault('tipo', 'mensal')
+        fields.setdefault('ano', 2025)
+        fields.setdefault('valor_planejado', 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            budget = Budget.objects.create(workspace=self.workspace, user=self.user, **fields)
+            for category in categorias:
+                BudgetCategory.objects.create(budget=budget, category=category, valor_planejado=10)
+        budget.refresh_from_db()
+        return budget
+
+
+class BudgetSpendAggregateTest(BudgetTestCase):
+    """Gasto calculado por agregados SQL sobre as despesas confirmadas do período"""
+
+    def setUp(self):
+        super().setUp()
+        outro = User.objects.create_user(username='bia', email='bia@example.com', password='x')
+        self.create_transaction(10, date(2025, 3, 1), self.mercado)
+        self.create_transaction(5, date(2025, 3, 31), self.mercado, user=outro)
+        self.create_transaction(7, date(2025, 3, 15), self.lazer)
+        self.create_transaction(100, date(2025, 4, 1), self.mercado)
+        self.create_transaction(3, date(2025, 3, 2), self.saude)
+        self.create_transaction(9, date(2025, 3, 2), self.mercado, tipo='entrada')
+        self.create_transaction(9, date(2025, 3, 2), self.mercado, confirmada=False)
+
+    def test_budget_without_categories_counts_whole_period(self):
+        budget = self.create_budget(mes=3)
+        budget.atualizar_valor_gasto()
+        self.assertEqual(budget.valor_gasto, Decimal('25'))
+
+    def test_budget_with_categories(self):
+        budget = self.create_budget([self.mercado, self.lazer], mes=3)
+        budget.atualizar_valor_gasto()
+        self.assertEqual(budget.valor_gasto, Decimal('22'))
+
+        categoria = budget.categorias.get(category=self.mercado)
+        categoria.atualizar_valor_gasto()
+        self.assertEqual(categoria.valor_gasto, Decimal('15'))
+
+    def test_batch_update_matches_per_row_and_queries_are_constant(self):
+        budget = self.create_budget([self.mercado, self.lazer], mes=3)
+        with CaptureQueriesContext(connection) as two:
+            budget.atualizar_valores_gastos()
+        self.assertEqual(budget.valor_gasto, Decimal('22'))
+        gastos = dict(budget.categorias.values_list('category_id', 'valor_gasto'))
+        self.assertEqual(gastos, {self.mercado.id: Decimal('15'), self.lazer.id: Decimal('7')})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BudgetCategory.objects.create(budget=budget, category=self.saude, valor_planejado=10)
+        with CaptureQueriesContext(connection) as three:
+            budget.atualizar_valores_gastos()
+        self.assertEqual(len(three.captured_queries), len(two.captured_queries))
+        self.assertEqual(budget.valor_gasto, Decimal('25'))
+
+    def test_annual_and_custom_periods(self):
+        anual = self.create_budget(tipo='anual')
+        anual.atualizar_valores_gastos()
+        self.assertEqual(anual.valor_gasto, Decimal('125'))
+
+        personalizado = self.create_budget(
+            tipo='personalizado', data_inicio=date(2025, 3, 2), data_fim=date(2025, 3, 31)
+        )
+        personalizado.atualizar_valor_gasto()
+        self.assertEqual(personalizado.valor_gasto, Decimal('15'))
+
+
+class IncrementalSpendTest(BudgetTestCase):
+    """Gasto mantido por deltas a cada escrita de transação, igual a um recálculo completo"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_transaction(4, date(2025, 3, 3), self.mercado)
+        self.mensal = self.create_budget([self.mercado, self.lazer], mes=3)
+        self.anual = self.create_budget(nome='Ano', tipo='anual')
+        self.personalizado = self.create_budget(
+            nome='Viagem', tipo='personalizado', data_inicio=date(2025, 3, 10), data_fim=date(2025, 4, 10)
+        )
+
+    def spend(self):
+        budgets = [Budget.objects.get(pk=budget.pk) for budget in (self.mensal, self.anual, self.personalizado)]
+        categorias = BudgetCategory.objects.filter(budget=self.mensal).order_by('category__nome')
+        return [budget.valor_gasto for budget in budgets] + [categoria.valor_gasto for categoria in categorias]
+
+    def save(self, transaction, **fields):
+        for field, value in fields.items():
+            setattr(transaction, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            transaction.save()
+
+    def test_deltas_match_full_recompute(self):
+        x = self.create_transaction(10, date(2025, 3, 1), self.mercado)
+        y = self.create_transaction(7, date(2025, 3, 15), self.lazer, confirmada=False)
+        z = self.create_transaction(3, date(2025, 3, 20))
+
+        y.confirmada = True
+        with self.captureOnCommitCallbacks(execute=True):
+            y.save(update_fields=['confirmada'])
+        self.save(x, category=self.saude, valor=Decimal('11'))
+        self.save(y, data=date(2025, 4, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            z.delete()
+        self.create_transaction(6, date(2025, 3, 11), self.lazer, tipo='entrada')
+
+        incremental = self.spend()
+        for budget in Budget.objects.all():
+            budget.atualizar_valores_gastos()
+        self.assertEqual(incremental, self.spend())
+        self.assertEqual(incremental, [
+            Decimal('4'), Decimal('22'), Decimal('7'), Decimal('0'), Decimal('4'),
+        ])
+
+    def test_category_removed_and_period_moved(self):
+        self.create_transaction(7, date(2025, 3, 15), self.lazer)
+        self.create_transaction(20, date(2025, 4, 15), self.lazer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BudgetCategory.objects.get(budget=self.mensal, category=self.lazer).delete()
+        self.mensal.refresh_from_db()
+        self.assertEqual(self.mensal.valor_gasto, Decimal('4'))
+
+        self.mensal.mes = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mensal.categorias.all().delete()
+            self.mensal.save()
+        self.assertEqual(self.mensal.valor_gasto, Decimal('20'))
+
+    def test_one_recompute_per_budget(self):
+        with mock.patch.object(
+            Budget, 'atualizar_valores_gastos', autospec=True, side_effect=Budget.atualizar_valores_gastos
+        ) as recompute:
+            budget = self.create_budget([self.mercado, self.lazer, self.saude], nome='Casa', mes=3)
+            self.assertEqual(recompute.call_count, 1)
+            self.assertEqual(budget.valor_gasto, Decimal('4'))
+
+            recompute.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                budget.delete()
+            recompute.assert_not_called()
+
+    def test_previous_row_loaded_once(self):
+        transaction = self.create_transaction(5, date(2025, 3, 12), self.mercado)
+        with CaptureQueriesContext(connection) as ctx:
+            self.save(transaction, valor=Decimal('8'))
+        selects = [
+            query for query in ctx.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "transactions_transaction"' in query['sql']
+        ]
+        self.assertEqual(len(selects), 1)
+        self.mensal.refresh_from_db()
+        self.assertEqual(self.mensal.valor_gasto, Decimal('12'))
+
+
+class RecomputeBudgetSpendTest(BudgetTestCase):
+    """Recálculo em lote do workspace com número fixo de consultas"""
+
+    def setUp(self):
+        super().setUp()
+        categorias = [self.mercado, self.lazer]
+        for mes in range(1, 13):
+            self.create_budget(categorias, mes=mes)
+        self.create_budget(nome='Tudo', mes=3)
+        self.create_budget(nome='Ano', tipo='anual')
+        self.create_budget(
+            nome='Viagem', tipo='personalizado', data_inicio=date(2025, 2, 20), data_fim=date(2025, 3, 10)
+        )
+        self.create_budget(nome='Aberto', tipo='personalizado')
+
+        todas = [self.mercado, self.lazer, self.saude, None]
+        for i in range(60):
+            self.create_transaction(
+                i % 13 + 1, date(2024 + i % 2, i % 12 + 1, i % 28 + 1), todas[i % 4]
+            )
+        self.incremental = self.snapshot()
+        self.reset()
+
+    def snapshot(self):
+        return (
+            sorted(Budget.objects.values_list('pk', 'valor_gasto')),
+            sorted(BudgetCategory.objects.values_list('pk', 'valor_gasto')),
+        )
+
+    def reset(self):
+        Budget.objects.update(valor_gasto=0)
+        BudgetCategory.objects.update(valor_gasto=0)
+
+    def test_matches_incremental_spend(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(recompute_budget_spend(self.workspace), (16, 24))
+        self.assertEqual(self.snapshot(), self.incremental)
+        queries = len(ctx.captured_queries)
+
+        for i in range(20):
+            self.create_transaction(5, date(2025, i % 12 + 1, 2), self.saude)
+        with CaptureQueriesContext(connection) as ctx:
+            recompute_budget_spend(self.workspace)
+        self.assertEqual(len(ctx.captured_queries), queries)
+
+    def test_limited_to_periods(self):
+        # março: o mensal de março, o sem categorias, o anual e os dois personalizados
+        self.assertEqual(recompute_budget_spend(self.workspace, [(2025, 3)]), (5, 2))
+        self.assertEqual(Budget.objects.get(nome='Orçamento', mes=4).valor_gasto, Decimal('0'))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('recompute_budget_spend', '--periodo', '2025', stdout=out)
+        self.assertIn('16 orçamento(s) e 24 categoria(s)', out.getvalue())
+        self.assertEqual(self.snapshot(), self.incremental)
+
+    def test_alerts_follow_recomputed_spend(self):
+        categoria = BudgetCategory.objects.get(budget__mes=2, category=self.lazer)
+        alerta = BudgetAlert.objects.create(budget_category=categoria, tipo_alerta='valor_fixo', valor_limite=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recompute_budget_spend(self.workspace, [(2025, 2)])
+        self.assertTrue(BudgetAlert.objects.get(pk=alerta.pk).notificado)
+        self.assertEqual(BudgetAlertNotification.objects.filter(alerta=alerta).count(), 1)
+
+        # Gasto volta a ficar abaixo do limite (update() não dispara signals): o alerta é rearmado
+        Transaction.objects.filter(category=self.lazer, data__year=2025, data__month=2).update(confirmada=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            recompute_budget_spend(self.workspace, [(2025, 2)])
+        self.assertFalse(BudgetAlert.objects.get(pk=alerta.pk).notificado)
+
+    def test_update_spent_endpoint(self):
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+        response = client.post('/api/budgets/update-spent/', {'ano': 2025, 'mes': 3}, format='json', **headers)
+        self.assertEqual(response.json()['updated_count'], 5)
+        response = client.post('/api/budgets/update-spent/', {'ano': 2025, 'mes': 13}, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+
+
+class BudgetAlertTest(BudgetTestCase):
+    """Alertas avaliados em lote no commit, notificados uma vez e rearmados"""
+
+    def setUp(self):
+        super().setUp()
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        budget = self.create_budget(nome='Março', mes=3, valor_planejado=1000)
+        with self.captureOnCommitCallbacks(execute=True):
+            mercado = BudgetCategory.objects.create(budget=budget, category=self.mercado, valor_planejado=200)
+            lazer = BudgetCategory.objects.create(budget=budget, category=self.lazer, valor_planejado=100)
+        self.oitenta = BudgetAlert.objects.create(budget_category=mercado, tipo_alerta='percentual', valor_limite=80)
+        self.fixo = BudgetAlert.objects.create(budget_category=lazer, tipo_alerta='valor_fixo', valor_limite=50)
+        self.cem = BudgetAlert.objects.create(budget_category=mercado, tipo_alerta='percentual', valor_limite=100)
+
+    def notified(self):
+        return dict(BudgetAlert.objects.values_list('id', 'notificado'))
+
+    def test_notifies_and_rearms(self):
+        compra = self.create_transaction(170, date(2025, 3, 3), self.mercado)
+        self.assertEqual(self.notified(), {self.oitenta.id: True, self.fixo.id: False, self.cem.id: False})
+        self.assertEqual(
+            list(BudgetAlertNotification.objects.values_list('mensagem', flat=True)),
+            ['Março - Mercado: gasto de R$ 170,00 (85% de R$ 200,00)'],
+        )
+
+        self.create_transaction(60, date(2025, 3, 3), self.lazer)
+        self.assertEqual(BudgetAlertNotification.objects.count(), 2)
+
+        # Reavaliar não notifica de novo
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(alerts.evaluate_alerts(self.workspace.id), [])
+        self.assertEqual(BudgetAlertNotification.objects.count(), 2)
+        queries = len(ctx.captured_queries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            compra.delete()
+        self.assertEqual(self.notified(), {self.oitenta.id: False, self.fixo.id: True, self.cem.id: False})
+
+        for _ in range(5):
+            self.create_transaction(10, date(2025, 3, 4), self.lazer)
+        with CaptureQueriesContext(connection) as ctx:
+            alerts.evaluate_alerts(self.workspace.id)
+        self.assertEqual(len(ctx.captured_queries), queries)
+
+    def test_one_evaluation_per_transaction(self):
+        with mock.patch.object(alerts, 'evaluate_alerts') as evaluate:
+            with self.captureOnCommitCallbacks(execute=True):
+                for dia in range(1, 6):
+                    Transaction.objects.create(
+                        workspace=self.workspace, user=self.user, account=self.account, tipo='saida',
+                        valor=5, descricao='Compra', data=date(2025, 3, dia), category=self.mercado,
+                    )
+        evaluate.assert_called_once_with(self.workspace.id, [date(2025, 3, dia) for dia in range(1, 6)])
+
+    def test_endpoints(self):
+        self.create_transaction(170, date(2025, 3, 3), self.mercado)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+        self.assertEqual(client.get('/api/budgets/alerts/', **headers).status_code, 200)
+        response = client.get('/api/budgets/alerts/notifications/?lida=false', **headers)
+        self.assertEqual(response.json()['count'], 1)
+
+        response = client.post(f'/api/budgets/alerts/{self.oitenta.id}/read/', **headers)
+        self.assertEqual(response.json()['updated_count'], 1)
+        self.assertEqual(client.post('/api/budgets/alerts/999/read/', **headers).status_code, 404)
+        response = client.get('/api/budgets/alerts/notifications/?lida=false', **headers)
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_command(self):
+        BudgetCategory.objects.filter(category=self.lazer).update(valor_gasto=75)
+        out = StringIO()
+        call_command('evaluate_budget_alerts', stdout=out)
+        self.assertIn('1 alerta(s) disparado(s)', out.getvalue())
+        self.assertTrue(BudgetAlert.objects.get(pk=self.fixo.pk).notificado)
+
+
+class BudgetSummaryTest(BudgetTestCase):
+    """summary em um agregado; listagem com filtros e categorias pré-carregadas"""
+
+    def setUp(self):
+        super().setUp()
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        categorias = [self.mercado, self.lazer, self.saude]
+        for mes in range(1, 11):
+            budget = self.create_budget(categorias[:mes % 3 + 1], mes=mes)
+            Budget.objects.filter(pk=budget.pk).update(valor_gasto=mes * 15)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def get(self, path):
+        return self.client.get(f'/api/budgets/{path}', **self.headers)
+
+    def test_summary_single_aggregate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.get('summary/?year=2025').json()
+        self.assertEqual(
+            {key: Decimal(value) for key, value in data.items() if key.startswith('total_') and key != 'total_budgets'},
+            {'total_planejado': Decimal('1000'), 'total_gasto': Decimal('825'), 'total_restante': Decimal('175')},
+        )
+        self.assertEqual((data['total_budgets'], data['budgets_excedidos']), (10, 4))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'budgets_budget' in q['sql']]), 1)
+
+        data = self.get('summary/?ano=2030').json()
+        self.assertEqual((data['total_budgets'], Decimal(data['total_gasto'])), (0, Decimal('0')))
+
+    def test_list_filters(self):
+        self.assertEqual(self.get(f'?category={self.saude.id}').json()['count'], 3)
+        self.assertEqual(self.get('?mes=3&ano=2025').json()['count'], 1)
+        self.assertEqual(self.get('?month=3&year=2025').json()['count'], 1)
+        self.assertEqual(self.get('?month=x').status_code, 400)
+
+    def test_list_queries_do_not_grow_with_budgets(self):
+        self.get('')
+        with CaptureQueriesContext(connection) as before:
+            self.get('')
+        self.create_budget([self.mercado, self.lazer, self.saude], mes=11)
+        self.create_budget([self.mercado], mes=12)
+        with CaptureQueriesContext(connection) as after:
+            response = self.get('')
+        self.assertEqual(response.json()['count'], 12)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+
+
+class BudgetVsActualTest(BudgetTestCase):
+    """vs-actual: série mensal planejado x gasto em cache até a próxima escrita"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        for mes in (1, 2, 3):
+            budget = self.create_budget(mes=mes)
+            with self.captureOnCommitCallbacks(execute=True):
+                BudgetCategory.objects.create(budget=budget, category=self.mercado, valor_planejado=50 + mes)
+        self.create_transaction(10, date(2025, 2, 3), self.mercado)
+        self.create_transaction(7, date(2024, 12, 3), self.lazer)
+        self.create_transaction(4, date(2025, 3, 3))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def get(self, query='ano=2025&mes=3'):
+        return self.client.get(f'/api/budgets/vs-actual/?{query}', **self.headers)
+
+    def totals(self, data):
+        return [(item['mes'], Decimal(str(item['planejado'])), Decimal(str(item['gasto']))) for item in data['totais']]
+
+    def test_series(self):
+        data = self.get().json()
+        self.assertEqual(len(data['meses']), 12)
+        self.assertEqual((data['meses'][0], data['meses'][-1]), ('2024-04', '2025-03'))
+        self.assertEqual(self.totals(data)[-4:], [
+            ('2024-12', Decimal('0'), Decimal('7')),
+            ('2025-01', Decimal('51'), Decimal('0')),
+            ('2025-02', Decimal('52'), Decimal('10')),
+            ('2025-03', Decimal('53'), Decimal('4')),
+        ])
+        series = {item['category_name']: item['serie'] for item in data['categorias']}
+        self.assertEqual(sorted(series), ['Lazer', 'Mercado', 'Sem categoria'])
+
+        self.assertEqual(len(self.get('meses=24').json()['meses']), 24)
+        self.assertEqual(self.get('meses=7').status_code, 400)
+
+    def test_cached_until_next_write(self):
+        self.get()
+        with CaptureQueriesContext(connection) as ctx:
+            self.get()
+        self.assertFalse(any('budgets_budget' in query['sql'] for query in ctx.captured_queries))
+
+        self.create_transaction(5, date(2025, 3, 5), self.mercado)
+        self.assertEqual(self.totals(self.get().json())[-1], ('2025-03', Decimal('53'), Decimal('9')))
+
+    def test_version_bumped_on_commit(self):
+        version = get_budget_version(self.workspace.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            budget = Budget.objects.create(
+                workspace=self.workspace, user=self.user, nome='Abril', mes=4, ano=2025, valor_planejado=100
+            )
+            BudgetCategory.objects.create(budget=budget, category=self.mercado, valor_planejado=10)
+            self.assertEqual(get_budget_version(self.workspace.id), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_budget_version(self.workspace.id), version)
+
+
+class BudgetRolloverTest(BudgetTestCase):
+    """Rollover em lote dos orçamentos mensais, com saldo opcional"""
+
+    def setUp(self):
+        super().setUp()
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        categorias = [self.mercado, self.lazer, self.saude]
+        for n in range(4):
+            budget = self.create_budget(nome=f'b{n}', ano=2024, mes=12, valor_planejado=300)
+            with self.captureOnCommitCallbacks(execute=True):
+                for category in categorias[:n]:
+                    BudgetCategory.objects.create(budget=budget, category=category, valor_planejado=100)
+        self.create_transaction(30, date(2024, 12, 3), self.mercado)
+        self.create_transaction(150, date(2024, 12, 3), self.lazer)
+        self.create_transaction(11, date(2025, 1, 3), self.mercado)
+        self.create_budget(nome='b0', mes=1, valor_planejado=1)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def rollover(self, **data):
+        return self.client.post('/api/budgets/rollover/', data, format='json', **self.headers)
+
+    def copy(self, nome, mes):
+        budget = Budget.objects.get(nome=nome, ano=2025, mes=mes)
+        categorias = {
+            categoria.category.nome: (categoria.valor_planejado, categoria.valor_gasto)
+            for categoria in budget.categorias.select_related('category')
+        }
+        return budget.valor_planejado, budget.valor_gasto, categorias
+
+    def test_carry_over_into_first_month(self):
+        response = self.rollover(ano=2024, mes=12, meses=3, carry_over=True)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(
+            (data['created_count'], data['categories_count'], data['skipped_count']), (11, 18, 1)
+        )
+
+        self.assertEqual(self.copy('b0', 1), (Decimal('1'), Decimal('11'), {}))
+        self.assertEqual(self.copy('b1', 1), (Decimal('370'), Decimal('11'), {
+            'Mercado': (Decimal('170'), Decimal('11')),
+        }))
+        self.assertEqual(self.copy('b3', 1), (Decimal('470'), Decimal('11'), {
+            'Mercado': (Decimal('170'), Decimal('11')),
+            'Lazer': (Decimal('100'), Decimal('0')),
+            'Saúde': (Decimal('200'), Decimal('0')),
+        }))
+        self.assertEqual(self.copy('b1', 2), (Decimal('300'), Decimal('0'), {
+            'Mercado': (Decimal('100'), Decimal('0')),
+        }))
+
+    def test_existing_copies_are_skipped(self):
+        self.rollover(ano=2024, mes=12, meses=3)
+        data = self.rollover(ano=2024, mes=12, meses=3).json()
+        self.assertEqual((data['created_count'], data['skipped_count']), (0, 12))
+        self.assertEqual(self.rollover(ano=2024, mes=13).status_code, 400)
+        self.assertEqual(self.rollover(ano=[2024], mes=12).status_code, 400)
+        self.assertEqual(self.rollover(ano=2024, mes=12, meses={'total': 3}).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('rollover_budgets', '--ano', '2024', '--mes', '12', stdout=out)
+        self.assertEqual(Budget.objects.filter(ano=2025, mes=1).count(), 4)
+
+
+class BudgetForecastTest(BudgetTestCase):
+    """Projeção do fim do mês pelo ritmo atual e pelos mesmos dias dos meses anteriores"""
+
+    def setUp(self):
+        super().setUp()
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        # R$ 10 por dia em Mercado de janeiro a 10 de abril
+        Transaction.objects.bulk_create([
+            Transaction(
+                workspace=self.workspace, user=self.user, account=self.account, tipo='saida', valor=10,
+                descricao='Compra', data=date(2025, mes, dia), category=self.mercado,
+            )
+            for mes in (1, 2, 3, 4)
+            for dia in range(1, (10 if mes == 4 else monthrange(2025, mes)[1]) + 1)
+        ])
+        self.abril = self.create_budget(nome='Abril', mes=4, valor_planejado=500)
+        with self.captureOnCommitCallbacks(execute=True):
+            BudgetCategory.objects.create(budget=self.abril, category=self.mercado, valor_planejado=300)
+            BudgetCategory.objects.create(budget=self.abril, category=self.lazer, valor_planejado=200)
+        self.create_budget(nome='Geral', mes=4, valor_planejado=50)
+
+    def test_projection(self):
+        data = forecast_budgets(self.workspace.id, date(2025, 4, 10))
+        self.assertEqual((data['dias_decorridos'], data['dias_no_mes'], data['meses_historico']), (10, 30, 3))
+
+        orcamentos = {item['nome']: item for item in data['orcamentos']}
+        abril = orcamentos['Abril']
+        # Amostras do restante: 200 (ritmo atual), 210, 180 e 210 (jan, fev, mar)
+        self.assertEqual((abril['gasto_atual'], abril['projetado']), (100, 300))
+        self.assertLess(abril['probabilidade_estouro'], 0.01)
+
+        categorias = {item['category_name']: item for item in abril['categorias']}
+        self.assertEqual(categorias['Mercado']['projetado'], 300)
+        self.assertAlmostEqual(categorias['Mercado']['probabilidade_estouro'], 0.5)
+        self.assertEqual((categorias['Lazer']['projetado'], categorias['Lazer']['probabilidade_estouro']), (0, 0))
+
+        # Sem categorias: total de despesas; já acima do planejado
+        self.assertEqual(orcamentos['Geral']['probabilidade_estouro'], 1)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+        response = client.get('/api/budgets/forecast/?data=2025-04-10', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['orcamentos']), 2)
+        self.assertEqual(client.get('/api/budgets/forecast/?data=2026-04-10', **headers).json()['orcamentos'], [])
+        self.assertEqual(client.get('/api/budgets/forecast/?historico=0', **headers).status_code, 400)
+        self.assertEqual(client.get('/api/budgets/forecast/?data=x', **headers).status_code, 400)
+
+
+class BudgetsCoveringTest(BudgetTestCase):
+    """Orçamentos que cobrem datas: mensais, anuais e personalizados"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_budget(nome='Março', mes=3)
+        self.create_budget(nome='Abril', mes=4)
+        self.create_budget(nome='Ano', tipo='anual')
+        self.create_budget(nome='Ano passado', tipo='anual', ano=2024)
+        self.create_budget(
+            nome='Viagem', tipo='personalizado', data_inicio=date(2025, 3, 10), data_fim=date(2025, 4, 10)
+        )
+        self.create_budget(
+            nome='Natal', tipo='personalizado', data_inicio=date(2024, 12, 1), data_fim=date(2024, 12, 31)
+        )
+        self.create_budget(nome='Aberto', tipo='personalizado')
+
+    def names(self, *datas):
+        return sorted(budgets_covering(self.workspace.id, *datas).values_list('nome', flat=True))
+
+    def test_single_date(self):
+        self.assertEqual(self.names(date(2025, 3, 5)), ['Aberto', 'Ano', 'Março'])
+        self.assertEqual(self.names(date(2025, 4, 10)), ['Aberto', 'Abril', 'Ano', 'Viagem'])
+        self.assertEqual(self.names(date(2024, 12, 25)), ['Aberto', 'Ano passado', 'Natal'])
+
+    def test_several_dates(self):
+        self.assertEqual(
+            self.names(date(2025, 3, 5), date(2025, 3, 20)), ['Aberto', 'Ano', 'Março', 'Viagem']
+        )
+
+    def test_custom_period_spend_and_move(self):
+        self.create_transaction(10, date(2025, 3, 9), self.mercado)
+        self.create_transaction(20, date(2025, 4, 10), self.mercado)
+        viagem = Budget.objects.get(nome='Viagem')
+        self.assertEqual(viagem.valor_gasto, Decimal('20'))
+
+        viagem.data_inicio = date(2025, 3, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            viagem.save()
+        viagem.refresh_from_db()
+        self.assertEqual(viagem.valor_gasto, Decimal('30'))
+
+    def test_alerts_limited_to_covering_budgets(self):
+        marco = Budget.objects.get(nome='Março')
+        natal = Budget.objects.get(nome='Natal')
+        alertas = {}
+        for budget in (marco, natal):
+            with self.captureOnCommitCallbacks(execute=True):
+                categoria = BudgetCategory.objects.create(budget=budget, category=self.mercado, valor_planejado=10)
+            alertas[budget.nome] = BudgetAlert.objects.create(
+                budget_category=categoria, tipo_alerta='valor_fixo', valor_limite=5
+            )
+        BudgetCategory.objects.update(valor_gasto=50)
 
-# Create your tests here.
+        alerts.evaluate_alerts(self.workspace.id, [date(2025, 3, 5)])
+        self.assertTrue(BudgetAlert.objects.get(pk=alertas['Março'].pk).notificado)
+        self.assertFalse(BudgetAlert.objects.get(pk=alertas['Natal'].pk).notificado)
@@ -0,0 +1,118 @@
+"""
+Gasto dos orçamentos mantido de forma incremental
+
+Cada despesa confirmada contribui com (workspace, categoria, data, valor).
+Quando uma transação é criada, alterada (valor, data, categoria, tipo ou
+confirmação) ou excluída, a contribuição anterior é descontada e a nova
+somada, com UPDATEs por F() apenas nos orçamentos cujo período cobre a data:
+
+- BudgetCategory da categoria nesses orçamentos;
+- Budget que tem a categoria entre as suas, ou que não tem categorias
+  (nesse caso o orçamento considera todas as despesas do período).
+
+Os orçamentos são localizados pelos índices de período de Budget (ver
+budgets_covering).
+Operações em massa (QuerySet.update(), bulk_create()) não disparam signals:
+quem as usa chama apply_expense_rows() com as linhas afetadas, ou recalcula
+com Budget.atualizar_valores_gastos().
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Exists, F, Func, OuterRef, Q, Value
+
+from .models import Budget, BudgetCategory, BudgetType
+from .reports import bump_budget_version
+
+
+def expense_key(transaction):
+    """(workspace_id, category_id, data, valor) se a transação conta nos orçamentos, senão None"""
+    from apps.transactions.models import TransactionType
+
+    if transaction.tipo != TransactionType.SAIDA or not transaction.confirmada:
+        return None
+    # data/valor podem ter sido atribuídos como texto antes do save()
+    fields = type(transaction)._meta
+    return (
+        transaction.workspace_id,
+        transaction.category_id,
+        fields.get_field('data').to_python(transaction.data),
+        fields.get_field('valor').to_python(transaction.valor),
+    )
+
+
+def budgets_covering(workspace_id, *datas):
+    """
+    Orçamentos do workspace cujo período (Budget.periodo) inclui alguma das datas.
+
+    Mensais/anuais usam o índice (workspace, ano, mes); personalizados com as
+    duas datas usam, no PostgreSQL, o índice GiST em
+    daterange(data_inicio, data_fim, '[]') e, nos demais bancos, o índice
+    (workspace, data_inicio, data_fim).
+    """
+    queryset = Budget.objects.filter(workspace_id=workspace_id)
+    use_range = connection.vendor == 'postgresql'
+    if use_range:
+        from django.contrib.postgres.fields import DateRangeField
+
+        queryset = queryset.alias(periodo_personalizado=Func(
+            F('data_inicio'), F('data_fim'), Value('[]'),
+            function='daterange', output_field=DateRangeField(),
+        ))
+
+    cobre = Q(tipo=BudgetType.PERSONALIZADO) & (Q(data_inicio__isnull=True) | Q(data_fim__isnull=True))
+    for data in datas:
+        if use_range:
+            intervalo = Q(periodo_personalizado__contains=data)
+        else:
+            intervalo = Q(data_inicio__lte=data, data_fim__gte=data)
+        cobre |= (
+            Q(tipo=BudgetType.MENSAL, ano=data.year, mes=data.month)
+            | Q(tipo=BudgetType.MENSAL, ano=data.year, mes__isnull=True)
+            | Q(tipo=BudgetType.ANUAL, ano=data.year)
+            | (Q(tipo=BudgetType.PERSONALIZADO, data_inicio__isnull=False, data_fim__isnull=False) & intervalo)
+        )
+    return queryset.filter(cobre)
+
+
+def apply_expense(workspace_id, category_id, data, valor):
+    """Soma valor (negativo para descontar) ao gasto dos orçamentos afetados"""
+    budgets = budgets_covering(workspace_id, data)
+    categorias = BudgetCategory.objects.filter(budget=OuterRef('pk'))
+
+    if category_id is not None:
+        BudgetCategory.objects.filter(
+            budget__in=budgets.values('pk'), category_id=category_id
+        ).update(valor_gasto=F('valor_gasto') + valor)
+        budgets = budgets.filter(Exists(categorias.filter(category_id=category_id)) | ~Exists(categorias))
+    else:
+        budgets = budgets.filter(~Exists(categorias))
+
+    budgets.update(valor_gasto=F('valor_gasto') + valor)
+
+
+def apply_expense_change(before, after):
+    """Aplica a troca de contribuição de uma transação (qualquer lado pode ser None)"""
+    if before == after:
+        return
+    if before is not None:
+        workspace_id, category_id, data, valor = before
+        apply_expense(workspace_id, category_id, data, -valor)
+        bump_budget_version(workspace_id)
+    if after is not None:
+        apply_expense(*after)
+        bump_budget_version(after[0])
+
+
+def apply_expense_rows(workspace_id, rows, sign=1):
+    """
+    Aplica em lote linhas (category_id, data, valor) de despesas confirmadas
+    (sign=-1 para descontá-las), agrupadas por categoria e data.
+    """
+    totals = defaultdict(int)
+    for category_id, data, valor in rows:
+        totals[(category_id, data)] += valor
+    for (category_id, data), valor in totals.items():
+        apply_expense(workspace_id, category_id, data, sign * valor)
+    if totals:
+        bump_budget_version(workspace_id)
@@ -5,10 +5,14 @@ urlpatterns = [
     # Budgets
     path('', views.BudgetListCreateView.as_view(), name='budget-list'),
     path('<int:pk>/', views.BudgetDetailView.as_view(), name='budget-detail'),
-    path('summary/', views.budget_summary, name='budget-summary'),
-    path('update-spent/', views.update_budget_spent_amounts, name='update-budget-spent'),
+    path('summary/', views.BudgetSummaryView.as_view(), name='budget-summary'),
+    path('forecast/', views.BudgetForecastView.as_view(), name='budget-forecast'),
+    path('vs-actual/', views.BudgetVsActualView.as_view(), name='budget-vs-actual'),
+    path('rollover/', views.BudgetRolloverView.as_view(), name='budget-rollover'),
+    path('update-spent/', views.UpdateBudgetSpentAmountsView.as_view(), name='update-budget-spent'),
     
     # Budget Alerts
     path('alerts/', views.BudgetAlertListView.as_view(), name='budget-alerts'),
-    path('alerts/<int:alert_id>/read/', views.mark_alert_as_read, name='mark-alert-read'),
+    path('alerts/notifications/', views.BudgetAlertNotificationListView.as_view(), name='budget-alert-notifications'),
+    path('alerts/<int:alert_id>/read/', views.MarkAlertAsReadView.as_view(), name='mark-alert-read'),
 ]
@@ -1,45 +1,70 @@
-from rest_framework import generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Sum, Q, F
-from .models import Budget, BudgetAlert
-from .serializers import BudgetSerializer, BudgetAlertSerializer, BudgetSummarySerializer
+from rest_framework.views import APIView
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from datetime import date
+from decimal import Decimal
+from .models import Budget, BudgetAlert, BudgetAlertNotification, BudgetCategory
+from .serializers import (
+    BudgetSerializer, BudgetAlertSerializer, BudgetAlertNotificationSerializer, BudgetSummarySerializer
+)
+from .forecast import DEFAULT_HISTORY, MAX_HISTORY, forecast_budgets
+from .reports import WINDOWS, budget_vs_actual
+from .services import MAX_ROLLOVER_MONTHS, periodo_range, recompute_budget_spend, rollover_budgets
 from apps.accounts.workspace_mixins import WorkspaceRequiredMixin
+from apps.accounts.permissions import HasWorkspaceRole
+from budgetly.db_routers import use_replica
+
+
+def _int_param(params, *names):
+    """Primeiro parâmetro informado entre names, como inteiro"""
+    for name in names:
+        value = params.get(name)
+        if value:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValidationError({name: 'Informe um número inteiro.'})
+    return None
+
+
+def filter_budgets(queryset, params):
+    """Filtros opcionais de orçamentos: mes/ano (ou month/year) e category"""
+    mes = _int_param(params, 'mes', 'month')
+    ano = _int_param(params, 'ano', 'year')
+    category = _int_param(params, 'category')
+
+    if mes:
+        queryset = queryset.filter(mes=mes)
+    if ano:
+        queryset = queryset.filter(ano=ano)
+    if category:
+        queryset = queryset.filter(id__in=BudgetCategory.objects.filter(
+            category_id=category
+        ).values('budget_id'))
+    return queryset
 
 
 class BudgetListCreateView(WorkspaceRequiredMixin, generics.ListCreateAPIView):
     serializer_class = BudgetSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         queryset = Budget.objects.filter(is_active=True)
         queryset = self.get_workspace_queryset(queryset)
-        
-        # Filtros opcionais
-        month = self.request.query_params.get('month')
-        year = self.request.query_params.get('year')
-        category = self.request.query_params.get('category')
-        
-        if month:
-            queryset = queryset.filter(month=month)
-        if year:
-            queryset = queryset.filter(year=year)
-        if category:
-            queryset = queryset.filter(category_id=category)
-        
-        return queryset
+        queryset = filter_budgets(queryset, self.request.query_params)
+        # BudgetSerializer inclui as categorias com o nome de cada uma
+        return queryset.prefetch_related('categorias__category')
 
 
 class BudgetDetailView(WorkspaceRequiredMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = BudgetSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
-        try:
-            workspace = self.get_user_workspace()
-            return Budget.objects.filter(workspace=workspace)
-        except:
-            return Budget.objects.none()
+        return self.get_workspace_queryset(Budget.objects.all()).prefetch_related('categorias__category')
 
     def perform_destroy(self, instance):
         # Soft delete
@@ -47,81 +72,171 @@ class BudgetDetailView(WorkspaceRequiredMixin, generics.RetrieveUpdateDestroyAPI
         instance.save()
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def budget_summary(request):
-    """Retorna resumo dos orçamentos"""
-    user = request.user
-    
-    # Filtros opcionais
-    month = request.GET.get('month')
-    year = request.GET.get('year')
-    
-    queryset = Budget.objects.filter(user=user, is_active=True)
-    
-    if month:
-        queryset = queryset.filter(month=month)
-    if year:
-        queryset = queryset.filter(year=year)
-    
-    # Calcular totais
-    totals = queryset.aggregate(
-        total_planned=Sum('planned_amount'),
-        total_spent=Sum('spent_amount')
-    )
-    
-    total_planned = totals['total_planned'] or 0
-    total_spent = totals['total_spent'] or 0
-    total_remaining = total_planned - total_spent
-    
-    over_budget_count = queryset.filter(spent_amount__gt=F('planned_amount')).count()
-    
-    data = {
-        'total_planned': total_planned,
-        'total_spent': total_spent,
-        'total_remaining': total_remaining,
-        'budgets_count': queryset.count(),
-        'over_budget_count': over_budget_count
-    }
-    
-    serializer = BudgetSummarySerializer(data)
-    return Response(serializer.data)
-
-
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def update_budget_spent_amounts(request):
-    """Atualiza os valores gastos de todos os orçamentos do usuário"""
-    user = request.user
-    budgets = Budget.objects.filter(user=user, is_active=True)
-    
-    updated_count = 0
-    for budget in budgets:
-        budget.update_spent_amount()
-        updated_count += 1
-    
-    return Response({
-        'message': f'{updated_count} orçamentos atualizados com sucesso',
-        'updated_count': updated_count
-    })
-
-
-class BudgetAlertListView(generics.ListAPIView):
+class BudgetSummaryView(WorkspaceRequiredMixin, APIView):
+    """Resumo dos orçamentos ativos do workspace (filtros de filter_budgets)"""
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    @use_replica
+    def get(self, request):
+        queryset = filter_budgets(
+            self.get_workspace_queryset(Budget.objects.filter(is_active=True)),
+            request.query_params,
+        )
+
+        # Totais, contagem e excedidos em uma única agregação
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+        data = queryset.aggregate(
+            total_planejado=Coalesce(Sum('valor_planejado'), zero),
+            total_gasto=Coalesce(Sum('valor_gasto'), zero),
+            total_budgets=Count('id'),
+            budgets_excedidos=Count('id', filter=Q(valor_gasto__gt=F('valor_planejado'))),
+        )
+        data['total_restante'] = data['total_planejado'] - data['total_gasto']
+
+        serializer = BudgetSummarySerializer(data)
+        return Response(serializer.data)
+
+
+class BudgetVsActualView(WorkspaceRequiredMixin, APIView):
+    """
+    Orçado x realizado por categoria e mês.
+
+    Janela móvel de meses=12 ou 24 meses terminando em ano/mes (padrão: mês
+    atual).
+    """
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    @use_replica
+    def get(self, request):
+        today = date.today()
+        meses = _int_param(request.query_params, 'meses') or WINDOWS[0]
+        if meses not in WINDOWS:
+            raise ValidationError({'meses': f'Use um dos valores: {", ".join(map(str, WINDOWS))}.'})
+        ano = _int_param(request.query_params, 'ano') or today.year
+        mes = _int_param(request.query_params, 'mes') or (today.month if ano == today.year else 12)
+        if not 1 <= mes <= 12:
+            raise ValidationError({'mes': 'Informe um mês entre 1 e 12.'})
+
+        return Response(budget_vs_actual(request.workspace.id, ano, mes, meses))
+
+
+class BudgetForecastView(WorkspaceRequiredMixin, APIView):
+    """
+    Projeção do gasto no fim do mês e probabilidade de estouro dos
+    orçamentos mensais do mês atual (ou de data=AAAA-MM-DD), usando
+    historico=1-12 meses anteriores.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    @use_replica
+    def get(self, request):
+        historico = _int_param(request.query_params, 'historico')
+        if historico is None:
+            historico = DEFAULT_HISTORY
+        if not 1 <= historico <= MAX_HISTORY:
+            raise ValidationError({'historico': f'Informe de 1 a {MAX_HISTORY} meses.'})
+        hoje = None
+        if request.query_params.get('data'):
+            try:
+                hoje = date.fromisoformat(request.query_params['data'])
+            except ValueError:
+                raise ValidationError({'data': 'Use o formato AAAA-MM-DD.'})
+
+        return Response(forecast_budgets(request.workspace.id, hoje, historico))
+
+
+class UpdateBudgetSpentAmountsView(WorkspaceRequiredMixin, APIView):
+    """
+    Recalcula os valores gastos de todos os orçamentos do workspace.
+
+    Aceita ano (e mes) opcionais para recalcular só os orçamentos que cobrem
+    esse período.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    def post(self, request):
+        periodos = None
+        ano = request.data.get('ano')
+        mes = request.data.get('mes')
+        if ano:
+            try:
+                periodos = [(int(ano), int(mes) if mes else None)]
+                periodo_range(*periodos[0])
+            except (TypeError, ValueError):
+                return Response({'error': 'Período inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_count, categories_count = recompute_budget_spend(request.workspace, periodos)
+
+        return Response({
+            'message': f'{updated_count} orçamentos atualizados com sucesso',
+            'updated_count': updated_count,
+            'categories_count': categories_count,
+        })
+
+
+class BudgetRolloverView(WorkspaceRequiredMixin, APIView):
+    """
+    Copia os orçamentos mensais de ano/mes (e suas categorias) para os
+    próximos meses (1-12). carry_over=true soma ao primeiro mês o saldo não
+    gasto do mês de origem.
+    """
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    def post(self, request):
+        ano = _int_param(request.data, 'ano')
+        mes = _int_param(request.data, 'mes')
+        meses = _int_param(request.data, 'meses') or 1
+        if not ano or not mes or not 1 <= mes <= 12:
+            raise ValidationError({'mes': 'Informe ano e mes (1-12) de origem.'})
+        if not 1 <= meses <= MAX_ROLLOVER_MONTHS:
+            raise ValidationError({'meses': f'Informe de 1 a {MAX_ROLLOVER_MONTHS} meses.'})
+        carry_over = str(request.data.get('carry_over', '')).lower() in ('true', '1')
+
+        budgets, categorias, ignorados = rollover_budgets(request.workspace, ano, mes, meses, carry_over)
+        return Response({
+            'message': f'{budgets} orçamentos criados',
+            'created_count': budgets,
+            'categories_count': categorias,
+            'skipped_count': ignorados,
+        }, status=status.HTTP_201_CREATED if budgets else status.HTTP_200_OK)
+
+
+class BudgetAlertListView(WorkspaceRequiredMixin, generics.ListAPIView):
     serializer_class = BudgetAlertSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    def get_queryset(self):
+        return BudgetAlert.objects.filter(
+            budget_category__budget__workspace=self.request.workspace
+        ).select_related(
+            'budget_category__budget', 'budget_category__category'
+        ).order_by('-created_at')
+
+
+class BudgetAlertNotificationListView(WorkspaceRequiredMixin, generics.ListAPIView):
+    """Notificações dos alertas disparados (?lida=false para as não lidas)"""
+    serializer_class = BudgetAlertNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
-        return BudgetAlert.objects.filter(budget__user=self.request.user).order_by('-created_at')
-
-
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def mark_alert_as_read(request, alert_id):
-    """Marca um alerta como lido"""
-    try:
-        alert = BudgetAlert.objects.get(id=alert_id, budget__user=request.user)
-        alert.is_read = True
-        alert.save()
-        return Response({'message': 'Alerta marcado como lido'})
-    except BudgetAlert.DoesNotExist:
-        return Response({'error': 'Alerta não encontrado'}, status=404)
+        queryset = self.get_workspace_queryset(BudgetAlertNotification.objects.all())
+        lida = self.request.query_params.get('lida')
+        if lida is not None:
+            queryset = queryset.filter(lida=lida.lower() == 'true')
+        return queryset
+
+
+class MarkAlertAsReadView(WorkspaceRequiredMixin, APIView):
+    """Marca como lidas as notificações de um alerta"""
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
+
+    def post(self, request, alert_id):
+        if not BudgetAlert.objects.filter(
+            id=alert_id, budget_category__budget__workspace=request.workspace
+        ).exists():
+            return Response({'error': 'Alerta não encontrado'}, status=404)
+
+        updated = BudgetAlertNotification.objects.filter(
+            alerta_id=alert_id, workspace=request.workspace, lida=False
+        ).update(lida=True)
+        return Response({'message': 'Alerta marcado como lido', 'updated_count': updated})
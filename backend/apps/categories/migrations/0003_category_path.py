@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    """Preenche o caminho materializado das categorias existentes"""
+    Category = apps.get_model('categories', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            paths[pk] = (build(parent_id) if parent_id else '') + f"{pk}/"
+        return paths[pk]
+
+    categories = list(Category.objects.only('id'))
+    for category in categories:
+        category.path = build(category.id)
+    Category.objects.bulk_update(categories, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_alter_category_workspace_alter_costcenter_workspace_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -29,6 +31,9 @@ class Category(models.Model):
         related_name='subcategories',
         help_text="Categoria pai (deixe vazio para categoria principal)"
     )
+    # Caminho materializado com os ids da raiz até a categoria, ex.: "12/45/".
+    # Permite buscar subárvores com um único LIKE 'path%' indexado.
+    path = models.CharField(max_length=255, default='', editable=False, db_index=True)
     
     nivel_importancia = models.CharField(
         max_length=20, 
@@ -72,8 +77,26 @@ class Category(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        old_path = self.path
         super().save(*args, **kwargs)
 
+        new_path = self.build_path()
+        if new_path != old_path:
+            Category.objects.filter(pk=self.pk).update(path=new_path)
+            if old_path:
+                # Categoria movida: reescreve o prefixo de todos os descendentes em um UPDATE
+                Category.objects.filter(
+                    workspace_id=self.workspace_id, path__startswith=old_path
+                ).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1))
+                )
+            self.path = new_path
+
+    def build_path(self):
+        """Calcula o caminho materializado a partir do caminho do pai"""
+        parent_path = self.parent.path if self.parent_id else ''
+        return f"{parent_path}{self.pk}/"
+
     @property
     def is_parent(self):
         """Verifica se é uma categoria principal (pai)"""
@@ -101,22 +124,47 @@ class Category(models.Model):
         return self.subcategories.filter(is_active=True).order_by('nome')
 
     def get_ancestors(self):
-        """Retorna todas as categorias pai desta categoria"""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return ancestors
+        """Retorna todas as categorias pai desta categoria (do pai até a raiz)"""
+        ancestor_ids = [int(pk) for pk in self.path.split('/')[:-2]]
+        ancestors = Category.objects.in_bulk(ancestor_ids)
+        return [ancestors[pk] for pk in reversed(ancestor_ids) if pk in ancestors]
+
+    def get_subtree(self):
+        """Queryset com a categoria e todos os seus descendentes (um LIKE 'path%')"""
+        if not self.path:
+            # Sem caminho (não salva): o prefixo vazio casaria com todas as categorias
+            return Category.objects.none()
+        return Category.objects.filter(workspace_id=self.workspace_id, path__startswith=self.path)
 
     def get_descendants(self):
-        """Retorna todas as subcategorias desta categoria e suas subcategorias"""
+        """
+        Retorna todas as subcategorias desta categoria e suas subcategorias
+
+        Mesma ordem e regra da busca recursiva por get_children(): cada filho
+        ativo (por nome) seguido dos seus descendentes; ramos abaixo de uma
+        subcategoria inativa ficam de fora. A subárvore vem de uma consulta.
+        """
+        children = {}
+        for category in self.get_subtree().exclude(pk=self.pk).filter(is_active=True).order_by('nome'):
+            children.setdefault(category.parent_id, []).append(category)
+
         descendants = []
-        for child in self.get_children():
-            descendants.append(child)
-            descendants.extend(child.get_descendants())
+        stack = list(reversed(children.get(self.pk, [])))
+        while stack:
+            category = stack.pop()
+            descendants.append(category)
+            stack.extend(reversed(children.get(category.pk, [])))
         return descendants
 
+    def get_subtree_transactions(self):
+        """Transações da categoria e de todas as subcategorias, em uma única consulta com join"""
+        from apps.transactions.models import Transaction
+        if not self.path:
+            return Transaction.objects.none()
+        return Transaction.objects.filter(
+            workspace_id=self.workspace_id, category__path__startswith=self.path
+        )
+
     @classmethod
     def get_main_categories(cls, workspace):
         """Retorna apenas as categorias principais de um workspace"""
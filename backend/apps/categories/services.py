@@ -0,0 +1,118 @@
+"""
+Montagem da árvore de categorias em memória, com cache por workspace
+"""
+import time
+
+from django.core.cache import cache
+from rest_framework import serializers
+
+# Campos expostos por CategorySerializer, lidos com .values() (sem instanciar modelos)
+CATEGORY_FIELDS = [
+    'id', 'nome', 'descricao', 'cor', 'icone', 'parent',
+    'nivel_importancia', 'considerar_dashboard', 'is_active',
+    'created_at', 'updated_at',
+]
+
+CATEGORY_TREE_TIMEOUT = 60 * 60
+
+# Mesmo formato de data/hora usado pelo CategorySerializer
+_datetime_field = serializers.DateTimeField()
+
+
+def _version_key(workspace_id):
+    return f'category_version:{workspace_id}'
+
+
+def get_category_version(workspace_id):
+    """Versão atual das categorias do workspace (muda a cada escrita)"""
+    return cache.get_or_set(_version_key(workspace_id), time.time_ns, None)
+
+
+def bump_category_version(workspace_id):
+    """Invalida tudo que foi cacheado para as categorias do workspace"""
+    cache.set(_version_key(workspace_id), time.time_ns(), None)
+
+
+def get_cached_category_data(workspace_id, name, builder):
+    """
+    Retorna builder() cacheado para o workspace, amarrado à versão atual.
+
+    Uma escrita em Category troca a versão, então entradas antigas apenas
+    expiram sem precisar ser apagadas.
+    """
+    key = f'category_{name}:{workspace_id}:{get_category_version(workspace_id)}'
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        cache.set(key, data, CATEGORY_TREE_TIMEOUT)
+    return data
+
+
+def serialize_category_row(row):
+    """Converte uma linha de .values() no mesmo dict gerado pelo CategorySerializer"""
+    data = dict(row)
+    data['created_at'] = _datetime_field.to_representation(row['created_at'])
+    data['updated_at'] = _datetime_field.to_representation(row['updated_at'])
+    return data
+
+
+def build_category_tree(queryset):
+    """
+    Categorias principais com as subcategorias em 'children', a partir de uma
+    única consulta ordenada e de um mapa de adjacência parent -> filhos.
+    """
+    rows = queryset.order_by('nome').values(*CATEGORY_FIELDS)
+
+    roots = []
+    children_by_parent = {}
+    for row in rows:
+        node = serialize_category_row(row)
+        if node['parent'] is None:
+            roots.append(node)
+        else:
+            children_by_parent.setdefault(node['parent'], []).append(node)
+
+    for node in roots:
+        node['children'] = children_by_parent.get(node['id'], [])
+
+    return roots
+
+
+def build_category_flat_list(queryset, depth_first=False):
+    """
+    Lista plana para dropdowns a partir de uma única consulta.
+
+    'isSelectable' é falso para categorias com filhos, calculado em memória a
+    partir do conjunto de parents (sem um exists() por linha), e 'isActive'
+    acompanha cada item. Por padrão segue a ordem parent__nome, nome; com
+    depth_first cada principal é seguida das suas subcategorias.
+    """
+    rows = list(
+        queryset.order_by('parent__nome', 'nome').values('id', 'nome', 'parent', 'is_active')
+    )
+    parent_ids = {row['parent'] for row in rows if row['parent'] is not None}
+
+    def to_item(row):
+        return {
+            'id': row['id'],
+            'nome': row['nome'],
+            'parent': row['parent'],
+            'isSelectable': row['id'] not in parent_ids,
+            'level': 1 if row['parent'] else 0,
+            'isActive': row['is_active'],
+        }
+
+    if not depth_first:
+        return [to_item(row) for row in rows]
+
+    children_by_parent = {}
+    for row in rows:
+        if row['parent'] is not None:
+            children_by_parent.setdefault(row['parent'], []).append(row)
+
+    result = []
+    for row in sorted((row for row in rows if row['parent'] is None), key=lambda r: r['nome']):
+        result.append(to_item(row))
+        for child in sorted(children_by_parent.get(row['id'], []), key=lambda r: r['nome']):
+            result.append(to_item(child))
+    return result
@@ -0,0 +1,15 @@
+"""
+Signals do app de categorias
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Category
+from .services import bump_category_version
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """Nova versão das categorias do workspace a cada escrita"""
+    bump_category_version(instance.workspace_id)
@@ -1,3 +1,155 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace, WorkspaceMember
+from .models import Category
+from .serializers import CategorySerializer
+
+
+class CategoryAPITestCase(TestCase):
+    """Workspace com 3 categorias principais de 2 subcategorias cada, fora de ordem alfabética"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.workspace = Workspace.objects.create(nome='Casa', criado_por=self.user)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        for i in range(3):
+            parent = Category.objects.create(workspace=self.workspace, user=self.user, nome=f'Principal {2 - i}')
+            for j in range(2):
+                Category.objects.create(
+                    workspace=self.workspace, user=self.user, nome=f'Sub {i}{1 - j}', parent=parent
+                )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def get(self, path, **extra):
+        return self.client.get(f'/api/categories/categories/{path}', **self.headers, **extra)
+
+
+class CategoryHierarchyTest(CategoryAPITestCase):
+    """hierarchy vem de uma consulta e fica em cache até a próxima escrita"""
+
+    def expected_tree(self):
+        categories = Category.objects.filter(workspace=self.workspace)
+        tree = []
+        for main in categories.filter(parent__isnull=True).order_by('nome'):
+            item = CategorySerializer(main).data
+            item['children'] = CategorySerializer(
+                categories.filter(parent=main).order_by('nome'), many=True
+            ).data
+            tree.append(item)
+        return tree
+
+    def test_matches_recursive_serialization(self):
+        response = self.get('hierarchy/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), json.loads(json.dumps(self.expected_tree())))
+
+    def test_cached_until_next_write(self):
+        self.get('hierarchy/')
+        with CaptureQueriesContext(connection) as cached:
+            self.get('hierarchy/')
+        self.assertFalse(any('categories_category' in query['sql'] for query in cached.captured_queries))
+
+        Category.objects.create(workspace=self.workspace, user=self.user, nome='Nova')
+        response = self.get('hierarchy/')
+        self.assertIn('Nova', [item['nome'] for item in response.json()])
+
+
+class CategoryFlatListTest(CategoryAPITestCase):
+    """flat-list em uma consulta, com todas as categorias por padrão e ETag"""
+
+    def test_matches_previous_response(self):
+        categories = Category.objects.filter(workspace=self.workspace).order_by('parent__nome', 'nome')
+        expected = [
+            {
+                'id': category.id,
+                'nome': category.nome,
+                'parent': category.parent_id,
+                'isSelectable': not categories.filter(parent=category).exists(),
+                'level': 1 if category.parent_id else 0,
+                'isActive': category.is_active,
+            }
+            for category in categories
+        ]
+        self.assertEqual(self.get('flat-list/').json(), expected)
+
+    def test_inactive_included_by_default(self):
+        inactive = Category.objects.get(nome='Sub 00')
+        inactive.is_active = False
+        inactive.save()
+
+        names = [item['nome'] for item in self.get('flat-list/').json()]
+        self.assertIn('Sub 00', names)
+        names = [item['nome'] for item in self.get('flat-list/?active_only=true').json()]
+        self.assertNotIn('Sub 00', names)
+
+    def test_depth_order(self):
+        names = [item['nome'] for item in self.get('flat-list/?order=depth').json()]
+        self.assertEqual(names, [
+            'Principal 0', 'Sub 20', 'Sub 21',
+            'Principal 1', 'Sub 10', 'Sub 11',
+            'Principal 2', 'Sub 00', 'Sub 01',
+        ])
+
+    def test_not_modified_with_current_etag(self):
+        etag = self.get('flat-list/')['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get('flat-list/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('categories_category' in query['sql'] for query in ctx.captured_queries))
+
+        Category.objects.create(workspace=self.workspace, user=self.user, nome='Nova')
+        self.assertEqual(self.get('flat-list/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class CategoryPathTest(CategoryAPITestCase):
+    """Caminho materializado: subárvore, ancestrais e movimentação"""
+
+    def test_descendants_keep_recursive_order_and_skip_inactive(self):
+        parent = Category.objects.get(nome='Principal 2')
+        Category.objects.filter(nome='Sub 01').update(is_active=False)
+        self.assertEqual([category.nome for category in parent.get_descendants()], ['Sub 00'])
+
+    def test_ancestors(self):
+        child = Category.objects.get(nome='Sub 00')
+        self.assertEqual(child.get_ancestors(), [Category.objects.get(nome='Principal 2')])
+
+    def test_move_rewrites_path(self):
+        from apps.accounts.models import Account
+        from apps.transactions.models import Transaction
+
+        child = Category.objects.get(nome='Sub 00')
+        target = Category.objects.get(nome='Principal 0')
+        child.parent = target
+        child.save()
+        child.refresh_from_db()
+        self.assertEqual(child.path, f'{target.path}{child.pk}/')
+
+        account = Account.objects.create(workspace=self.workspace, user=self.user, nome='Conta', tipo='cofre')
+        Transaction.objects.create(
+            workspace=self.workspace, user=self.user, account=account, tipo='saida',
+            valor=5, descricao='Mercado', data='2025-01-01', category=child,
+        )
+        self.assertEqual(target.get_subtree_transactions().count(), 1)
+        self.assertEqual(Category.objects.get(nome='Principal 2').get_subtree_transactions().count(), 0)
+
+    def test_unsaved_category_has_empty_subtree(self):
+        category = Category(workspace=self.workspace, user=self.user, nome='Rascunho')
+        self.assertFalse(category.get_subtree().exists())
+        self.assertFalse(category.get_subtree_transactions().exists())
 
-# Create your tests here.
+    def test_subtree_is_limited_to_workspace(self):
+        other = Workspace.objects.create(nome='Outro', criado_por=self.user)
+        foreign = Category.objects.create(workspace=other, user=self.user, nome='Externa')
+        parent = Category.objects.get(nome='Principal 2')
+        Category.objects.filter(pk=foreign.pk).update(path=f'{parent.path}{foreign.pk}/')
+        self.assertNotIn(foreign, parent.get_subtree())
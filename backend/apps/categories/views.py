@@ -1,15 +1,20 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Category, CostCenter
 from .serializers import CategorySerializer, CostCenterSerializer
+from .services import (
+    build_category_flat_list, build_category_tree,
+    get_cached_category_data, get_category_version,
+)
 from apps.accounts.workspace_mixins import WorkspaceRequiredMixin
+from apps.accounts.permissions import HasWorkspaceRole
 
 
 class CategoryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar categorias"""
     serializer_class = CategorySerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         """Retorna categorias filtradas por workspace"""
@@ -29,52 +34,52 @@ class CategoryViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         Retorna categorias organizadas hierarquicamente.
         Categorias principais com suas subcategorias aninhadas.
         """
-        # Busca todas as categorias do workspace
-        all_categories = self.get_queryset()
-        
-        # Filtra apenas categorias principais (sem parent)
-        main_categories = all_categories.filter(parent__isnull=True).order_by('nome')
-        
-        # Serializa as categorias principais
-        result = []
-        for main_category in main_categories:
-            # Serializa a categoria principal
-            main_data = CategorySerializer(main_category).data
-            
-            # Busca subcategorias desta categoria principal
-            subcategories = all_categories.filter(parent=main_category).order_by('nome')
-            
-            # Adiciona as subcategorias serializadas
-            main_data['children'] = CategorySerializer(subcategories, many=True).data
-            
-            result.append(main_data)
-        
+        # Uma única consulta; o resultado fica em cache até a próxima escrita em Category.
+        # Lê do default (não da réplica) para não cachear uma árvore atrasada na nova versão.
+        result = get_cached_category_data(
+            request.workspace.id,
+            'hierarchy',
+            lambda: build_category_tree(self.get_queryset()),
+        )
         return Response(result)
 
     @action(detail=False, methods=['get'], url_path='flat-list')
     def flat_list(self, request):
-        """Retorna categorias em lista plana para dropdown"""
-        all_categories = self.get_queryset().order_by('parent__nome', 'nome')
-        
-        result = []
-        for category in all_categories:
-            has_children = all_categories.filter(parent=category).exists()
-            category_data = {
-                'id': category.id,
-                'nome': category.nome,
-                'parent': category.parent_id,
-                'isSelectable': not has_children,
-                'level': 1 if category.parent else 0,
-            }
-            result.append(category_data)
-        
-        return Response(result)
+        """
+        Retorna categorias em lista plana para dropdown.
+
+        Como antes, traz todas as categorias do workspace (ativas e inativas,
+        com 'isActive'). Parâmetros: order=depth (principal seguida das
+        subcategorias) e active_only=true. Responde 304 quando o If-None-Match
+        confere com a versão atual das categorias do workspace.
+        """
+        # Sem @use_replica, como hierarchy: a lista vai para o cache sob a versão
+        # atual (a do ETag), e uma réplica atrasada gravaria ali dados antigos.
+        depth_first = request.query_params.get('order') == 'depth'
+        active_only = request.query_params.get('active_only') == 'true'
+        workspace_id = request.workspace.id
+
+        variant = f"flat:{'depth' if depth_first else 'name'}:{'active' if active_only else 'all'}"
+        etag = f'"categories-{workspace_id}-{get_category_version(workspace_id)}-{variant}"'
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        queryset = self.get_queryset()
+        if active_only:
+            queryset = queryset.filter(is_active=True)
+
+        result = get_cached_category_data(
+            workspace_id,
+            variant,
+            lambda: build_category_flat_list(queryset, depth_first),
+        )
+        return Response(result, headers={'ETag': etag})
 
 
 class CostCenterViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar centros de custo"""
     serializer_class = CostCenterSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         """Retorna centros de custo filtrados por workspace"""
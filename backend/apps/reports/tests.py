@@ -1,3 +1,82 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import router
+from django.test import RequestFactory, SimpleTestCase
+
+from budgetly.db_routers import pin_to_primary, reading_from_replica
+from .models import Report
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+class ColdStartImportsTest(SimpleTestCase):
+    """Módulos pesados só podem ser importados nos fluxos de importação/exportação"""
+
+    def test_wsgi_boot_does_not_import_heavy_modules(self):
+        with open(BACKEND_DIR / 'benchmarks' / 'importtime_budget.json', encoding='utf-8') as f:
+            heavy_modules = json.load(f)['heavy_modules']
+
+        for settings_module in ('budgetly.settings', 'budgetly.settings_api'):
+            with self.subTest(settings=settings_module):
+                # Interpretador novo: o processo de testes já pode ter carregado outros módulos
+                output = subprocess.run(
+                    [
+                        sys.executable, '-c',
+                        'import json, sys, budgetly.wsgi; '
+                        'from django.urls import get_resolver; get_resolver().url_patterns; '
+                        'print(json.dumps(sorted(sys.modules)))',
+                    ],
+                    cwd=BACKEND_DIR,
+                    env=dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module),
+                    capture_output=True, text=True, check=True,
+                )
+                loaded = json.loads(output.stdout.strip().splitlines()[-1])
+                offenders = [name for name in loaded if name.split('.')[0] in heavy_modules]
+                self.assertEqual(offenders, [])
+
+
+@mock.patch('budgetly.db_routers.replica_configured', return_value=True)
+class ReplicaRouterTest(SimpleTestCase):
+    """Leituras das views marcadas vão para a réplica, exceto logo após uma escrita"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def make_request(self, method='get', user_id=1):
+        request = getattr(self.factory, method)('/api/reports/')
+        request.user = mock.Mock(id=user_id, is_authenticated=True)
+        return request
+
+    def test_reads_outside_marked_views_use_default(self, _configured):
+        self.assertEqual(router.db_for_read(Report), 'default')
+
+    def test_safe_request_reads_from_replica(self, _configured):
+        with reading_from_replica(self.make_request()):
+            self.assertEqual(router.db_for_read(Report), 'replica')
+            self.assertEqual(router.db_for_write(Report), 'default')
+
+    def test_unsafe_request_stays_on_default(self, _configured):
+        with reading_from_replica(self.make_request('post')):
+            self.assertEqual(router.db_for_read(Report), 'default')
+
+    def test_recent_writer_is_pinned_to_default(self, _configured):
+        pin_to_primary(1)
+        with reading_from_replica(self.make_request(user_id=1)):
+            self.assertEqual(router.db_for_read(Report), 'default')
+        with reading_from_replica(self.make_request(user_id=2)):
+            self.assertEqual(router.db_for_read(Report), 'replica')
+
+    def test_anonymous_request_reads_from_replica(self, _configured):
+        request = self.factory.get('/api/reports/')
+        request.user = AnonymousUser()
+        with reading_from_replica(request):
+            self.assertEqual(router.db_for_read(Report), 'replica')
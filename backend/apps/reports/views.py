@@ -1,9 +1,10 @@
 from rest_framework import generics, permissions
 from .models import Report, ImportHistory
 from .serializers import ReportSerializer, ImportHistorySerializer
+from budgetly.db_routers import ReplicaReadMixin
 
 
-class ReportListCreateView(generics.ListCreateAPIView):
+class ReportListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """Lista e cria relatórios"""
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -12,7 +13,7 @@ class ReportListCreateView(generics.ListCreateAPIView):
         return Report.objects.filter(user=self.request.user)
 
 
-class ReportDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ReportDetailView(ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView):
     """Detalhes, atualização e exclusão de relatório"""
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -21,7 +22,7 @@ class ReportDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Report.objects.filter(user=self.request.user)
 
 
-class ImportHistoryListView(generics.ListAPIView):
+class ImportHistoryListView(ReplicaReadMixin, generics.ListAPIView):
     """Lista histórico de importações"""
     serializer_class = ImportHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
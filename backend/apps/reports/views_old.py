@@ -3,7 +3,6 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Sum, Count, Q
 from datetime import datetime, timedelta
-import pandas as pd
 from .models import ImportHistory, ReportTemplate
 from .serializers import (
     ImportHistorySerializer, FileUploadSerializer, ReportTemplateSerializer,
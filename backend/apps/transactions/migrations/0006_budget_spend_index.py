@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_optimize_balance_queries'),
+    ]
+
+    operations = [
+        # Índice para o gasto dos orçamentos: despesas confirmadas por
+        # workspace/categoria em um intervalo de datas
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_transaction_workspace_despesas ON transactions_transaction(workspace_id, category_id, data) WHERE confirmada = true AND tipo = 'saida';",
+            reverse_sql="DROP INDEX IF EXISTS idx_transaction_workspace_despesas;"
+        ),
+    ]
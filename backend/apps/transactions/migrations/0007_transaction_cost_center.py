@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_category_path'),
+        ('transactions', '0006_budget_spend_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='cost_center',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='categories.costcenter', verbose_name='Centro de Custo'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['workspace', 'cost_center', 'data'], name='transaction_cost_center_idx'),
+        ),
+    ]
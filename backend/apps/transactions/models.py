@@ -50,6 +50,9 @@ class Transaction(models.Model):
     category = models.ForeignKey('categories.Category', on_delete=models.SET_NULL, 
                                 null=True, blank=True, related_name='transactions')
     tags = models.ManyToManyField('categories.Tag', blank=True, related_name='transactions')
+    cost_center = models.ForeignKey('categories.CostCenter', on_delete=models.SET_NULL,
+                                   null=True, blank=True, related_name='transactions',
+                                   verbose_name="Centro de Custo")
     
     # Beneficiário
     beneficiario = models.ForeignKey('beneficiaries.Beneficiary', on_delete=models.SET_NULL,
@@ -76,6 +79,10 @@ class Transaction(models.Model):
         ordering = ['-data', '-created_at']
         verbose_name = 'Transação'
         verbose_name_plural = 'Transações'
+        indexes = [
+            # Filtros e agregações por centro de custo no período
+            models.Index(fields=['workspace', 'cost_center', 'data'], name='transaction_cost_center_idx'),
+        ]
 
     def __str__(self):
         return f"{self.descricao} - R$ {self.valor} ({self.data})"
@@ -238,8 +245,21 @@ class CreditCardInvoice(models.Model):
             workspace=self.credit_card.workspace
         )
         
+        # Despesas pendentes que passam a contar nos orçamentos (update() não dispara signals)
+        from apps.budgets.alerts import schedule_alert_evaluation
+        from apps.budgets.tracking import apply_expense_rows
+        despesas_pendentes = list(
+            transacoes_cartao.filter(confirmada=False, tipo=TransactionType.SAIDA)
+            .values_list('category_id', 'data', 'valor')
+        )
+
         # Confirmar todas as transações de cartão desta fatura
         transacoes_confirmadas = transacoes_cartao.update(confirmada=True)
+        if despesas_pendentes:
+            apply_expense_rows(self.credit_card.workspace_id, despesas_pendentes)
+            schedule_alert_evaluation(
+                self.credit_card.workspace_id, {data for _, data, _ in despesas_pendentes}
+            )
         print(f"💳 Fatura {self.credit_card.nome} {self.mes:02d}/{self.ano} fechada: {transacoes_confirmadas} transações confirmadas automaticamente")
         
         self.save()
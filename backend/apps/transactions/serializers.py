@@ -8,6 +8,7 @@ class TransactionSerializer(serializers.ModelSerializer):
     to_account_name = serializers.CharField(source='to_account.nome', read_only=True)
     credit_card_name = serializers.CharField(source='credit_card.nome', read_only=True)
     category_name = serializers.CharField(source='category.nome', read_only=True)
+    cost_center_name = serializers.CharField(source='cost_center.nome', read_only=True)
     beneficiario_name = serializers.CharField(source='beneficiario.nome', read_only=True)
     tipo_pagamento = serializers.SerializerMethodField()
 
@@ -17,7 +18,8 @@ class TransactionSerializer(serializers.ModelSerializer):
             'id', 'tipo', 'valor', 'valor_formatado', 'descricao',
             'data', 'account', 'account_name', 'to_account', 'to_account_name', 
             'credit_card', 'credit_card_name', 'category', 'category_name', 
-            'beneficiario', 'beneficiario_name', 'total_parcelas', 'numero_parcela',
+            'cost_center', 'cost_center_name', 'beneficiario', 'beneficiario_name', 'tags',
+            'total_parcelas', 'numero_parcela',
             'tipo_recorrencia', 'data_fim_recorrencia', 'confirmada', 'tipo_pagamento',
             'created_at', 'updated_at'
         ]
@@ -34,6 +36,22 @@ class TransactionSerializer(serializers.ModelSerializer):
             return 'conta'
         return None
 
+    def validate_tags(self, tags):
+        """Tags devem pertencer ao workspace da requisição"""
+        request = self.context.get('request')
+        workspace = getattr(request, 'workspace', None)
+        if workspace is not None and any(tag.workspace_id != workspace.id for tag in tags):
+            raise serializers.ValidationError("Tag não encontrada neste workspace.")
+        return tags
+
+    def validate_cost_center(self, cost_center):
+        """Centro de custo deve pertencer ao workspace da requisição"""
+        request = self.context.get('request')
+        workspace = getattr(request, 'workspace', None)
+        if cost_center is not None and workspace is not None and cost_center.workspace_id != workspace.id:
+            raise serializers.ValidationError("Centro de custo não encontrado neste workspace.")
+        return cost_center
+
     def validate(self, data):
         """Validações customizadas com regras de negócio"""
         tipo = data.get('tipo')
@@ -0,0 +1,32 @@
+"""
+Signals do app de transações
+"""
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import Transaction
+
+# Colunas anteriores usadas pelos post_save de outros apps:
+# orçamentos (gasto incremental) e beneficiários (estatísticas de uso)
+PREVIOUS_COLUMNS = (
+    'workspace_id', 'category_id', 'data', 'valor', 'tipo', 'confirmada', 'beneficiario_id',
+)
+PREVIOUS_FIELDS = PREVIOUS_COLUMNS + ('workspace', 'category', 'beneficiario')
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Carrega uma vez a linha anterior de uma transação alterada em
+    instance._previous (None em inclusões).
+
+    Com update_fields que não tocam em PREVIOUS_FIELDS, a própria instância
+    representa o estado anterior e nenhuma consulta é feita.
+    """
+    instance._previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(PREVIOUS_FIELDS):
+        instance._previous = instance
+        return
+    instance._previous = sender.objects.filter(pk=instance.pk).only(*PREVIOUS_COLUMNS).first()
@@ -1,3 +1,223 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Account, User, Workspace, WorkspaceMember
+from apps.categories.models import Category, CostCenter, Tag
+from .models import Transaction
+
+
+class TransactionAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ana', email='ana@example.com', password='x')
+        self.workspace = Workspace.objects.create(nome='Casa', criado_por=self.user)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user, role='admin')
+        self.account = Account.objects.create(
+            workspace=self.workspace, user=self.user, nome='Conta', tipo='cofre'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {'HTTP_X_WORKSPACE_ID': str(self.workspace.id)}
+
+    def create_transaction(self, valor, category=None, tipo='saida', data=date(2025, 3, 5), **extra):
+        return Transaction.objects.create(
+            workspace=self.workspace, user=self.user, account=self.account, tipo=tipo,
+            valor=valor, descricao='Compra', data=data, category=category, **extra
+        )
+
+    def get(self, path):
+        return self.client.get(f'/api/transactions/transactions/{path}', **self.headers)
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(path)
+        queries = [query for query in ctx.captured_queries if 'transactions_transaction' in query['sql']]
+        return response, len(queries)
+
+
+class CategoryRollupTest(TransactionAPITestCase):
+    """category-rollup: uma consulta agrupada, somada na categoria pai e por importância"""
+
+    def setUp(self):
+        super().setUp()
+        casa = Category.objects.create(
+            workspace=self.workspace, user=self.user, nome='Casa', nivel_importancia='essencial'
+        )
+        luz = Category.objects.create(
+            workspace=self.workspace, user=self.user, nome='Luz', parent=casa, nivel_importancia='essencial'
+        )
+        decoracao = Category.objects.create(
+            workspace=self.workspace, user=self.user, nome='Decoração', parent=casa,
+            nivel_importancia='superfluo',
+        )
+        self.casa = casa
+        for category, valor in [(luz, 100), (decoracao, 50), (casa, 10), (None, 40)]:
+            self.create_transaction(valor, category)
+        self.create_transaction(999, luz, tipo='entrada')
+
+    def test_rollup(self):
+        response, queries = self.count_queries('category-rollup/?month=3&year=2025')
+        self.assertEqual(queries, 1)
+        data = response.json()
+        self.assertEqual(Decimal(data['total']), Decimal('200'))
+        self.assertEqual(data['count'], 4)
+
+        pais = {item['nome']: Decimal(item['total']) for item in data['categorias_pai']}
+        self.assertEqual(pais, {'Casa': Decimal('160'), 'Sem categoria': Decimal('40')})
+        importancia = {nivel: Decimal(bucket['total']) for nivel, bucket in data['por_importancia'].items()}
+        self.assertEqual(importancia, {
+            'essencial': Decimal('110'), 'superfluo': Decimal('50'), 'sem_categoria': Decimal('40'),
+        })
+
+    def test_partial_period_defaults_to_current_month(self):
+        # Só month (sem year) não filtra em get_queryset: vale o padrão do mês atual
+        data = self.get('category-rollup/?month=3').json()
+        self.assertEqual(data['count'], 0)
+
+
+class TransactionTagTest(TransactionAPITestCase):
+    """Tags: validação por workspace, filtros, prefetch na listagem e by_tag"""
+
+    def setUp(self):
+        super().setUp()
+        self.viagem, self.trabalho, self.lazer = [
+            Tag.objects.create(workspace=self.workspace, user=self.user, nome=nome)
+            for nome in ('viagem', 'trabalho', 'lazer')
+        ]
+
+    def post(self, tags, valor=10, tipo='saida'):
+        return self.client.post('/api/transactions/transactions/', {
+            'account': self.account.id, 'tipo': tipo, 'valor': str(valor), 'descricao': 'Compra',
+            'data': '2025-03-05', 'tags': [tag.id for tag in tags],
+        }, format='json', **self.headers)
+
+    def ids(self, query):
+        return sorted(item['id'] for item in self.get(f'?{query}').json()['results'])
+
+    def test_filters(self):
+        first = self.post([self.viagem, self.trabalho]).json()['id']
+        second = self.post([self.viagem], 5).json()['id']
+        third = self.post([self.trabalho, self.lazer], 7, 'entrada').json()['id']
+        self.post([])
+
+        self.assertEqual(self.ids(f'tags={self.viagem.id}'), [first, second])
+        self.assertEqual(self.ids(f'tags={self.viagem.id},{self.lazer.id}'), [first, second, third])
+        self.assertEqual(self.ids(f'tags_all={self.viagem.id},{self.trabalho.id}'), [first])
+        self.assertEqual(self.ids(f'tags_all={self.trabalho.id}&tags={self.lazer.id}'), [third])
+        self.assertEqual(self.get('?tags=a').status_code, 400)
+
+    def test_tag_from_other_workspace_rejected(self):
+        other = Workspace.objects.create(nome='Outro', criado_por=self.user)
+        foreign = Tag.objects.create(workspace=other, user=self.user, nome='externa')
+        response = self.post([foreign])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.json())
+
+    def test_list_queries_do_not_grow_with_tags(self):
+        self.post([self.viagem])
+        _, baseline = self.count_queries('')
+        for _ in range(5):
+            self.post([self.viagem, self.trabalho, self.lazer])
+        response, queries = self.count_queries('')
+        self.assertEqual(queries, baseline)
+        self.assertEqual(len(response.json()['results'][0]['tags']), 3)
+
+    def test_by_tag(self):
+        self.post([self.viagem, self.trabalho])
+        self.post([self.viagem], 5)
+        self.post([self.trabalho, self.lazer], 7, 'entrada')
+
+        totals = {
+            item['nome']: (Decimal(str(item['entradas'])), Decimal(str(item['saidas'])), item['count'])
+            for item in self.get('by_tag/').json()
+        }
+        self.assertEqual(totals, {
+            'lazer': (Decimal('7'), Decimal('0'), 1),
+            'trabalho': (Decimal('7'), Decimal('10'), 2),
+            'viagem': (Decimal('0'), Decimal('15'), 2),
+        })
+
+
+class CostCenterTest(TransactionAPITestCase):
+    """Centro de custo: validação por workspace, filtros e agregações em uma consulta"""
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(workspace=self.workspace, user=self.user, nome='Material')
+        self.obra = CostCenter.objects.create(workspace=self.workspace, user=self.user, nome='Obra')
+        self.casa = CostCenter.objects.create(workspace=self.workspace, user=self.user, nome='Casa')
+
+    def post(self, **fields):
+        data = {
+            'account': self.account.id, 'category': self.category.id, 'tipo': 'saida', 'valor': '10.00',
+            'descricao': 'Compra', 'data': '2025-03-05', **fields,
+        }
+        return self.client.post('/api/transactions/transactions/', data, format='json', **self.headers)
+
+    def create_movements(self):
+        self.post(cost_center=self.obra.id)
+        self.post(cost_center=self.casa.id, valor='5.00')
+        self.post(cost_center=self.obra.id, tipo='entrada', valor='30.00')
+        self.post(category=None, valor='2.00')
+        self.post(valor='1.00', data='2025-04-01')
+
+    def totals(self, items):
+        return {
+            item['nome']: (Decimal(str(item['entradas'])), Decimal(str(item['saidas'])), item['count'])
+            for item in items
+        }
+
+    def test_cost_center_from_other_workspace_rejected(self):
+        response = self.post(cost_center=self.obra.id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cost_center_name'], 'Obra')
+
+        other = Workspace.objects.create(nome='Outro', criado_por=self.user)
+        foreign = CostCenter.objects.create(workspace=other, user=self.user, nome='Externo')
+        response = self.post(cost_center=foreign.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cost_center', response.json())
+
+    def test_filters(self):
+        self.create_movements()
+        self.assertEqual(self.get(f'?cost_center={self.obra.id}').json()['count'], 2)
+        self.assertEqual(self.get('?cost_center__isnull=true').json()['count'], 2)
+        self.assertEqual(self.get('?cost_center=abc').status_code, 400)
+
+    def test_summary_breakdown(self):
+        self.create_movements()
+        data = self.get('summary/?month=3&year=2025').json()
+        self.assertEqual(self.totals(data['por_centro_custo']), {
+            'Casa': (Decimal('0'), Decimal('5'), 1),
+            'Obra': (Decimal('30'), Decimal('10'), 2),
+            'Sem centro de custo': (Decimal('0'), Decimal('2'), 1),
+        })
+
+    def test_by_cost_center(self):
+        self.create_movements()
+        for group_by in ('', 'category', 'month', 'account', 'beneficiario'):
+            response, queries = self.count_queries(f'by_cost_center/?group_by={group_by}&month=3&year=2025')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(queries, 1)
+
+        data = {item['nome']: item for item in self.get('by_cost_center/?group_by=category&month=3&year=2025').json()}
+        self.assertEqual(self.totals(data.values())['Obra'], (Decimal('30'), Decimal('10'), 2))
+        self.assertEqual([item['nome'] for item in data['Sem centro de custo']['detalhes']], ['Sem categoria'])
+
+        data = self.get('by_cost_center/?group_by=month&month=3&year=2025').json()
+        self.assertEqual({detalhe['nome'] for item in data for detalhe in item['detalhes']}, {'2025-03'})
+        self.assertEqual(self.get('by_cost_center/?group_by=x').status_code, 400)
+
+    def test_by_cost_center_defaults_to_current_month(self):
+        self.create_movements()
+        self.assertEqual(self.get('by_cost_center/').json(), [])
 
-# Create your tests here.
+    def test_deleting_cost_center_keeps_transactions(self):
+        self.create_movements()
+        self.obra.delete()
+        self.assertEqual(Transaction.objects.count(), 5)
+        self.assertEqual(Transaction.objects.filter(cost_center__isnull=False).count(), 1)
@@ -1,26 +1,48 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Sum, Q
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncMonth
 from datetime import datetime, date
+from decimal import Decimal
 from .models import Transaction, CreditCardInvoice
 from .serializers import TransactionSerializer, CreditCardInvoiceSerializer
 from apps.accounts.workspace_mixins import WorkspaceRequiredMixin
-from apps.beneficiaries.models import Beneficiary
+from apps.accounts.permissions import HasWorkspaceRole
+from budgetly.db_routers import use_replica
+from apps.beneficiaries.services import ensure_system_beneficiary
+
+# Tabela de ligação do ManyToMany Transaction.tags
+TransactionTag = Transaction.tags.through
+
+# Segunda dimensão de by_cost_center (group_by): campos (id, nome) agrupados
+# e o rótulo das linhas sem valor nessa dimensão
+COST_CENTER_BREAKDOWNS = {
+    'category': ('category_id', 'category__nome', 'Sem categoria'),
+    'account': ('account_id', 'account__nome', 'Sem conta'),
+    'credit_card': ('credit_card_id', 'credit_card__nome', 'Sem cartão'),
+    'beneficiario': ('beneficiario_id', 'beneficiario__nome', 'Sem beneficiário'),
+    'month': ('mes', None, None),
+}
 
 
 class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar transações"""
     serializer_class = TransactionSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         # Usar o método do workspace mixin
         queryset = Transaction.objects.select_related(
-            'account', 'to_account', 'credit_card', 'category', 'beneficiario'
+            'account', 'to_account', 'credit_card', 'category', 'cost_center', 'beneficiario'
         )
         queryset = self.get_workspace_queryset(queryset)
         
+        # Tags serializadas apenas nas respostas por objeto (agregações não usam)
+        if self.action in ('list', 'retrieve', 'create', 'update', 'partial_update'):
+            queryset = queryset.prefetch_related('tags')
+        
         # Filtros opcionais
         account_id = self.request.query_params.get('account')
         if account_id:
@@ -51,9 +73,53 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
             queryset = queryset.filter(data__gte=start_date)
         if end_date:
             queryset = queryset.filter(data__lte=end_date)
+        
+        # Filtros por centro de custo: cost_center=1,2 (qualquer um) ou cost_center__isnull=true
+        cost_center_ids = self._get_id_list('cost_center')
+        if cost_center_ids:
+            queryset = queryset.filter(cost_center_id__in=cost_center_ids)
+        if self.request.query_params.get('cost_center__isnull') == 'true':
+            queryset = queryset.filter(cost_center__isnull=True)
+        
+        # Filtros por tags: tags=1,2 (qualquer uma) e tags_all=1,2 (todas)
+        tag_ids = self._get_id_list('tags')
+        if tag_ids:
+            queryset = queryset.filter(id__in=TransactionTag.objects.filter(
+                tag_id__in=tag_ids
+            ).values('transaction_id'))
+        
+        all_tag_ids = self._get_id_list('tags_all')
+        if all_tag_ids:
+            queryset = queryset.filter(id__in=TransactionTag.objects.filter(
+                tag_id__in=all_tag_ids
+            ).values('transaction_id').annotate(
+                matched=Count('tag_id', distinct=True)
+            ).filter(matched=len(all_tag_ids)).values('transaction_id'))
             
         return queryset.order_by('-data', '-created_at')
     
+    def _get_id_list(self, param):
+        """Lê uma lista de ids separados por vírgula da query string"""
+        value = self.request.query_params.get(param)
+        if not value:
+            return []
+        try:
+            return sorted({int(item) for item in value.split(',') if item.strip()})
+        except ValueError:
+            raise ValidationError({param: 'Informe ids numéricos separados por vírgula.'})
+    
+    def _with_default_period(self, queryset):
+        """Restringe ao mês atual quando get_queryset não aplicou nenhum período"""
+        params = self.request.query_params
+        has_period = (
+            (params.get('month') and params.get('year'))
+            or params.get('start_date') or params.get('end_date')
+        )
+        if has_period:
+            return queryset
+        today = date.today()
+        return queryset.filter(data__month=today.month, data__year=today.year)
+    
     def perform_create(self, serializer):
         """Salva a transação com workspace e user, aplicando regras de negócio"""
         # Validar se é transação de cartão em fatura fechada
@@ -71,15 +137,17 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         if serializer.validated_data.get('tipo') == 'transferencia':
             self._create_transfer_transactions(serializer)
         else:
-            # Transação normal (entrada ou saída)
+            # Transação normal (entrada ou saída), já com o beneficiário da conta/cartão
+            extra = {}
+            beneficiary = self._system_beneficiary_for(serializer.validated_data)
+            if beneficiary is not None:
+                extra['beneficiario'] = beneficiary
             transaction = serializer.save(
                 workspace=self.request.workspace,
-                user=self.request.user
+                user=self.request.user,
+                **extra
             )
             
-            # Auto-criar beneficiário baseado na conta/cartão
-            self._auto_create_beneficiary_for_transaction(transaction)
-            
             # Se for parcelado, criar as demais parcelas
             if transaction.total_parcelas > 1:
                 print(f"🔄 Criando parcelas para transação {transaction.id}: {transaction.total_parcelas} parcelas")
@@ -149,27 +217,9 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         data_transacao = data['data']
         category = data.get('category')
         
-        # Criar beneficiário para conta de origem (quem enviou)
-        beneficiario_origem, _ = Beneficiary.objects.get_or_create(
-            workspace=self.request.workspace,
-            nome=f"Conta {account_origem.nome}",
-            defaults={
-                'user': self.request.user,
-                'tipo': 'CONTA_BANCARIA',
-                'descricao': f'Auto-criado para conta {account_origem.nome}'
-            }
-        )
-        
-        # Criar beneficiário para conta de destino (quem recebeu)
-        beneficiario_destino, _ = Beneficiary.objects.get_or_create(
-            workspace=self.request.workspace,
-            nome=f"Conta {account_destino.nome}",
-            defaults={
-                'user': self.request.user,
-                'tipo': 'CONTA_BANCARIA',
-                'descricao': f'Auto-criado para conta {account_destino.nome}'
-            }
-        )
+        # Beneficiários do sistema das contas de origem (quem enviou) e destino (quem recebeu)
+        beneficiario_origem = ensure_system_beneficiary(account_origem)
+        beneficiario_destino = ensure_system_beneficiary(account_destino)
         
         # 1. Criar transação de SAÍDA da conta origem
         transacao_saida = Transaction.objects.create(
@@ -210,40 +260,21 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         # Retornar a transação de saída como referência principal
         return transacao_saida
 
-    def _auto_create_beneficiary_for_transaction(self, transaction):
-        """Auto-cria beneficiário baseado na conta ou cartão usado (para entrada/saída)"""
-        beneficiary_name = None
-        beneficiary_type = None
-        
-        if transaction.tipo == 'entrada':
+    def _system_beneficiary_for(self, data):
+        """Beneficiário do sistema da conta ou cartão usado (para entrada/saída)"""
+        if data.get('tipo') == 'entrada':
             # Para entrada, o beneficiário é sempre a própria conta que recebeu
-            if transaction.account:
-                beneficiary_name = f"Conta {transaction.account.nome}"
-                beneficiary_type = 'CONTA_BANCARIA'
-        elif transaction.tipo == 'saida':
+            owner = data.get('account')
+        elif data.get('tipo') == 'saida':
             # Para saída, o beneficiário é a conta ou cartão usado
-            if transaction.credit_card:
-                beneficiary_name = f"Cartão {transaction.credit_card.nome}"
-                beneficiary_type = 'CARTAO_CREDITO'
-            elif transaction.account:
-                beneficiary_name = f"Conta {transaction.account.nome}"
-                beneficiary_type = 'CONTA_BANCARIA'
-        
-        if beneficiary_name:
-            # Verificar se já existe
-            beneficiary, created = Beneficiary.objects.get_or_create(
-                workspace=self.request.workspace,
-                nome=beneficiary_name,
-                defaults={
-                    'user': self.request.user,
-                    'tipo': beneficiary_type,
-                    'descricao': f'Auto-criado para {beneficiary_name}'
-                }
-            )
-            
-            # Associar à transação
-            transaction.beneficiario = beneficiary
-            transaction.save(update_fields=['beneficiario'])
+            owner = data.get('credit_card') or data.get('account')
+        else:
+            owner = None
+        
+        if owner is None:
+            return None
+        # Criado junto com a conta/cartão; contas antigas são vinculadas na primeira vez
+        return ensure_system_beneficiary(owner)
 
     def _create_installments(self, transaction):
         """Cria as parcelas restantes para transações parceladas"""
@@ -278,8 +309,14 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
             print(f"✅ Todas as parcelas foram criadas")
 
     @action(detail=False, methods=['get'])
+    @use_replica
     def summary(self, request):
-        """Resumo de transações por período"""
+        """
+        Resumo de transações por período, com a quebra por centro de custo.
+
+        Uma única consulta agrupada por centro de custo; os totais do período
+        são a soma das linhas agrupadas.
+        """
         month = request.query_params.get('month', datetime.now().month)
         year = request.query_params.get('year', datetime.now().year)
         
@@ -289,21 +326,41 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
             confirmada=True
         )
         
-        entradas = transactions.filter(tipo='entrada').aggregate(
-            total=Sum('valor'))['total'] or 0
+        rows = list(
+            transactions.order_by()
+            .values('cost_center_id', 'cost_center__nome')
+            .annotate(
+                entradas=Sum('valor', filter=Q(tipo='entrada')),
+                saidas=Sum('valor', filter=Q(tipo='saida')),
+                count=Count('id'),
+            )
+            .order_by('cost_center__nome')
+        )
         
-        saidas = transactions.filter(tipo='saida').aggregate(
-            total=Sum('valor'))['total'] or 0
+        entradas = sum(row['entradas'] or 0 for row in rows)
+        saidas = sum(row['saidas'] or 0 for row in rows)
             
         return Response({
             'periodo': f"{month}/{year}",
             'entradas': entradas,
             'saidas': saidas,
             'saldo': entradas - saidas,
-            'total_transacoes': transactions.count()
+            'total_transacoes': sum(row['count'] for row in rows),
+            'por_centro_custo': [
+                {
+                    'id': row['cost_center_id'],
+                    'nome': row['cost_center__nome'] or 'Sem centro de custo',
+                    'entradas': row['entradas'] or 0,
+                    'saidas': row['saidas'] or 0,
+                    'saldo': (row['entradas'] or 0) - (row['saidas'] or 0),
+                    'count': row['count'],
+                }
+                for row in rows
+            ],
         })
 
     @action(detail=False, methods=['get'])
+    @use_replica
     def by_category(self, request):
         """Gastos agrupados por categoria"""
         # Buscar parâmetros de filtro
@@ -343,6 +400,183 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
         
         return Response(category_totals)
 
+    @action(detail=False, methods=['get'])
+    @use_replica
+    def by_tag(self, request):
+        """
+        Totais por tag (entradas, saídas e quantidade) no período.
+
+        Agregado no banco a partir da tabela de ligação transação-tag, sobre as
+        transações confirmadas que passam pelos filtros da listagem.
+        """
+        transactions = self.get_queryset().filter(confirmada=True).order_by().values('id')
+        
+        rows = (
+            TransactionTag.objects
+            .filter(transaction_id__in=transactions)
+            .values('tag_id', 'tag__nome', 'tag__cor')
+            .annotate(
+                entradas=Sum('transaction__valor', filter=Q(transaction__tipo='entrada')),
+                saidas=Sum('transaction__valor', filter=Q(transaction__tipo='saida')),
+                count=Count('transaction_id'),
+            )
+            .order_by('tag__nome')
+        )
+        
+        return Response([
+            {
+                'id': row['tag_id'],
+                'nome': row['tag__nome'],
+                'cor': row['tag__cor'],
+                'entradas': row['entradas'] or 0,
+                'saidas': row['saidas'] or 0,
+                'count': row['count'],
+            }
+            for row in rows
+        ])
+
+    @action(detail=False, methods=['get'])
+    @use_replica
+    def by_cost_center(self, request):
+        """
+        Totais por centro de custo (entradas, saídas e quantidade) no período.
+
+        Agregado no banco sobre as transações confirmadas que passam pelos
+        filtros da listagem (padrão: mês atual, como em category-rollup). Com
+        group_by (category, account, credit_card, beneficiario ou month), cada
+        centro de custo traz também a quebra pela segunda dimensão: o GROUP BY
+        é feito pelas duas de uma vez e os totais do centro de custo são
+        somados em memória sobre as linhas agrupadas. Linhas sem valor na
+        dimensão recebem um rótulo (ex.: 'Sem categoria').
+        """
+        group_by = request.query_params.get('group_by')
+        if group_by and group_by not in COST_CENTER_BREAKDOWNS:
+            raise ValidationError({'group_by': f"Use um de: {', '.join(COST_CENTER_BREAKDOWNS)}."})
+        
+        queryset = self._with_default_period(self.get_queryset().filter(confirmada=True)).order_by()
+        fields = ['cost_center_id', 'cost_center__nome']
+        if group_by == 'month':
+            queryset = queryset.annotate(mes=TruncMonth('data'))
+        if group_by:
+            fields += [field for field in COST_CENTER_BREAKDOWNS[group_by][:2] if field]
+        
+        rows = (
+            queryset
+            .values(*fields)
+            .annotate(
+                entradas=Sum('valor', filter=Q(tipo='entrada')),
+                saidas=Sum('valor', filter=Q(tipo='saida')),
+                count=Count('id'),
+            )
+            .order_by('cost_center__nome', *fields[2:])
+        )
+        
+        centros = {}
+        for row in rows:
+            centro = centros.setdefault(row['cost_center_id'], {
+                'id': row['cost_center_id'],
+                'nome': row['cost_center__nome'] or 'Sem centro de custo',
+                'entradas': 0,
+                'saidas': 0,
+                'count': 0,
+            })
+            entradas = row['entradas'] or 0
+            saidas = row['saidas'] or 0
+            centro['entradas'] += entradas
+            centro['saidas'] += saidas
+            centro['count'] += row['count']
+            
+            if group_by:
+                id_field, name_field, sem_valor = COST_CENTER_BREAKDOWNS[group_by]
+                if name_field is None:
+                    nome = row[id_field].strftime('%Y-%m')
+                else:
+                    nome = row[name_field] or sem_valor
+                centro.setdefault('detalhes', []).append({
+                    'id': row[id_field],
+                    'nome': nome,
+                    'entradas': entradas,
+                    'saidas': saidas,
+                    'count': row['count'],
+                })
+        
+        return Response(list(centros.values()))
+
+    @action(detail=False, methods=['get'], url_path='category-rollup')
+    @use_replica
+    def category_rollup(self, request):
+        """
+        Gastos por categoria consolidados na categoria pai e por nível de importância.
+
+        Uma única consulta agrupada por categoria (com join na categoria pai);
+        os totais por pai e por importância são somados em memória sobre as
+        linhas agrupadas. Período via month+year ou start_date/end_date (padrão:
+        mês atual). Filtros: nivel_importancia (lista separada por vírgula) e
+        considerar_dashboard=true.
+        """
+        params = request.query_params
+        queryset = self._with_default_period(self.get_queryset().filter(confirmada=True, tipo='saida'))
+
+        niveis = params.get('nivel_importancia')
+        if niveis:
+            queryset = queryset.filter(category__nivel_importancia__in=niveis.split(','))
+        if params.get('considerar_dashboard') == 'true':
+            queryset = queryset.filter(category__considerar_dashboard=True)
+
+        rows = list(
+            queryset.order_by()
+            .values(
+                'category_id', 'category__nome', 'category__nivel_importancia',
+                'category__parent_id', 'category__parent__nome',
+            )
+            .annotate(total=Sum('valor'), count=Count('id'))
+        )
+
+        total_geral = sum((row['total'] for row in rows), Decimal('0'))
+        count_geral = sum(row['count'] for row in rows)
+
+        def share(value):
+            return round(float(value / total_geral * 100), 2) if total_geral else 0
+
+        categorias = []
+        pais = {}
+        importancia = {}
+        for row in rows:
+            categorias.append({
+                'id': row['category_id'],
+                'nome': row['category__nome'] or 'Sem categoria',
+                'parent': row['category__parent_id'],
+                'nivel_importancia': row['category__nivel_importancia'],
+                'total': row['total'],
+                'count': row['count'],
+                'share': share(row['total']),
+            })
+
+            # Subcategorias somam na categoria pai; categorias principais em si mesmas
+            parent_id = row['category__parent_id'] or row['category_id']
+            parent_nome = row['category__parent__nome'] or row['category__nome'] or 'Sem categoria'
+            parent = pais.setdefault(parent_id, {
+                'id': parent_id, 'nome': parent_nome, 'total': Decimal('0'), 'count': 0,
+            })
+            parent['total'] += row['total']
+            parent['count'] += row['count']
+
+            nivel = row['category__nivel_importancia'] or 'sem_categoria'
+            bucket = importancia.setdefault(nivel, {'total': Decimal('0'), 'count': 0})
+            bucket['total'] += row['total']
+            bucket['count'] += row['count']
+
+        for bucket in list(pais.values()) + list(importancia.values()):
+            bucket['share'] = share(bucket['total'])
+
+        return Response({
+            'total': total_geral,
+            'count': count_geral,
+            'categorias': sorted(categorias, key=lambda item: -item['total']),
+            'categorias_pai': sorted(pais.values(), key=lambda item: -item['total']),
+            'por_importancia': importancia,
+        })
+
     @action(detail=True, methods=['post'])
     def confirm_credit_card_transaction(self, request, pk=None):
         """Confirma uma transação de cartão de crédito (representa pagamento da fatura)"""
@@ -382,7 +616,7 @@ class TransactionViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
 class CreditCardInvoiceViewSet(WorkspaceRequiredMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar faturas de cartão de crédito"""
     serializer_class = CreditCardInvoiceSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasWorkspaceRole]
 
     def get_queryset(self):
         """Retorna faturas filtradas por workspace"""
@@ -0,0 +1,138 @@
+"""
+Latência da busca de beneficiários (autocomplete) com muitos registros por workspace
+
+Compara a busca antiga (nome__icontains limitada a 10) com
+apps.beneficiaries.search.search_beneficiaries, simulando a digitação de
+alguns termos letra a letra. No SQLite o índice em memória é construído na
+primeira busca (medido à parte como "build"); no PostgreSQL a busca usa os
+índices GIN de pg_trgm (migrations 0004/0005).
+
+O worker roda em um subprocesso: no SQLite com um banco descartável, no
+PostgreSQL no banco configurado (use um banco de testes; o workspace criado é
+removido ao final).
+
+Uso (a partir de backend/):
+    python benchmarks/beneficiary_search.py sqlite
+    USE_POSTGRESQL=True DB_NAME=budgetly_bench python benchmarks/beneficiary_search.py postgres
+    python benchmarks/beneficiary_search.py sqlite --count 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PREFIXES = ['Supermercado', 'Padaria', 'Farmácia', 'Posto', 'Restaurante', 'Loja', 'Auto Peças',
+            'Academia', 'Clínica', 'Pet Shop', 'Açougue', 'Livraria', 'Oficina', 'Hotel']
+WORDS = ['Central', 'São João', 'Boa Vista', 'Estrela', 'Progresso', 'Primavera', 'Aurora',
+         'Bandeirantes', 'Paulista', 'Ipiranga', 'Santa Clara', 'Nova Era', 'União', 'Família']
+
+# Termos digitados letra a letra no autocomplete
+TYPED = ['supermercado estrela', 'farmacia', 'sao joao', 'pet', 'restaurante aurora', 'xyz']
+
+
+def make_names(count):
+    rng = random.Random(42)
+    names = set()
+    while len(names) < count:
+        names.add(f'{rng.choice(PREFIXES)} {rng.choice(WORDS)} {rng.randint(1, 99999)}')
+    return sorted(names)
+
+
+def timed(func):
+    begin = time.perf_counter()
+    func()
+    return (time.perf_counter() - begin) * 1000
+
+
+def worker(count, backend):
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from apps.accounts.models import User, Workspace
+    from apps.beneficiaries.models import Beneficiary, normalize_text
+    from apps.beneficiaries.search import search_beneficiaries
+
+    if backend == 'sqlite':
+        call_command('migrate', verbosity=0)
+
+    user, _ = User.objects.get_or_create(
+        username='bench_search', defaults={'email': 'bench_search@example.com'}
+    )
+    workspace = Workspace.objects.create(nome='bench beneficiários', criado_por=user)
+    try:
+        Beneficiary.objects.bulk_create(
+            [
+                Beneficiary(nome=nome, nome_normalizado=normalize_text(nome), workspace=workspace, user=user)
+                for nome in make_names(count)
+            ],
+            batch_size=2000,
+        )
+
+        keystrokes = [term[:size] for term in TYPED for size in range(1, len(term) + 1)]
+
+        def legacy(term):
+            list(Beneficiary.objects.filter(
+                workspace=workspace, nome__icontains=term, is_active=True
+            )[:10])
+
+        build_ms = timed(lambda: search_beneficiaries(workspace.id, 'a'))
+        results = {
+            'icontains': [timed(lambda t=term: legacy(t)) for term in keystrokes],
+            'search': [timed(lambda t=term: search_beneficiaries(workspace.id, t)) for term in keystrokes],
+        }
+    finally:
+        workspace.delete()
+
+    print(json.dumps({
+        'build_ms': build_ms,
+        'stats': {
+            name: {
+                'p50': statistics.median(samples),
+                'p95': statistics.quantiles(samples, n=20)[-1],
+                'max': max(samples),
+            }
+            for name, samples in results.items()
+        },
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('backend', choices=['sqlite', 'postgres'])
+    parser.add_argument('--count', type=int, default=100_000, help='Beneficiários no workspace')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(BACKEND_DIR))
+        worker(args.count, args.backend)
+        return
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='budgetly.settings')
+    env['USE_POSTGRESQL'] = 'True' if args.backend == 'postgres' else 'False'
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault('SQLITE_NAME', str(Path(tmp) / 'bench.sqlite3'))
+        output = subprocess.run(
+            [sys.executable, __file__, args.backend, '--worker', '--count', str(args.count)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+    if output.returncode != 0:
+        sys.exit(output.stderr)
+
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    print(f"{args.count} beneficiários, build do índice: {result['build_ms']:.0f} ms")
+    print(f"{'variante':<12} {'p50 (ms)':>10} {'p95 (ms)':>10} {'max (ms)':>10}")
+    for name, stats in result['stats'].items():
+        print(f"{name:<12} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['max']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
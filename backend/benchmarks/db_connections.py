@@ -0,0 +1,141 @@
+"""
+Load test de conexões com o banco: reuso/pool no PostgreSQL e tuning do SQLite
+
+Simula o ciclo de requisição do Django (request_started -> queries ->
+request_finished) em várias threads, como workers de um servidor threaded.
+Com CONN_MAX_AGE=0 cada requisição abre e fecha uma conexão; com conexões
+persistentes ou pool a conexão é reaproveitada. No SQLite, compara o journal
+padrão com WAL + synchronous=NORMAL sob leituras e escritas concorrentes.
+
+Cada variante roda em um subprocesso novo com as variáveis de ambiente lidas
+por budgetly.settings.
+
+Uso (a partir de backend/):
+    python benchmarks/db_connections.py sqlite
+    USE_POSTGRESQL=True DB_HOST=localhost python benchmarks/db_connections.py postgres
+    python benchmarks/db_connections.py sqlite --threads 8 --requests 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+VARIANTS = {
+    'postgres': {
+        'sem reuso (CONN_MAX_AGE=0)': {'DB_CONN_MAX_AGE': '0'},
+        'persistente (CONN_MAX_AGE=60)': {'DB_CONN_MAX_AGE': '60'},
+        'pool nativo (psycopg-pool)': {'DB_POOL': 'True'},
+    },
+    'sqlite': {
+        'journal padrão': {'SQLITE_TUNING': 'False'},
+        'WAL + synchronous=NORMAL': {'SQLITE_TUNING': 'True'},
+    },
+}
+
+# A cada WRITE_EVERY requisições, uma faz INSERT (o resto só lê)
+WRITE_EVERY = 5
+
+
+def worker(threads, requests_per_thread):
+    """Executado no subprocesso, com as variáveis de ambiente da variante"""
+    import django
+    django.setup()
+    from django.core.signals import request_started, request_finished
+    from django.db import connection, connections
+
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS bench_conn')
+        cursor.execute('CREATE TABLE bench_conn (id INTEGER PRIMARY KEY, valor INTEGER NOT NULL)')
+    connections.close_all()
+
+    errors = []
+
+    def run(thread_index):
+        try:
+            for i in range(requests_per_thread):
+                request_started.send(sender=None)
+                with connection.cursor() as cursor:
+                    if i % WRITE_EVERY == 0:
+                        cursor.execute(
+                            'INSERT INTO bench_conn (id, valor) VALUES (%s, %s)',
+                            [thread_index * requests_per_thread + i + 1, i],
+                        )
+                    else:
+                        cursor.execute('SELECT COUNT(*), SUM(valor) FROM bench_conn')
+                        cursor.fetchone()
+                request_finished.send(sender=None)
+        except Exception as exc:  # noqa: BLE001 - reportado no resultado
+            errors.append(str(exc))
+        finally:
+            connections.close_all()
+
+    begin = time.perf_counter()
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TABLE bench_conn')
+
+    print(json.dumps({
+        'requests_per_second': threads * requests_per_thread / elapsed,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('backend', choices=sorted(VARIANTS))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=300, help='Requisições por thread')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(BACKEND_DIR))
+        worker(args.threads, args.requests)
+        return
+
+    base_env = dict(os.environ, DJANGO_SETTINGS_MODULE='budgetly.settings')
+    if args.backend == 'postgres':
+        base_env['USE_POSTGRESQL'] = 'True'
+    else:
+        base_env['USE_POSTGRESQL'] = 'False'
+
+    print(f"{'variante':<32} {'req/s':>10}  erros")
+    for name, overrides in VARIANTS[args.backend].items():
+        if overrides.get('DB_POOL') and (find_spec('psycopg') is None or find_spec('psycopg_pool') is None):
+            print(f"{name:<32} {'ignorado':>10}  requer psycopg[pool] (requirements-pool.txt)")
+            continue
+        env = dict(base_env, **overrides)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Banco SQLite descartável por variante (o modo WAL fica gravado no arquivo)
+            env.setdefault('SQLITE_NAME', str(Path(tmp) / 'bench.sqlite3'))
+            output = subprocess.run(
+                [sys.executable, __file__, args.backend, '--worker',
+                 '--threads', str(args.threads), '--requests', str(args.requests)],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+            )
+        if output.returncode != 0:
+            print(f"{name:<32} {'falhou':>10}  {output.stderr.strip().splitlines()[-1]}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        errors = result['errors']
+        detail = f"{errors} ({result['first_error']})" if errors else '0'
+        print(f"{name:<32} {result['requests_per_second']:>10.0f}  {detail}")
+
+
+if __name__ == '__main__':
+    main()
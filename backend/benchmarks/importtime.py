@@ -0,0 +1,110 @@
+"""
+Auditoria de cold start com `python -X importtime`
+
+Importa budgetly.wsgi (que carrega settings, apps e URLs) em um interpretador
+novo, soma o tempo cumulativo dos imports de topo e compara com o orçamento
+registrado em importtime_budget.json. Também falha se algum módulo pesado
+(pandas, openpyxl, ...) for carregado no boot: eles só podem ser importados
+dentro dos fluxos de importação/exportação.
+
+Uso (a partir de backend/):
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --settings budgetly.settings_api --top 20
+    python benchmarks/importtime.py --record   # regrava o orçamento
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / 'importtime_budget.json'
+
+# Margem sobre a mediana medida ao regravar o orçamento
+RECORD_HEADROOM = 1.5
+
+BOOT_SNIPPET = (
+    "import budgetly.wsgi; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def parse_importtime(stderr):
+    """Retorna [(modulo, cumulativo_us, profundidade)] a partir da saída do -X importtime"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line.split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(cumulative_us), depth))
+    return rows
+
+
+def measure(settings_module):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    top_level = [(name, us) for name, us, depth in rows if depth == 0]
+    return {
+        'total_ms': sum(us for _, us in top_level) / 1000,
+        'top_level': top_level,
+        'modules': {name for name, _, _ in rows},
+    }
+
+
+def load_budget():
+    with open(BUDGET_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', default='budgetly.settings')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Imports de topo mais caros a listar')
+    parser.add_argument('--record', action='store_true', help='Regrava o orçamento com a medição atual')
+    args = parser.parse_args()
+
+    budget = load_budget()
+    samples = [measure(args.settings) for _ in range(args.runs)]
+    total_ms = statistics.median(s['total_ms'] for s in samples)
+    last = samples[-1]
+
+    print(f"{args.settings}: cold start (mediana de {args.runs}) = {total_ms:.1f} ms")
+    print(f"Imports de topo mais caros:")
+    for name, us in sorted(last['top_level'], key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    heavy = sorted(
+        name for name in last['modules']
+        if name.split('.')[0] in budget['heavy_modules']
+    )
+    failed = False
+    if heavy:
+        failed = True
+        print(f"ERRO: módulos pesados carregados no boot: {', '.join(heavy)}")
+
+    if args.record:
+        budget['profiles'][args.settings] = {'total_ms': round(total_ms * RECORD_HEADROOM)}
+        with open(BUDGET_FILE, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, indent=4, ensure_ascii=False)
+            f.write('\n')
+        print(f"Orçamento regravado: {budget['profiles'][args.settings]['total_ms']} ms")
+    else:
+        limit = budget['profiles'].get(args.settings, {}).get('total_ms')
+        if limit is not None and total_ms > limit:
+            failed = True
+            print(f"ERRO: cold start acima do orçamento ({total_ms:.1f} ms > {limit} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
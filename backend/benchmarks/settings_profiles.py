@@ -0,0 +1,106 @@
+"""
+Benchmark de startup e overhead por requisição: perfil completo x somente-API
+
+Cada perfil roda em um subprocesso novo (settings não podem ser trocados no
+mesmo processo). O startup mede django.setup() + carga do WSGI + resolução das
+URLs; o overhead por requisição chama a aplicação WSGI diretamente em endpoints
+que não tocam o banco (home JSON e 401 do DRF), isolando middleware e views.
+
+Uso (a partir de backend/):
+    python benchmarks/settings_profiles.py
+    python benchmarks/settings_profiles.py --runs 10 --requests 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    'completo': 'budgetly.settings',
+    'api': 'budgetly.settings_api',
+}
+
+REQUEST_PATHS = [
+    ('/', {'HTTP_ACCEPT': 'application/json'}),
+    ('/api/accounts/accounts/', {'HTTP_ACCEPT': 'application/json'}),
+]
+
+
+def worker(requests_count):
+    """Executado dentro do subprocesso, com DJANGO_SETTINGS_MODULE já definido"""
+    start = time.perf_counter()
+    import django
+    django.setup()
+    from budgetly.wsgi import application
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    startup = time.perf_counter() - start
+
+    from django.test import RequestFactory
+    factory = RequestFactory()
+
+    def start_response(status, headers, exc_info=None):
+        return None
+
+    per_request = {}
+    for path, headers in REQUEST_PATHS:
+        environ = factory.get(path, **headers).environ
+        # Aquecimento (primeira requisição resolve lazies e compila regexes)
+        application(dict(environ), start_response)
+        begin = time.perf_counter()
+        for _ in range(requests_count):
+            application(dict(environ), start_response)
+        per_request[path] = (time.perf_counter() - begin) / requests_count * 1e6
+
+    print(json.dumps({
+        'startup_ms': startup * 1000,
+        'per_request_us': per_request,
+        'modules': len(sys.modules),
+    }))
+
+
+def run_profile(settings_module, runs, requests_count):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, DEBUG='False')
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', '--requests', str(requests_count)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        # O middleware de workspace imprime logs; o JSON é sempre a última linha
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Subprocessos por perfil')
+    parser.add_argument('--requests', type=int, default=2000, help='Requisições por endpoint')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(BACKEND_DIR))
+        worker(args.requests)
+        return
+
+    print(f"{'perfil':<10} {'startup (ms)':>14} {'módulos':>9}  overhead por requisição (µs)")
+    for name, settings_module in PROFILES.items():
+        results = run_profile(settings_module, args.runs, args.requests)
+        startup = statistics.median(r['startup_ms'] for r in results)
+        modules = statistics.median(r['modules'] for r in results)
+        per_request = ', '.join(
+            f"{path} {statistics.median(r['per_request_us'][path] for r in results):.1f}"
+            for path, _ in REQUEST_PATHS
+        )
+        print(f"{name:<10} {startup:>14.1f} {modules:>9.0f}  {per_request}")
+
+
+if __name__ == '__main__':
+    main()
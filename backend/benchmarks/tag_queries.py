@@ -0,0 +1,190 @@
+"""
+Consultas por tag em transações: listagem, filtros e agregação
+
+Com N tags e M transações (cada transação com 0-3 tags), compara:
+
+- listagem de uma página serializada sem e com prefetch_related('tags');
+- filtro "qualquer uma das tags" via JOIN + DISTINCT e via subconsulta;
+- filtro "todas as tags" via um JOIN por tag e via subconsulta agrupada;
+- totais por tag somados em Python e agregados no banco.
+
+O worker roda em um subprocesso com um banco SQLite descartável (ou no
+PostgreSQL configurado; o workspace criado é removido ao final).
+
+Uso (a partir de backend/):
+    python benchmarks/tag_queries.py
+    python benchmarks/tag_queries.py --tags 50 --transactions 100000
+    USE_POSTGRESQL=True DB_NAME=budgetly_bench python benchmarks/tag_queries.py --postgres
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PAGE_SIZE = 1000
+REPEAT = 5
+
+
+def measure(func, repeat=REPEAT):
+    """Menor tempo (ms) em repeat execuções e número de queries da última"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    best = None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            begin = time.perf_counter()
+            result = func()
+            elapsed = (time.perf_counter() - begin) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return {'ms': best, 'queries': len(ctx.captured_queries), 'rows': result}
+
+
+def worker(tag_count, transaction_count, migrate):
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.db.models import Count, Q, Sum
+    from apps.accounts.models import Account, User, Workspace
+    from apps.categories.models import Tag
+    from apps.transactions.models import Transaction
+    from apps.transactions.serializers import TransactionSerializer
+
+    if migrate:
+        call_command('migrate', verbosity=0)
+
+    TransactionTag = Transaction.tags.through
+    rng = random.Random(42)
+
+    user, _ = User.objects.get_or_create(
+        username='bench_tags', defaults={'email': 'bench_tags@example.com'}
+    )
+    workspace = Workspace.objects.create(nome='bench tags', criado_por=user)
+    try:
+        account = Account.objects.create(workspace=workspace, user=user, nome='bench', tipo='conta-bancaria')
+        tags = Tag.objects.bulk_create(
+            [Tag(workspace=workspace, user=user, nome=f'tag {n}') for n in range(tag_count)]
+        )
+        start = date(2024, 1, 1)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    workspace=workspace, user=user, account=account,
+                    tipo=rng.choice(['entrada', 'saida', 'saida']),
+                    valor=rng.randint(100, 100000) / 100, descricao='bench',
+                    data=start + timedelta(days=rng.randint(0, 729)),
+                )
+                for _ in range(transaction_count)
+            ],
+            batch_size=5000,
+        )
+        transaction_ids = list(
+            Transaction.objects.filter(workspace=workspace).values_list('id', flat=True)
+        )
+        TransactionTag.objects.bulk_create(
+            [
+                TransactionTag(transaction_id=transaction_id, tag_id=tag.id)
+                for transaction_id in transaction_ids
+                for tag in rng.sample(tags, rng.randint(0, 3))
+            ],
+            batch_size=5000,
+        )
+
+        base = Transaction.objects.filter(workspace=workspace, confirmada=True).select_related(
+            'account', 'to_account', 'credit_card', 'category', 'beneficiario'
+        ).order_by('-data', '-created_at')
+        any_ids = [tags[0].id, tags[1].id]
+        all_ids = [tags[0].id, tags[1].id]
+
+        def page(queryset):
+            return len(TransactionSerializer(queryset[:PAGE_SIZE], many=True).data)
+
+        def all_of_joins():
+            queryset = base
+            for tag_id in all_ids:
+                queryset = queryset.filter(tags__id=tag_id)
+            return queryset.count()
+
+        def by_tag_python():
+            totals = {}
+            for transaction in base.prefetch_related('tags'):
+                for tag in transaction.tags.all():
+                    totals[tag.nome] = totals.get(tag.nome, 0) + float(transaction.valor)
+            return len(totals)
+
+        def by_tag_sql():
+            return len(list(
+                TransactionTag.objects
+                .filter(transaction_id__in=base.order_by().values('id'))
+                .values('tag_id', 'tag__nome')
+                .annotate(
+                    entradas=Sum('transaction__valor', filter=Q(transaction__tipo='entrada')),
+                    saidas=Sum('transaction__valor', filter=Q(transaction__tipo='saida')),
+                    count=Count('transaction_id'),
+                )
+            ))
+
+        results = {
+            'página sem prefetch': measure(lambda: page(base)),
+            'página com prefetch': measure(lambda: page(base.prefetch_related('tags'))),
+            'any-of JOIN+DISTINCT': measure(
+                lambda: base.filter(tags__id__in=any_ids).distinct().count()
+            ),
+            'any-of subconsulta': measure(lambda: base.filter(id__in=TransactionTag.objects.filter(
+                tag_id__in=any_ids).values('transaction_id')).count()),
+            'all-of um JOIN por tag': measure(all_of_joins),
+            'all-of subconsulta': measure(lambda: base.filter(id__in=TransactionTag.objects.filter(
+                tag_id__in=all_ids).values('transaction_id').annotate(
+                matched=Count('tag_id', distinct=True)).filter(
+                matched=len(all_ids)).values('transaction_id')).count()),
+            'by_tag em Python': measure(by_tag_python, repeat=1),
+            'by_tag no banco': measure(by_tag_sql),
+        }
+    finally:
+        workspace.delete()
+
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tags', type=int, default=50)
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--postgres', action='store_true', help='Usa o PostgreSQL configurado')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(BACKEND_DIR))
+        worker(args.tags, args.transactions, migrate=not args.postgres)
+        return
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='budgetly.settings')
+    env['USE_POSTGRESQL'] = 'True' if args.postgres else 'False'
+    command = [sys.executable, __file__, '--worker',
+               '--tags', str(args.tags), '--transactions', str(args.transactions)]
+    if args.postgres:
+        command.append('--postgres')
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault('SQLITE_NAME', str(Path(tmp) / 'bench.sqlite3'))
+        output = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if output.returncode != 0:
+        sys.exit(output.stderr)
+
+    results = json.loads(output.stdout.strip().splitlines()[-1])
+    print(f"{args.tags} tags x {args.transactions} transações")
+    print(f"{'consulta':<26} {'ms':>10} {'queries':>8} {'linhas':>8}")
+    for name, result in results.items():
+        print(f"{name:<26} {result['ms']:>10.1f} {result['queries']:>8} {result['rows']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Roteamento de leituras para a réplica do banco
+
+Endpoints somente-leitura pesados (relatórios, resumos, agregações por
+categoria, hierarquia, exportações) marcam a requisição com ``use_replica``
+ou ``ReplicaReadMixin``; as leituras feitas durante a view vão para o alias
+``replica``. Escritas sempre vão para ``default``.
+
+Read-your-writes: após uma requisição de escrita bem-sucedida, o usuário fica
+"preso" ao ``default`` por REPLICA_STICKY_SECONDS, cobrindo o atraso de
+replicação. Sem o alias ``replica`` configurado tudo continua em ``default``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = 'replica'
+
+# Requisição atual quando a view pediu leitura na réplica
+_replica_request = ContextVar('replica_request', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _sticky_cache_key(user_id):
+    return f'replica_sticky:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Direciona as leituras do usuário para o default pela janela de stickiness"""
+    cache.set(_sticky_cache_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+
+
+def is_pinned_to_primary(request):
+    """Verifica (uma vez por requisição) se o usuário escreveu recentemente"""
+    if not hasattr(request, '_replica_pinned'):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            # Autenticação ainda não aconteceu; decide na próxima leitura
+            return False
+        request._replica_pinned = bool(cache.get(_sticky_cache_key(user.id)))
+    return request._replica_pinned
+
+
+@contextmanager
+def reading_from_replica(request):
+    """Durante o bloco, as leituras de requisições seguras (GET/HEAD/OPTIONS) vão para a réplica"""
+    if not replica_configured() or request.method not in SAFE_METHODS:
+        yield
+        return
+
+    token = _replica_request.set(request)
+    try:
+        yield
+    finally:
+        _replica_request.reset(token)
+
+
+def use_replica(view_func):
+    """
+    Decorator para views/actions somente-leitura que podem ler da réplica.
+
+    Funciona em function views (request é o 1º argumento) e em métodos de
+    views/actions do DRF (request é o 2º argumento).
+    """
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        request = args[1] if hasattr(args[0], 'request') else args[0]
+        with reading_from_replica(request):
+            return view_func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Mixin para views cujas requisições seguras podem ler da réplica"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with reading_from_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """Router que envia à réplica apenas as leituras das views marcadas"""
+
+    def db_for_read(self, model, **hints):
+        request = _replica_request.get()
+        if request is None or is_pinned_to_primary(request):
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e default têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica é populada pela replicação, nunca por migrations
+        return db != REPLICA_ALIAS
+
+
+class ReplicaStickinessMiddleware:
+    """Marca o usuário para read-your-writes após requisições de escrita bem-sucedidas"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            replica_configured()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            # O DRF grava o usuário autenticado de volta no HttpRequest
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.id)
+
+        return response
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+import django
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -67,6 +70,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'budgetly.db_routers.ReplicaStickinessMiddleware',  # Read-your-writes com réplica
     'apps.accounts.middleware.WorkspaceMiddleware',  # Workspace middleware
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -105,16 +109,70 @@ if config('USE_POSTGRESQL', default=False, cast=bool):
             'PASSWORD': config('DB_PASSWORD', default='postgres'),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            # Reuso de conexões entre requisições (0 = fecha ao fim de cada requisição)
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
         }
     }
+
+    # Lookups/funções de trigramas (pg_trgm) usados na busca de beneficiários
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+    # Pool nativo (Django >= 5.1 com psycopg 3 + psycopg-pool, ver requirements-pool.txt);
+    # substitui CONN_MAX_AGE
+    if config('DB_POOL', default=False, cast=bool):
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured('DB_POOL requer Django >= 5.1 e psycopg[pool].')
+        if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured(
+                'DB_POOL requer psycopg 3 com psycopg-pool: pip install -r requirements-pool.txt'
+            )
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+            },
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # busy timeout: segundos aguardando o lock de escrita antes de "database is locked"
+                'timeout': config('SQLITE_TIMEOUT', default=20, cast=int),
+            },
         }
     }
 
+    # WAL permite leituras concorrentes durante escritas; synchronous=NORMAL é seguro com WAL
+    if config('SQLITE_TUNING', default=True, cast=bool) and django.VERSION >= (5, 1):
+        DATABASES['default']['OPTIONS']['init_command'] = (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+        )
+
+# Réplica de leitura opcional para relatórios e dashboards (ver budgetly/db_routers.py)
+if config('USE_DB_REPLICA', default=False, cast=bool):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES['replica']['NAME'] = config('SQLITE_REPLICA_NAME', default=str(BASE_DIR / 'db_replica.sqlite3'))
+    else:
+        DATABASES['replica'].update({
+            'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+            'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        })
+
+DATABASE_ROUTERS = ['budgetly.db_routers.ReplicaRouter']
+
+# Segundos em que as leituras de um usuário ficam no default após uma escrita
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -182,6 +240,12 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'apps.accounts.exception_handlers.workspace_exception_handler',
 }
 
+# Tempo (segundos) que o papel do usuário no workspace fica em cache
+WORKSPACE_ROLE_CACHE_TIMEOUT = config('WORKSPACE_ROLE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Tempo (segundos) máximo em cache do orçado x realizado (invalidado antes a cada escrita relevante)
+BUDGET_REPORT_CACHE_TIMEOUT = config('BUDGET_REPORT_CACHE_TIMEOUT', default=3600, cast=int)
+
 # Spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Budgetly API',
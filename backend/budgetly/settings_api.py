@@ -0,0 +1,59 @@
+"""
+Perfil de settings para deploys somente-API (JWT atrás de /api/).
+
+Parte de budgetly.settings e remove o que só serve ao admin e ao navegador:
+sessões, CSRF, mensagens, clickjacking, arquivos estáticos e a documentação
+OpenAPI (drf_spectacular). Para usar:
+
+    DJANGO_SETTINGS_MODULE=budgetly.settings_api
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+API_ONLY = True
+
+# Apps que não são usadas por requisições JWT
+API_EXCLUDED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_spectacular',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_EXCLUDED_APPS]
+
+# AuthenticationMiddleware depende de sessões; a autenticação é feita pelo DRF
+API_EXCLUDED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+MIDDLEWARE = [mw for mw in MIDDLEWARE if mw not in API_EXCLUDED_MIDDLEWARE]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema',
+}
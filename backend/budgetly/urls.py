@@ -14,13 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
 from django.http import JsonResponse
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
 
 def home_view(request):
@@ -29,8 +28,8 @@ def home_view(request):
         return JsonResponse({
             'message': 'Budgetly API',
             'version': '1.0',
-            'docs': request.build_absolute_uri('/api/docs/'),
-            'admin': request.build_absolute_uri('/admin/'),
+            'docs': request.build_absolute_uri('/api/docs/') if HAS_DOCS else None,
+            'admin': request.build_absolute_uri('/admin/') if HAS_ADMIN else None,
             'endpoints': {
                 'auth': request.build_absolute_uri('/api/auth/'),
                 'accounts': request.build_absolute_uri('/api/accounts/'),
@@ -41,14 +40,19 @@ def home_view(request):
                 'reports': request.build_absolute_uri('/api/reports/'),
             }
         })
-    return redirect('/api/docs/')
+    if HAS_DOCS:
+        return redirect('/api/docs/')
+    return JsonResponse({'message': 'Budgetly API', 'version': '1.0'})
+
+
+# No perfil somente-API (budgetly.settings_api) admin e docs não são instalados
+HAS_ADMIN = apps.is_installed('django.contrib.admin')
+HAS_DOCS = apps.is_installed('drf_spectacular')
 
 urlpatterns = [
     # Página inicial
     path('', home_view, name='home'),
     
-    path('admin/', admin.site.urls),
-    
     # API URLs
     path('api/auth/', include('apps.accounts.urls')),
     path('api/accounts/', include('apps.accounts.urls')),
@@ -57,13 +61,26 @@ urlpatterns = [
     path('api/beneficiaries/', include('apps.beneficiaries.urls')),
     path('api/budgets/', include('apps.budgets.urls')),
     path('api/reports/', include('apps.reports.urls')),
-    
-    # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
 
+if HAS_ADMIN:
+    from django.contrib import admin
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+    ]
+
+if HAS_DOCS:
+    # Importado aqui para não carregar drf_spectacular no perfil somente-API
+    from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+    urlpatterns += [
+        # API Documentation
+        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+        path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)